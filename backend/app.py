@@ -7,11 +7,12 @@ Flask 应用入口
 """
 
 import os
+import json
 import uuid
 import logging
 import traceback
 from datetime import datetime
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, send_file, Response, stream_with_context
 from flask_cors import CORS
 from werkzeug.utils import secure_filename
 
@@ -26,6 +27,8 @@ from modules.data_loader import DataLoader
 from modules.device_row_classifier import DeviceRowClassifier, AnalysisContext, ProbabilityLevel
 from modules.cache_manager import cache, invalidate_device_cache, invalidate_statistics_cache
 from modules.match_logger import MatchLogger
+from modules.metrics import metrics
+from modules import json_codec
 
 # 导入智能设备模块
 from modules.intelligent_device.configuration_manager import ConfigurationManager
@@ -107,6 +110,8 @@ try:
         config=config,
         device_loader=data_loader
     )
+    # 并行匹配进程池在服务线程启动前创建，之后所有 /api/match 请求复用
+    intelligent_extraction_api.start_match_workers(Config.MATCH_WORKERS)
     
     # 12. 初始化匹配日志记录器
     match_logger = None
@@ -116,6 +121,19 @@ try:
     else:
         logger.warning("数据库模式未启用，匹配日志功能不可用")
     
+    # 13. 初始化异步匹配任务管理器（任务保存在数据库中，行匹配函数在下文定义）
+    match_job_manager = None
+    if hasattr(data_loader, 'loader') and data_loader.loader and hasattr(data_loader.loader, 'db_manager'):
+        from modules.match_job_manager import MatchJobManager
+        match_job_manager = MatchJobManager(
+            data_loader.loader.db_manager,
+            match_rows=lambda batch, counters: list(_match_row_batch(batch, counters)),
+            workers=Config.MATCH_JOB_WORKERS,
+            batch_size=max(1, Config.MATCH_WORKERS) * Config.MATCH_CHUNK_SIZE
+        )
+    else:
+        logger.warning("数据库模式未启用，异步匹配任务不可用")
+    
     logger.info("系统组件初始化完成")
     logger.info(f"已加载 {len(devices)} 个设备")
     logger.info("智能设备录入系统组件初始化完成")
@@ -133,6 +151,7 @@ except Exception as e:
     intelligent_parser = None
     intelligent_extraction_api = None
     match_logger = None
+    match_job_manager = None
 
 
 def allowed_file(filename: str) -> bool:
@@ -183,6 +202,26 @@ def create_error_response(error_code: str, error_message: str, details: dict = N
     return jsonify(response), status_code
 
 
+def json_response(payload, status_code: int = 200) -> Response:
+    """匹配结果等大响应的 JSON 编码（orjson 快速路径，未安装时使用标准库，见 modules/json_codec.py）"""
+    return Response(json_codec.dumps(payload), status=status_code, mimetype='application/json')
+
+
+def _sync_matcher_devices(upsert_ids=(), removed_ids=()):
+    """设备写入成功后增量更新智能匹配器的索引（失败只记录警告，不影响写入结果）"""
+    if intelligent_extraction_api is None or data_loader is None:
+        return
+    try:
+        upserts = []
+        for device_id in upsert_ids:
+            device = data_loader.get_device_by_id(device_id)
+            if device is not None:
+                upserts.append(device)
+        intelligent_extraction_api.apply_device_changes(upserts=upserts, removals=list(removed_ids))
+    except Exception as e:
+        logger.warning(f"匹配器索引增量更新失败: {e}")
+
+
 @app.errorhandler(404)
 def not_found(error):
     return jsonify({'success': False, 'error_code': 'NOT_FOUND', 'error_message': '请求的资源不存在'}), 404
@@ -513,164 +552,482 @@ def parse_file():
         return create_error_response('PARSE_ERROR', 'Excel 文件解析失败', {'error_detail': str(e)})
 
 
+def _row_description(row: dict) -> str:
+    """设备行的描述文本：优先使用 device_description，否则拼接 raw_data"""
+    if 'device_description' in row:
+        return row['device_description']
+    if 'raw_data' in row:
+        raw_data = row['raw_data']
+        if isinstance(raw_data, list):
+            return ' | '.join(str(cell) for cell in raw_data if cell)
+        return str(raw_data)
+    return ''
+
+
+# /api/match 候选设备详情级别：
+# - full: 全部候选包含完整详情（默认）
+# - top1_full: 第一个候选包含完整详情，其余只有 device_id/match_score/unit_price
+# - ids_only: 全部候选只有 device_id/match_score/unit_price
+# 精简的候选可通过 /api/match/candidates 按行懒加载完整详情
+# detail_level 只影响响应中的候选列表，匹配结果和匹配日志始终按完整的第一个候选生成
+MATCH_DETAIL_LEVELS = ('full', 'top1_full', 'ids_only')
+
+# 精简候选保留的字段
+COMPACT_CANDIDATE_FIELDS = ('device_id', 'match_score', 'unit_price')
+
+
+def _compact_candidate(candidate: dict) -> dict:
+    """精简候选设备（智能匹配结果中的候选）：只保留设备ID、得分和价格"""
+    return {
+        'device_id': candidate.get('device_id', ''),
+        'match_score': candidate.get('total_score', 0.0),
+        'unit_price': candidate.get('unit_price', 0.0)
+    }
+
+
+def _candidates_from_match_response(match_response, detail_level: str = 'full') -> list:
+    """
+    把智能匹配结果转换为 /api/match 的候选设备列表
+    
+    第一个候选始终包含完整详情（匹配结果和匹配日志读取它），其余候选按 detail_level 精简；
+    ids_only 的第一个候选在生成匹配结果后由 _compact_first_candidate 精简。
+    """
+    candidates_list = []
+    if not match_response or not match_response.get('success') or not match_response.get('data'):
+        return candidates_list
+    
+    for index, candidate in enumerate(match_response['data'].get('candidates', [])):
+        if index > 0 and detail_level != 'full':
+            candidates_list.append(_compact_candidate(candidate))
+            continue
+        candidates_list.append({
+            'device_id': candidate.get('device_id', ''),
+            'matched_device_text': f"{candidate.get('brand', '')} {candidate.get('device_name', '')} - {candidate.get('spec_model', '')}".strip(),
+            'unit_price': candidate.get('unit_price', 0.0),
+            'match_score': candidate.get('total_score', 0.0),
+            'brand': candidate.get('brand', ''),
+            'device_name': candidate.get('device_name', ''),
+            'spec_model': candidate.get('spec_model', ''),
+            'score_details': candidate.get('score_details', {}),
+            'matched_params': candidate.get('matched_params', []),
+            'unmatched_params': candidate.get('unmatched_params', []),
+            'all_params': candidate.get('all_params', {})
+        })
+    return candidates_list
+
+
+def _compact_first_candidate(candidates_list: list, detail_level: str):
+    """ids_only：匹配结果生成后再精简第一个候选"""
+    if detail_level == 'ids_only' and candidates_list:
+        candidates_list[0] = {field: candidates_list[0][field] for field in COMPACT_CANDIDATE_FIELDS}
+
+
+def _build_device_match_row(row: dict, description: str, candidates_list: list) -> dict:
+    """构建设备行的匹配结果（同时记录匹配日志）"""
+    if candidates_list:
+        best_candidate = candidates_list[0]
+        match_result_dict = {
+            'device_id': best_candidate.get('device_id'),
+            'matched_device_text': best_candidate.get('matched_device_text'),
+            'unit_price': best_candidate.get('unit_price', 0.0),
+            'match_status': 'success',
+            'match_score': best_candidate.get('match_score', 0.0),
+            'match_reason': f"智能匹配成功，总分 {best_candidate.get('match_score', 0.0):.1f}"
+        }
+        
+        # 记录匹配日志（成功）
+        if match_logger:
+            try:
+                match_logger.log_match(
+                    input_description=description,
+                    extracted_features=best_candidate.get('matched_params', []),
+                    match_status='success',
+                    matched_device_id=best_candidate.get('device_id'),
+                    match_score=best_candidate.get('match_score', 0.0),
+                    match_threshold=50.0,  # 默认阈值
+                    match_reason=match_result_dict['match_reason']
+                )
+            except Exception as log_error:
+                logger.warning(f"记录匹配日志失败: {log_error}")
+    else:
+        match_result_dict = {
+            'device_id': None,
+            'matched_device_text': None,
+            'unit_price': 0.0,
+            'match_status': 'failed',
+            'match_score': 0.0,
+            'match_reason': '未找到匹配的设备'
+        }
+        
+        # 记录匹配日志（失败）
+        if match_logger:
+            try:
+                match_logger.log_match(
+                    input_description=description,
+                    extracted_features=[],
+                    match_status='failed',
+                    matched_device_id=None,
+                    match_score=0.0,
+                    match_threshold=50.0,
+                    match_reason='未找到匹配的设备'
+                )
+            except Exception as log_error:
+                logger.warning(f"记录匹配日志失败: {log_error}")
+    
+    return {
+        'row_number': row.get('row_number'),
+        'row_type': 'device',
+        'device_description': description,
+        'match_result': match_result_dict,
+        'candidates': candidates_list
+    }
+
+
+def _match_descriptions(descriptions: list) -> list:
+    """
+    批量智能匹配设备描述（Config.MATCH_WORKERS > 1 时多进程并行）
+    
+    Returns:
+        与 descriptions 一一对应的匹配结果；描述为空的行为 None
+    """
+    texts = [description for description in descriptions if description and description.strip()]
+    try:
+        responses = intelligent_extraction_api.match_texts(
+            texts,
+            top_k=20,
+            workers=Config.MATCH_WORKERS,
+            chunk_size=Config.MATCH_CHUNK_SIZE
+        )
+    except Exception as e:
+        logger.error(f"智能匹配失败: {e}")
+        logger.error(traceback.format_exc())
+        responses = [None] * len(texts)
+    
+    responses = iter(responses)
+    return [next(responses) if description and description.strip() else None for description in descriptions]
+
+
+def _match_row_batch(rows: list, counters: dict, detail_level: str = 'full'):
+    """匹配一批行（设备行一次性批量匹配），按原顺序逐行生成结果"""
+    device_rows = [row for row in rows if row.get('row_type') == 'device']
+    descriptions = [_row_description(row) for row in device_rows]
+    match_responses = iter(_match_descriptions(descriptions))
+    descriptions = iter(descriptions)
+    
+    for row in rows:
+        if row.get('row_type') == 'device':
+            counters['total_devices'] += 1
+            
+            description = next(descriptions)
+            candidates_list = _candidates_from_match_response(next(match_responses), detail_level)
+            if candidates_list:
+                counters['matched'] += 1
+            else:
+                counters['unmatched'] += 1
+            
+            device_row = _build_device_match_row(row, description, candidates_list)
+            _compact_first_candidate(candidates_list, detail_level)
+            yield device_row
+        else:
+            yield {
+                'row_number': row.get('row_number'),
+                'row_type': row.get('row_type'),
+                'device_description': row.get('device_description', ''),
+                'match_result': None
+            }
+
+
+def _iter_matched_rows(rows: list, counters: dict, batch_size: int = None, detail_level: str = 'full'):
+    """
+    逐行生成 /api/match 的行结果
+    
+    Args:
+        rows: 请求中的行
+        counters: 统计计数（total_devices/matched/unmatched），边生成边累加
+        batch_size: 每批匹配的设备行数，None 表示一次匹配全部设备行
+        detail_level: 候选设备详情级别（见 MATCH_DETAIL_LEVELS）
+    """
+    batch = []
+    device_count = 0
+    for row in rows:
+        batch.append(row)
+        if row.get('row_type') == 'device':
+            device_count += 1
+        if batch_size and device_count >= batch_size:
+            yield from _match_row_batch(batch, counters, detail_level)
+            batch = []
+            device_count = 0
+    yield from _match_row_batch(batch, counters, detail_level)
+
+
+def _match_statistics(counters: dict) -> dict:
+    """匹配统计信息"""
+    total_devices = counters['total_devices']
+    accuracy_rate = (counters['matched'] / total_devices * 100) if total_devices > 0 else 0
+    return {
+        'total_devices': total_devices,
+        'matched': counters['matched'],
+        'unmatched': counters['unmatched'],
+        'accuracy_rate': round(accuracy_rate, 2)
+    }
+
+
+def _match_stream_mode(data: dict):
+    """流式响应模式：请求参数 stream 为 ndjson/sse，或 Accept 头声明对应类型；否则返回 None"""
+    mode = data.get('stream')
+    if mode in ('ndjson', 'sse'):
+        return mode
+    accept = request.headers.get('Accept', '')
+    if 'application/x-ndjson' in accept:
+        return 'ndjson'
+    if 'text/event-stream' in accept:
+        return 'sse'
+    return None
+
+
+def _stream_match_response(rows: list, mode: str, detail_level: str = 'full') -> Response:
+    """
+    流式返回匹配结果：每匹配完一行输出一条记录，最后输出统计信息
+    
+    - ndjson: 每行一个 JSON 对象，type 为 row / statistics / error
+    - sse: 事件名为 row / statistics / error，data 为对应的 JSON
+    
+    串行匹配时逐行匹配；配置了多进程时按 MATCH_WORKERS × MATCH_CHUNK_SIZE 行一批并行匹配。
+    内存中只保留当前一批的匹配结果。
+    """
+    if Config.MATCH_WORKERS > 1:
+        batch_size = Config.MATCH_WORKERS * Config.MATCH_CHUNK_SIZE
+    else:
+        batch_size = 1
+    
+    def encode(record_type: str, payload: dict) -> str:
+        body = json_codec.dumps_str(dict(payload, type=record_type))
+        if mode == 'sse':
+            return f"event: {record_type}\ndata: {body}\n\n"
+        return body + '\n'
+    
+    def generate():
+        counters = {'total_devices': 0, 'matched': 0, 'unmatched': 0}
+        try:
+            for matched_row in _iter_matched_rows(rows, counters, batch_size, detail_level):
+                yield encode('row', {'row': matched_row})
+            
+            yield encode('statistics', {
+                'success': True,
+                'statistics': _match_statistics(counters),
+                'message': f"匹配完成：成功 {counters['matched']} 个，失败 {counters['unmatched']} 个"
+            })
+        except Exception as e:
+            logger.error(f"设备匹配失败: {e}")
+            logger.error(traceback.format_exc())
+            yield encode('error', {
+                'success': False,
+                'error_code': 'MATCH_ERROR',
+                'error_message': '设备匹配过程中发生错误',
+                'details': {'error_detail': str(e)}
+            })
+    
+    mimetype = 'text/event-stream' if mode == 'sse' else 'application/x-ndjson'
+    return Response(
+        stream_with_context(generate()),
+        mimetype=mimetype,
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
 @app.route('/api/match', methods=['POST'])
 def match_devices():
-    """设备匹配接口（使用智能提取API）"""
+    """
+    设备匹配接口（使用智能提取API）
+    
+    请求参数 stream 为 ndjson 或 sse（或 Accept 头为 application/x-ndjson / text/event-stream）时
+    流式返回，每匹配完一行输出一条记录，最后输出统计信息。
+    
+    请求参数 detail_level 为 top1_full 或 ids_only 时精简候选设备（见 MATCH_DETAIL_LEVELS），
+    完整详情通过 /api/match/candidates 按行获取。
+    """
     try:
         data = request.get_json()
         if not data or 'rows' not in data:
             return create_error_response('MISSING_ROWS', '请求中缺少 rows 参数')
         
         rows = data['rows']
+        detail_level = data.get('detail_level', 'full')
+        if detail_level not in MATCH_DETAIL_LEVELS:
+            return create_error_response('INVALID_DETAIL_LEVEL', f"detail_level 必须是 {', '.join(MATCH_DETAIL_LEVELS)} 之一")
         
-        matched_rows = []
-        total_devices = matched_count = unmatched_count = 0
+        stream_mode = _match_stream_mode(data)
+        if stream_mode:
+            return _stream_match_response(rows, stream_mode, detail_level)
         
-        for row in rows:
-            if row.get('row_type') == 'device':
-                total_devices += 1
-                
-                if 'device_description' in row:
-                    original_description = row['device_description']
-                elif 'raw_data' in row:
-                    raw_data = row['raw_data']
-                    if isinstance(raw_data, list):
-                        original_description = ' | '.join(str(cell) for cell in raw_data if cell)
-                    else:
-                        original_description = str(raw_data)
-                else:
-                    original_description = ''
-                
-                candidates_list = []
-                match_result_dict = None
-                
-                if original_description and original_description.strip():
-                    try:
-                        match_response = intelligent_extraction_api.match(
-                            text=original_description,
-                            top_k=20
-                        )
-                        
-                        if match_response.get('success') and match_response.get('data'):
-                            match_data = match_response['data']
-                            candidates = match_data.get('candidates', [])
-                            
-                            for candidate in candidates:
-                                candidates_list.append({
-                                    'device_id': candidate.get('device_id', ''),
-                                    'matched_device_text': f"{candidate.get('brand', '')} {candidate.get('device_name', '')} - {candidate.get('spec_model', '')}".strip(),
-                                    'unit_price': candidate.get('unit_price', 0.0),
-                                    'match_score': candidate.get('total_score', 0.0),
-                                    'brand': candidate.get('brand', ''),
-                                    'device_name': candidate.get('device_name', ''),
-                                    'spec_model': candidate.get('spec_model', ''),
-                                    'score_details': candidate.get('score_details', {}),
-                                    'matched_params': candidate.get('matched_params', []),
-                                    'unmatched_params': candidate.get('unmatched_params', []),
-                                    'all_params': candidate.get('all_params', {})
-                                })
-                    except Exception as e:
-                        logger.error(f"智能匹配失败: {e}")
-                        logger.error(traceback.format_exc())
-                
-                if candidates_list:
-                    matched_count += 1
-                    best_candidate = candidates_list[0]
-                    match_result_dict = {
-                        'device_id': best_candidate.get('device_id'),
-                        'matched_device_text': best_candidate.get('matched_device_text'),
-                        'unit_price': best_candidate.get('unit_price', 0.0),
-                        'match_status': 'success',
-                        'match_score': best_candidate.get('match_score', 0.0),
-                        'match_reason': f"智能匹配成功，总分 {best_candidate.get('match_score', 0.0):.1f}"
-                    }
-                    
-                    # 记录匹配日志（成功）
-                    if match_logger:
-                        try:
-                            match_logger.log_match(
-                                input_description=original_description,
-                                extracted_features=best_candidate.get('matched_params', []),
-                                match_status='success',
-                                matched_device_id=best_candidate.get('device_id'),
-                                match_score=best_candidate.get('match_score', 0.0),
-                                match_threshold=50.0,  # 默认阈值
-                                match_reason=match_result_dict['match_reason']
-                            )
-                        except Exception as log_error:
-                            logger.warning(f"记录匹配日志失败: {log_error}")
-                else:
-                    unmatched_count += 1
-                    match_result_dict = {
-                        'device_id': None,
-                        'matched_device_text': None,
-                        'unit_price': 0.0,
-                        'match_status': 'failed',
-                        'match_score': 0.0,
-                        'match_reason': '未找到匹配的设备'
-                    }
-                    
-                    # 记录匹配日志（失败）
-                    if match_logger:
-                        try:
-                            match_logger.log_match(
-                                input_description=original_description,
-                                extracted_features=[],
-                                match_status='failed',
-                                matched_device_id=None,
-                                match_score=0.0,
-                                match_threshold=50.0,
-                                match_reason='未找到匹配的设备'
-                            )
-                        except Exception as log_error:
-                            logger.warning(f"记录匹配日志失败: {log_error}")
-                
-                if 'device_description' in row:
-                    device_description = row['device_description']
-                elif 'raw_data' in row:
-                    raw_data = row['raw_data']
-                    if isinstance(raw_data, list):
-                        device_description = ' | '.join(str(cell) for cell in raw_data if cell)
-                    else:
-                        device_description = str(raw_data)
-                else:
-                    device_description = ''
-                
-                matched_row = {
-                    'row_number': row.get('row_number'),
-                    'row_type': 'device',
-                    'device_description': device_description,
-                    'match_result': match_result_dict,
-                    'candidates': candidates_list
-                }
-                
-                matched_rows.append(matched_row)
-            else:
-                matched_rows.append({
-                    'row_number': row.get('row_number'),
-                    'row_type': row.get('row_type'),
-                    'device_description': row.get('device_description', ''),
-                    'match_result': None
-                })
+        counters = {'total_devices': 0, 'matched': 0, 'unmatched': 0}
+        matched_rows = list(_iter_matched_rows(rows, counters, detail_level=detail_level))
+        statistics = _match_statistics(counters)
         
-        accuracy_rate = (matched_count / total_devices * 100) if total_devices > 0 else 0
-        statistics = {
-            'total_devices': total_devices,
-            'matched': matched_count,
-            'unmatched': unmatched_count,
-            'accuracy_rate': round(accuracy_rate, 2)
+        with metrics.time('response_serialization'):
+            response = json_response({
+                'success': True,
+                'matched_rows': matched_rows,
+                'statistics': statistics,
+                'message': f"匹配完成：成功 {counters['matched']} 个，失败 {counters['unmatched']} 个"
+            })
+        return response
+    except Exception as e:
+        logger.error(f"设备匹配失败: {e}")
+        logger.error(traceback.format_exc())
+        return create_error_response('MATCH_ERROR', '设备匹配过程中发生错误', {'error_detail': str(e)})
+
+
+@app.route('/api/match/candidates', methods=['POST'])
+def get_match_candidates():
+    """
+    获取一行的完整候选设备详情（/api/match 使用 detail_level 精简候选时懒加载）
+    
+    Request:
+        {
+            "device_description": "CO浓度探测器 量程0~250ppm",
+            "device_ids": ["D001"]    // 可选，只返回这些候选设备
         }
+    
+    与 /api/match 使用相同的匹配参数，重复描述直接命中匹配结果缓存。
+    """
+    try:
+        data = request.get_json()
+        if not data or not data.get('device_description', '').strip():
+            return create_error_response('MISSING_DESCRIPTION', '请求中缺少 device_description 参数')
         
-        return jsonify({
+        if intelligent_extraction_api is None:
+            return create_error_response('SERVICE_UNAVAILABLE', '智能匹配服务不可用', status_code=503)
+        
+        description = data['device_description']
+        candidates_list = _candidates_from_match_response(intelligent_extraction_api.match(description, top_k=20))
+        
+        device_ids = data.get('device_ids')
+        if device_ids:
+            wanted = set(device_ids)
+            candidates_list = [c for c in candidates_list if c['device_id'] in wanted]
+        
+        return json_response({
             'success': True,
-            'matched_rows': matched_rows,
-            'statistics': statistics,
-            'message': f'匹配完成：成功 {matched_count} 个，失败 {unmatched_count} 个'
-        }), 200
+            'device_description': description,
+            'candidates': candidates_list
+        })
     except Exception as e:
-        logger.error(f"设备匹配失败: {e}")
+        logger.error(f"获取候选设备详情失败: {e}")
         logger.error(traceback.format_exc())
-        return create_error_response('MATCH_ERROR', '设备匹配过程中发生错误', {'error_detail': str(e)})
+        return create_error_response('GET_CANDIDATES_ERROR', '获取候选设备详情失败', {'error_detail': str(e)})
+
+
+def _match_job_response(job: dict) -> dict:
+    """任务信息（计数转换为与 /api/match 相同的统计信息）"""
+    job = dict(job)
+    job['statistics'] = _match_statistics(job.pop('counters'))
+    return job
+
+
+@app.route('/api/match/jobs', methods=['POST'])
+def submit_match_job():
+    """
+    提交异步匹配任务（请求体与 /api/match 相同）
+    
+    立即返回任务ID，由后台线程池按批匹配；任务保存在数据库中，进程重启后继续执行。
+    """
+    try:
+        if match_job_manager is None:
+            return create_error_response('SERVICE_UNAVAILABLE', '异步匹配任务不可用（需要数据库模式）', status_code=503)
+        
+        data = request.get_json()
+        if not data or 'rows' not in data:
+            return create_error_response('MISSING_ROWS', '请求中缺少 rows 参数')
+        
+        job = match_job_manager.submit(data['rows'])
+        return jsonify({'success': True, 'job': _match_job_response(job)}), 202
+    except Exception as e:
+        logger.error(f"提交匹配任务失败: {e}")
+        logger.error(traceback.format_exc())
+        return create_error_response('SUBMIT_JOB_ERROR', '提交匹配任务失败', {'error_detail': str(e)})
+
+
+@app.route('/api/match/jobs/<job_id>', methods=['GET'])
+def get_match_job(job_id: str):
+    """查询异步匹配任务进度（已完成行数/总行数、预计剩余秒数、当前统计信息）"""
+    try:
+        if match_job_manager is None:
+            return create_error_response('SERVICE_UNAVAILABLE', '异步匹配任务不可用（需要数据库模式）', status_code=503)
+        
+        job = match_job_manager.get_job(job_id)
+        if job is None:
+            return create_error_response('JOB_NOT_FOUND', '匹配任务不存在', status_code=404)
+        
+        return jsonify({'success': True, 'job': _match_job_response(job)}), 200
+    except Exception as e:
+        logger.error(f"查询匹配任务失败: {e}")
+        logger.error(traceback.format_exc())
+        return create_error_response('GET_JOB_ERROR', '查询匹配任务失败', {'error_detail': str(e)})
+
+
+@app.route('/api/match/jobs/<job_id>/result', methods=['GET'])
+def get_match_job_result(job_id: str):
+    """
+    分页获取异步匹配任务的行结果
+    
+    Query Parameters:
+        page: 页码，默认 1
+        page_size: 每页行数，默认 100
+    
+    任务执行中也可获取已完成的行；matched_rows 的元素与 /api/match 相同。
+    """
+    try:
+        if match_job_manager is None:
+            return create_error_response('SERVICE_UNAVAILABLE', '异步匹配任务不可用（需要数据库模式）', status_code=503)
+        
+        page = request.args.get('page', 1, type=int)
+        page_size = request.args.get('page_size', 100, type=int)
+        result = match_job_manager.get_results(job_id, page=page, page_size=page_size)
+        if result is None:
+            return create_error_response('JOB_NOT_FOUND', '匹配任务不存在', status_code=404)
+        
+        job = _match_job_response(result['job'])
+        return json_response({
+            'success': True,
+            'job_id': job_id,
+            'status': job['status'],
+            'total': result['total'],
+            'page': result['page'],
+            'page_size': result['page_size'],
+            'matched_rows': result['rows'],
+            'statistics': job['statistics']
+        })
+    except Exception as e:
+        logger.error(f"获取匹配任务结果失败: {e}")
+        logger.error(traceback.format_exc())
+        return create_error_response('GET_JOB_RESULT_ERROR', '获取匹配任务结果失败', {'error_detail': str(e)})
+
+
+# 进程启动时继续执行上次未完成的异步匹配任务
+if match_job_manager is not None:
+    try:
+        match_job_manager.resume_unfinished()
+    except Exception as e:
+        logger.error(f"恢复匹配任务失败: {e}")
+
+
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    """
+    运行指标接口
+    
+    默认返回 Prometheus 文本格式：各阶段耗时直方图、估算的 p50/p95/p99 和出错次数；
+    format=json 时返回各阶段的调用次数、出错次数、总耗时和分位数（秒）。
+    """
+    try:
+        if request.args.get('format') == 'json':
+            return jsonify({'success': True, 'data': metrics.snapshot()}), 200
+        return Response(metrics.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
+    except Exception as e:
+        logger.error(f"获取运行指标失败: {e}")
+        logger.error(traceback.format_exc())
+        return create_error_response('METRICS_ERROR', '获取运行指标失败', {'error_detail': str(e)})
 
 
 @app.route('/api/match/detail/<cache_key>', methods=['GET'])
@@ -730,10 +1087,10 @@ def get_match_detail(cache_key: str):
             }), 500
         
         logger.info(f"成功获取匹配详情: {cache_key}")
-        return jsonify({
+        return json_response({
             'success': True,
             'detail': detail_dict
-        }), 200
+        })
         
     except Exception as e:
         logger.error(f"获取匹配详情失败: {e}")
@@ -1326,6 +1683,7 @@ def update_device(device_id):
                     data_loader.loader.save_rule(rule)
                     logger.info(f"设备 {device_id} 的规则已重新生成")
             
+            _sync_matcher_devices(upsert_ids=[device_id])
             logger.info(f"设备更新成功: {device_id} (类型: {device.device_type})")
             return jsonify({
                 'success': True,
@@ -1600,6 +1958,7 @@ def delete_device_by_id(device_id):
         success = data_loader.loader.delete_device(device_id)
         
         if success:
+            _sync_matcher_devices(removed_ids=[device_id])
             logger.info(f"设备删除成功: {device_id}")
             return jsonify({'success': True, 'message': '设备删除成功'})
         else:
@@ -1665,6 +2024,7 @@ def batch_delete_devices():
         deleted_count = 0
         failed_count = 0
         failed_devices = []
+        deleted_ids = []
         
         # 逐个删除设备
         for device_id in device_ids:
@@ -1683,6 +2043,7 @@ def batch_delete_devices():
                 
                 if success:
                     deleted_count += 1
+                    deleted_ids.append(device_id)
                     logger.info(f"设备删除成功: {device_id}")
                 else:
                     failed_count += 1
@@ -1699,6 +2060,8 @@ def batch_delete_devices():
                 })
                 logger.error(f"删除设备 {device_id} 失败: {e}")
         
+        _sync_matcher_devices(removed_ids=deleted_ids)
+        
         # 构建响应消息
         if failed_count == 0:
             message = f'成功删除 {deleted_count} 个设备'
@@ -1837,6 +2200,7 @@ def batch_import_devices():
             updated_count = 0
             failed_count = 0
             failed_devices = []
+            inserted_ids = []
             for device_data in devices_data:
                 try:
                     # 生成设备ID
@@ -1858,6 +2222,7 @@ def batch_import_devices():
                     
                     if success:
                         inserted_count += 1
+                        inserted_ids.append(device_id)
                         logger.info(f"设备导入成功: {device_id}")
                         
 
@@ -1876,6 +2241,8 @@ def batch_import_devices():
                     })
                     logger.error(f"导入设备失败: {e}")
             
+            _sync_matcher_devices(upsert_ids=inserted_ids)
+            
             # 构建响应消息
             if failed_count == 0:
                 message = f'成功导入 {inserted_count} 个设备'
@@ -1984,6 +2351,7 @@ def create_device():
                     data_loader.loader.save_rule(rule)
                     logger.info(f"设备 {device.device_id} 的规则已自动生成")
             
+            _sync_matcher_devices(upsert_ids=[device.device_id])
             logger.info(f"设备创建成功: {device.device_id} (类型: {device.device_type}, 录入方式: {device.input_method})")
             return jsonify({
                 'success': True, 
@@ -3494,7 +3862,7 @@ def intelligent_extract():
         
         text = data.get('text', '')
         result = intelligent_extraction_api.extract(text)
-        return jsonify(result)
+        return json_response(result)
     except Exception as e:
         logger.error(f"智能提取失败: {e}")
         logger.error(traceback.format_exc())
@@ -3549,7 +3917,7 @@ def intelligent_match():
         text = data.get('text', '')
         top_k = data.get('top_k', 5)
         result = intelligent_extraction_api.match(text, top_k)
-        return jsonify(result)
+        return json_response(result)
     except Exception as e:
         logger.error(f"智能匹配失败: {e}")
         logger.error(traceback.format_exc())
@@ -3562,6 +3930,26 @@ def intelligent_match():
         }), 500
 
 
+@app.route('/api/intelligent-extraction/match-cache/stats', methods=['GET'])
+def intelligent_match_cache_stats():
+    """
+    匹配结果缓存和提取结果缓存统计
+    
+    Response:
+        {
+            "success": true,
+            "data": {"hits": 120, "misses": 80, "hit_rate": 0.6, "size": 80, "maxsize": 1024},
+            "extraction_cache": {"hits": 30, "misses": 50, "hit_rate": 0.375, "size": 50, "maxsize": 1024}
+        }
+    """
+    from modules.intelligent_extraction.match_cache import extraction_cache, match_result_cache
+    return jsonify({
+        'success': True,
+        'data': match_result_cache.stats(),
+        'extraction_cache': extraction_cache.stats()
+    })
+
+
 @app.route('/api/intelligent-extraction/preview', methods=['POST'])
 def intelligent_preview():
     """
@@ -3610,13 +3998,9 @@ def intelligent_preview():
         text = data.get('text', '')
         record_log = data.get('record_log', False)  # 默认不记录日志
         
-        # 每次调用时重新加载配置中的设备类型识别部分，确保使用最新配置
+        # 每次调用时检查配置，设备类型识别部分有变化时重建识别器，确保使用最新配置
         try:
-            from modules.intelligent_extraction.device_type_recognizer import DeviceTypeRecognizer
-            fresh_config = data_loader.load_config()
-            ie_config = fresh_config.get('intelligent_extraction', {})
-            device_type_config = ie_config.get('device_type_recognition', {})
-            intelligent_extraction_api.device_recognizer = DeviceTypeRecognizer(device_type_config, full_config=fresh_config)
+            intelligent_extraction_api.reload_device_recognizer(data_loader.load_config())
         except Exception as reload_err:
             logger.warning(f"重新加载设备类型识别器失败: {reload_err}")
         
@@ -3684,7 +4068,7 @@ def intelligent_preview():
                 logger.error(f"记录预览日志失败: {log_error}")
                 # 日志记录失败不影响预览结果
         
-        return jsonify(result)
+        return json_response(result)
     except Exception as e:
         logger.error(f"预览失败: {e}")
         logger.error(traceback.format_exc())
@@ -3741,13 +4125,9 @@ def recognize_device_type():
         
         text = data.get('text', '')
         
-        # 每次调用时重新加载配置，确保使用最新的设备类型和前缀关键词
+        # 每次调用时检查配置，有变化时重建识别器，确保使用最新的设备类型和前缀关键词
         try:
-            from modules.intelligent_extraction.device_type_recognizer import DeviceTypeRecognizer
-            fresh_config = data_loader.load_config()
-            ie_config = fresh_config.get('intelligent_extraction', {})
-            device_type_config = ie_config.get('device_type_recognition', {})
-            intelligent_extraction_api.device_recognizer = DeviceTypeRecognizer(device_type_config, full_config=fresh_config)
+            intelligent_extraction_api.reload_device_recognizer(data_loader.load_config())
         except Exception as reload_err:
             logger.warning(f"重新加载设备类型识别器失败: {reload_err}")
         
@@ -3863,6 +4243,7 @@ def create_intelligent_device():
             if not success:
                 raise DatabaseError("设备保存失败")
             
+            _sync_matcher_devices(upsert_ids=[device_id])
             logger.info(f"智能设备创建成功: {device_id}")
             
             # 返回成功响应
@@ -34,3 +34,11 @@ class Config:
     # 性能配置
     PARSE_TIMEOUT = 5  # 秒
     MATCH_TIMEOUT = 10  # 秒
+    
+    # 设备匹配并行配置（/api/match）
+    # MATCH_WORKERS: 并行匹配的子进程数量，0 表示串行（需要支持 fork 的平台）
+    # MATCH_CHUNK_SIZE: 每个子进程任务的行数
+    MATCH_WORKERS = int(os.environ.get('MATCH_WORKERS', '0'))
+    MATCH_CHUNK_SIZE = int(os.environ.get('MATCH_CHUNK_SIZE', '50'))
+    # MATCH_JOB_WORKERS: 同时执行的异步匹配任务数量（/api/match/jobs）
+    MATCH_JOB_WORKERS = int(os.environ.get('MATCH_JOB_WORKERS', '1'))
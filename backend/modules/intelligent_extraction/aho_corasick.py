@@ -0,0 +1,98 @@
+"""
+多模式字符串匹配自动机（Aho-Corasick）
+
+由一组模式串构建，扫描一遍文本即可找出出现的全部模式串，扫描耗时与模式数量无关。
+用于设备类型识别等"判断大量词条中哪些出现在文本中"的场景，替代逐个词条的 `in` / re.search。
+
+- 区分大小写，按字符匹配（与 `pattern in text` 的语义相同，重叠的出现也能找到）
+- 构建后只读，可在多线程间共享
+- 空模式串视为在任何文本中都出现（与 `'' in text` 相同）
+"""
+
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Set, Tuple
+
+
+class AhoCorasick:
+    """多模式字符串匹配自动机"""
+
+    def __init__(self, patterns: Iterable[str]):
+        """
+        构建自动机
+
+        Args:
+            patterns: 模式串（重复的模式串只保留一个）
+        """
+        self.patterns: List[str] = list(dict.fromkeys(patterns))
+        self._has_empty = '' in self.patterns
+
+        # 状态转移表、失败指针、每个状态结束的模式串（含失败链上的输出）
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[str, ...]] = [()]
+
+        for pattern in self.patterns:
+            if pattern:
+                self._insert(pattern)
+        self._build_failure_links()
+
+    def _insert(self, pattern: str):
+        """把模式串加入字典树"""
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto[state][char] = next_state
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(())
+            state = next_state
+        self._output[state] = self._output[state] + (pattern,)
+
+    def _build_failure_links(self):
+        """按层次遍历计算失败指针，并把失败链上的输出合并到各状态"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = target if target != next_state else 0
+                self._output[next_state] = self._output[next_state] + self._output[self._fail[next_state]]
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, str]]:
+        """
+        逐个产生文本中出现的模式串
+
+        Yields:
+            (结束位置（不含）, 模式串)，按结束位置先后；空模式串不产生
+        """
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        state = 0
+        for index, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for pattern in output[state]:
+                yield index + 1, pattern
+
+    def find_all(self, text: str) -> Set[str]:
+        """文本中出现的全部模式串"""
+        goto = self._goto
+        fail = self._fail
+        output = self._output
+        found = {''} if self._has_empty else set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
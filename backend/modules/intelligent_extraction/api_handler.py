@@ -4,7 +4,9 @@ API处理器
 提供智能提取和匹配的API接口
 """
 
+import dataclasses
 import logging
+import pickle
 import time
 from datetime import datetime
 from typing import Dict, List, Any, Optional
@@ -13,10 +15,17 @@ from .parameter_extractor import ParameterExtractor
 from .parameter_candidate_extractor import ParameterCandidateExtractor
 from .auxiliary_extractor import AuxiliaryExtractor
 from .intelligent_matcher import IntelligentMatcher
+from .match_cache import config_fingerprint, extraction_cache, match_result_cache
+from . import parallel_matcher
 from .data_models import ExtractionResult
+from modules.metrics import metrics
+from modules.single_flight import SingleFlight
 
 logger = logging.getLogger(__name__)
 
+# 批量匹配时文本数量达到该值才按设备类型分组匹配
+GROUPED_MATCH_MIN_TEXTS = 20
+
 
 class IntelligentExtractionAPI:
     """智能提取API处理器"""
@@ -71,8 +80,109 @@ class IntelligentExtractionAPI:
         # 初始化匹配器（使用完整配置）
         self.matcher = IntelligentMatcher(config, device_loader)
         
+        # 匹配结果缓存和提取结果缓存（进程级共享，按配置版本和设备库版本区分）
+        self.config_version = config_fingerprint(config)
+        self._base_config_version = self.config_version
+        self._recognizer_config_version = self.config_version
+        self.result_cache = match_result_cache
+        self.extraction_cache = extraction_cache
+        
+        # 并发的相同匹配/预览请求只计算一次（键与匹配结果缓存键相同）
+        self.inflight = SingleFlight()
+        
         logger.info(f"智能提取API初始化完成 - 设备类型数: {len(device_type_config.get('device_types', []))}")
     
+    def apply_device_changes(self, upserts: Optional[List[Any]] = None,
+                             removals: Optional[List[str]] = None) -> Dict[str, int]:
+        """
+        设备库写入后增量更新匹配器索引
+        
+        Args:
+            upserts: 新增或更新的设备（设备字典或 Device 对象）
+            removals: 删除的设备ID
+            
+        Returns:
+            Dict[str, int]: {'upserted': 新增/更新数量, 'removed': 移除数量}
+        """
+        return self.matcher.apply_changes(upserts=upserts, removals=removals)
+    
+    def reload_device_recognizer(self, config: Dict[str, Any]) -> bool:
+        """
+        按最新配置重建设备类型识别器（配置内容未变化时保留现有识别器）
+        
+        识别器重建后配置版本随之变化，之前缓存的提取结果和匹配结果不再命中。
+        
+        Args:
+            config: 完整配置
+            
+        Returns:
+            bool: 是否重建了识别器
+        """
+        version = config_fingerprint(config)
+        if version == self._recognizer_config_version:
+            return False
+        
+        device_type_config = config.get('intelligent_extraction', {}).get('device_type_recognition', {})
+        self.device_recognizer = DeviceTypeRecognizer(device_type_config, full_config=config)
+        self._recognizer_config_version = version
+        if version == self._base_config_version:
+            self.config_version = self._base_config_version
+        else:
+            self.config_version = config_fingerprint({'config': self._base_config_version, 'device_type_recognition': version})
+        logger.info("设备类型识别器已按最新配置重建")
+        return True
+    
+    def _cached_extraction(self, text: str, with_candidates: bool = True,
+                           step_times: Optional[Dict[str, float]] = None) -> tuple:
+        """
+        提取设备信息（先查提取结果缓存）
+        
+        Args:
+            text: 输入文本
+            with_candidates: 是否需要参数候选（匹配流程不需要）
+            step_times: 传入时记录各步骤耗时（step1/2/3_time_ms，命中缓存的步骤不记录）
+            
+        Returns:
+            (ExtractionResult, 是否命中缓存)；返回的提取结果是独立副本
+        """
+        key = (text, self.config_version)
+        entry = self.extraction_cache.get(key)
+        if entry is not None:
+            extraction, has_candidates = entry
+            if has_candidates or not with_candidates:
+                return extraction, True
+        else:
+            step_start = time.time()
+            device_type = self.device_recognizer.recognize(text)
+            step1_time = (time.time() - step_start) * 1000
+            
+            step_start = time.time()
+            parameters = self.parameter_extractor.extract(text)
+            step2_time = (time.time() - step_start) * 1000
+            
+            step_start = time.time()
+            auxiliary = self.auxiliary_extractor.extract(text)
+            step3_time = (time.time() - step_start) * 1000
+            
+            extraction = ExtractionResult(
+                device_type=device_type,
+                parameters=parameters,
+                auxiliary=auxiliary,
+                raw_text=text,
+                timestamp=datetime.now()
+            )
+            if step_times is not None:
+                step_times.update(step1_time_ms=step1_time, step2_time_ms=step2_time, step3_time_ms=step3_time)
+        
+        if with_candidates:
+            step_start = time.time()
+            extraction.parameter_candidates = self.candidate_extractor.extract_all_candidates(text)
+            if step_times is not None:
+                step_times['step2_time_ms'] = step_times.get('step2_time_ms', 0.0) + (time.time() - step_start) * 1000
+        
+        self.extraction_cache.put(key, (extraction, with_candidates))
+        return extraction, False
+    
     def extract(self, text: str) -> Dict[str, Any]:
         """
         提取设备信息
@@ -95,38 +205,18 @@ class IntelligentExtractionAPI:
         try:
             start_time = time.time()
             
-            # 提取设备类型
-            device_type = self.device_recognizer.recognize(text)
-            
-            # 提取参数（保留原有逻辑，用于兼容）
-            parameters = self.parameter_extractor.extract(text)
-            
-            # 提取参数候选（新增）
-            print(f"[DEBUG] 开始提取参数候选，文本长度: {len(text)}")
-            parameter_candidates = self.candidate_extractor.extract_all_candidates(text)
-            print(f"[DEBUG] 提取到 {len(parameter_candidates)} 个参数候选")
-            
-            # 提取辅助信息
-            auxiliary = self.auxiliary_extractor.extract(text)
-            
-            # 构建提取结果
-            extraction = ExtractionResult(
-                device_type=device_type,
-                parameters=parameters,
-                parameter_candidates=parameter_candidates,
-                auxiliary=auxiliary,
-                raw_text=text,
-                timestamp=datetime.now()
-            )
+            # 设备类型、参数、参数候选、辅助信息（先查提取结果缓存）
+            extraction, cache_hit = self._cached_extraction(text)
             
             elapsed_time = (time.time() - start_time) * 1000
             
+            performance = {'total_time_ms': elapsed_time}
+            if cache_hit:
+                performance['cache_hit'] = True
             return {
                 'success': True,
                 'data': extraction.to_dict(),
-                'performance': {
-                    'total_time_ms': elapsed_time
-                }
+                'performance': performance
             }
         except Exception as e:
             logger.error(f"提取失败: {e}", exc_info=True)
@@ -140,7 +230,65 @@ class IntelligentExtractionAPI:
     
     def match(self, text: str, top_k: int = 5) -> Dict[str, Any]:
         """
-        智能匹配设备
+        智能匹配设备（先查匹配结果缓存）
+        
+        Args:
+            text: 输入文本
+            top_k: 返回前k个候选设备
+            
+        Returns:
+            Dict: 匹配结果
+        """
+        if not text or not text.strip():
+            return self.match_uncached(text, top_k)
+        
+        key = self._match_cache_key(text, top_k)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        
+        # 相同请求正在匹配时等待其完成，再从缓存取副本
+        result, shared = self.inflight.do(key, lambda: self._match_and_cache(key, text, top_k))
+        if shared:
+            return self._shared_result(key, text, top_k)
+        return result
+    
+    def _match_and_cache(self, key: tuple, text: str, top_k: int) -> Dict[str, Any]:
+        """匹配并写入缓存"""
+        result = self.match_uncached(text, top_k)
+        self._cache_put(key, result)
+        return result
+    
+    def _shared_result(self, key: tuple, text: str, top_k: int) -> Dict[str, Any]:
+        """等待的并发请求完成后取结果副本（失败的结果不缓存，此时自己重新匹配）"""
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        return self.match_uncached(text, top_k)
+    
+    def _match_cache_key(self, text: str, top_k: int) -> tuple:
+        """匹配结果缓存键（须在匹配前生成，匹配期间设备库更新时结果记在旧版本下）"""
+        return (text, top_k, self.config_version, self.matcher.catalog_version)
+    
+    def _cache_get(self, key: tuple) -> Optional[Dict[str, Any]]:
+        """从缓存读取匹配结果副本；未命中时返回 None"""
+        start_time = time.time()
+        result = self.result_cache.get(key)
+        if result is not None:
+            result['performance'] = {
+                'total_time_ms': (time.time() - start_time) * 1000,
+                'cache_hit': True
+            }
+        return result
+    
+    def _cache_put(self, key: tuple, result: Dict[str, Any]):
+        """缓存成功的匹配结果"""
+        if result.get('success'):
+            self.result_cache.put(key, result)
+    
+    def match_uncached(self, text: str, top_k: int = 5) -> Dict[str, Any]:
+        """
+        智能匹配设备（不经过结果缓存）
         
         Args:
             text: 输入文本
@@ -161,27 +309,22 @@ class IntelligentExtractionAPI:
         try:
             start_time = time.time()
             
-            # 提取设备信息
-            device_type = self.device_recognizer.recognize(text)
-            parameters = self.parameter_extractor.extract(text)
-            auxiliary = self.auxiliary_extractor.extract(text)
-            
-            extraction = ExtractionResult(
-                device_type=device_type,
-                parameters=parameters,
-                auxiliary=auxiliary,
-                raw_text=text,
-                timestamp=datetime.now()
-            )
+            # 提取设备信息（先查提取结果缓存）
+            extraction, _ = self._cached_extraction(text, with_candidates=False)
+            if extraction.parameter_candidates:
+                # 匹配流程不使用参数候选，与未经过预览/提取的文本保持相同的匹配结果
+                extraction = dataclasses.replace(extraction, parameter_candidates=[])
             
             # 智能匹配
             match_result = self.matcher.match(extraction, top_k)
+            with metrics.time('result_serialization'):
+                data = match_result.to_dict()
             
             elapsed_time = (time.time() - start_time) * 1000
             
             return {
                 'success': True,
-                'data': match_result.to_dict(),
+                'data': data,
                 'performance': {
                     'total_time_ms': elapsed_time
                 }
@@ -196,6 +339,124 @@ class IntelligentExtractionAPI:
                 }
             }
     
+    def _match_extraction(self, text: str, device_type) -> ExtractionResult:
+        """构建匹配用的提取结果（设备类型已识别）"""
+        return ExtractionResult(
+            device_type=device_type,
+            parameters=self.parameter_extractor.extract(text),
+            auxiliary=self.auxiliary_extractor.extract(text),
+            raw_text=text,
+            timestamp=datetime.now()
+        )
+    
+    def match_batch_uncached(self, texts: List[str], top_k: int = 5) -> List[Dict[str, Any]]:
+        """
+        批量匹配非空文本（不经过结果缓存）
+        
+        文本数量达到 GROUPED_MATCH_MIN_TEXTS 时先识别全部文本的设备类型，再由匹配器
+        按设备类型分组匹配；否则逐条匹配。分组匹配出错时回退逐条匹配。
+        
+        Returns:
+            List[Dict]: 与 texts 一一对应的结果（与逐条调用 match_uncached 相同，
+            performance.total_time_ms 为整批耗时的平均值）
+        """
+        if len(texts) < GROUPED_MATCH_MIN_TEXTS:
+            return [self.match_uncached(text, top_k) for text in texts]
+        
+        try:
+            start_time = time.time()
+            
+            device_types = [self.device_recognizer.recognize(text) for text in texts]
+            extractions = [
+                self._match_extraction(text, device_type) for text, device_type in zip(texts, device_types)
+            ]
+            match_results = self.matcher.match_batch(extractions, top_k)
+            with metrics.time('result_serialization'):
+                data = [match_result.to_dict() for match_result in match_results]
+            
+            elapsed_time = (time.time() - start_time) * 1000 / len(texts)
+            return [
+                {
+                    'success': True,
+                    'data': match_data,
+                    'performance': {
+                        'total_time_ms': elapsed_time
+                    }
+                }
+                for match_data in data
+            ]
+        except Exception as e:
+            logger.warning(f"分组批量匹配失败，回退逐条匹配: {e}", exc_info=True)
+            return [self.match_uncached(text, top_k) for text in texts]
+    
+    def start_match_workers(self, workers: int):
+        """
+        预先创建并行匹配的 fork 进程池（应用启动时、服务线程启动前调用）
+        
+        Args:
+            workers: 子进程数量，0 或 1 表示串行（不创建进程池）
+        """
+        parallel_matcher.start_pool(self, workers)
+    
+    def match_texts(self, texts: List[str], top_k: int = 5, workers: int = 0,
+                    chunk_size: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        批量匹配文本，workers > 1 时按块分发到 fork 进程池并行匹配
+        
+        Args:
+            texts: 输入文本列表
+            top_k: 返回前k个候选设备
+            workers: 子进程数量，0 或 1 表示串行
+            chunk_size: 每块文本数量
+            
+        Returns:
+            List[Dict]: 与 texts 一一对应的匹配结果（与逐条调用 match 相同）
+        """
+        # 先查缓存，未命中的文本去重后再匹配（子进程中写入的缓存不会带回主进程，统一在这里写入）
+        results: List[Optional[Dict[str, Any]]] = [None] * len(texts)
+        miss_keys: Dict[str, tuple] = {}
+        for i, text in enumerate(texts):
+            if not text or not text.strip() or text in miss_keys:
+                continue
+            key = self._match_cache_key(text, top_k)
+            results[i] = self._cache_get(key)
+            if results[i] is None:
+                miss_keys[text] = key
+        
+        # 其他请求正在匹配的文本不重复匹配：先匹配自己负责的文本，再等待其余文本
+        flights = {text: self.inflight.claim(key) for text, key in miss_keys.items()}
+        leading = [text for text, (_, leader) in flights.items() if leader]
+        try:
+            computed = dict(zip(leading, parallel_matcher.match_texts(self, leading, top_k, workers, chunk_size)))
+        except BaseException as e:
+            for text in leading:
+                self.inflight.resolve(miss_keys[text], flights[text][0], error=e)
+            raise
+        for text, result in computed.items():
+            self._cache_put(miss_keys[text], result)
+            self.inflight.resolve(miss_keys[text], flights[text][0])
+        for text, (flight, leader) in flights.items():
+            if not leader:
+                try:
+                    flight.wait()
+                except Exception as e:
+                    logger.warning(f"等待并发匹配失败，重新匹配: {e}")
+                computed[text] = self._shared_result(miss_keys[text], text, top_k)
+        
+        served = set()
+        for i, text in enumerate(texts):
+            if results[i] is not None:
+                continue
+            if text not in computed:
+                results[i] = self.match_uncached(text, top_k)
+            elif text not in served:
+                results[i] = computed[text]
+                served.add(text)
+            else:
+                # 重复文本：与逐条匹配时一样从缓存取副本（结果未缓存时复制一份）
+                results[i] = self._cache_get(miss_keys[text]) or pickle.loads(pickle.dumps(computed[text]))
+        return results
+    
     def match_batch(self, items: List[Dict[str, str]], top_k: int = 5) -> Dict[str, Any]:
         """
         批量匹配设备
@@ -209,16 +470,16 @@ class IntelligentExtractionAPI:
         """
         try:
             start_time = time.time()
-            results = []
+            texts = [item.get('text', '') for item in items]
             
-            for idx, item in enumerate(items):
-                text = item.get('text', '')
-                result = self.match(text, top_k)
-                results.append({
+            results = [
+                {
                     'index': idx,
                     'text': text,
                     'result': result
-                })
+                }
+                for idx, (text, result) in enumerate(zip(texts, self.match_texts(texts, top_k)))
+            ]
             
             elapsed_time = (time.time() - start_time) * 1000
             
@@ -242,7 +503,26 @@ class IntelligentExtractionAPI:
     
     def preview(self, text: str) -> Dict[str, Any]:
         """
-        五步流程预览
+        五步流程预览（并发的相同请求只计算一次，各自得到独立的结果副本）
+        
+        Args:
+            text: 输入文本
+            
+        Returns:
+            Dict: 预览结果，包含五步流程的完整信息
+        """
+        if not text or not text.strip():
+            return self.preview_uncached(text)
+        
+        key = ('preview', text, self.config_version, self.matcher.catalog_version)
+        payload, _ = self.inflight.do(
+            key, lambda: pickle.dumps(self.preview_uncached(text), pickle.HIGHEST_PROTOCOL)
+        )
+        return pickle.loads(payload)
+    
+    def preview_uncached(self, text: str) -> Dict[str, Any]:
+        """
+        五步流程预览（不合并并发请求）
         
         Args:
             text: 输入文本
@@ -261,33 +541,15 @@ class IntelligentExtractionAPI:
         
         try:
             start_time = time.time()
-            step_times = {}
             
-            # 第一步：设备类型识别
-            step1_start = time.time()
-            device_type = self.device_recognizer.recognize(text)
-            step_times['step1_time_ms'] = (time.time() - step1_start) * 1000
-            
-            # 第二步：参数候选提取（新增）
-            step2_start = time.time()
-            parameter_candidates = self.candidate_extractor.extract_all_candidates(text)
-            parameters = self.parameter_extractor.extract(text)  # 保留原有逻辑，用于兼容
-            step_times['step2_time_ms'] = (time.time() - step2_start) * 1000
-            
-            # 第三步：辅助信息提取
-            step3_start = time.time()
-            auxiliary = self.auxiliary_extractor.extract(text)
-            step_times['step3_time_ms'] = (time.time() - step3_start) * 1000
+            # 第一步到第三步：设备类型识别、参数候选提取、辅助信息提取（先查提取结果缓存，命中的步骤耗时记为 0）
+            step_times = {'step1_time_ms': 0.0, 'step2_time_ms': 0.0, 'step3_time_ms': 0.0}
+            extraction, cache_hit = self._cached_extraction(text, step_times=step_times)
+            device_type = extraction.device_type
+            parameter_candidates = extraction.parameter_candidates
             
             # 第四步：智能匹配
             step4_start = time.time()
-            extraction = ExtractionResult(
-                device_type=device_type,
-                parameters=parameters,
-                parameter_candidates=parameter_candidates,
-                auxiliary=auxiliary,
-                raw_text=text
-            )
             match_result = self.matcher.match(extraction, top_k=15)
             step_times['step4_time_ms'] = (time.time() - step4_start) * 1000
             
@@ -301,6 +563,7 @@ class IntelligentExtractionAPI:
             total_time = (time.time() - start_time) * 1000
             
             # 构建返回数据
+            extraction_dict = extraction.to_dict()
             result_data = {
                 'step1_device_type': {
                     'main_type': device_type.main_type,
@@ -309,9 +572,9 @@ class IntelligentExtractionAPI:
                     'confidence': device_type.confidence,
                     'mode': device_type.mode
                 },
-                'step2_parameters': extraction.to_dict()['parameters'],
-                'parameter_candidates': [c.to_dict() for c in parameter_candidates],
-                'step3_auxiliary': extraction.to_dict()['auxiliary'],
+                'step2_parameters': extraction_dict['parameters'],
+                'parameter_candidates': extraction_dict['parameter_candidates'],
+                'step3_auxiliary': extraction_dict['auxiliary'],
                 'step4_matching': {
                     'status': 'success' if match_result.candidates else 'no_match',
                     'candidates': [c.to_dict() for c in match_result.candidates]
@@ -326,6 +589,7 @@ class IntelligentExtractionAPI:
                     ],
                     'performance': {
                         'total_time_ms': total_time,
+                        'extraction_cache_hit': cache_hit,
                         **step_times
                     }
                 }
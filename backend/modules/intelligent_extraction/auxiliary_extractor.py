@@ -5,12 +5,18 @@
 - 品牌（Brand）
 - 介质（Medium）
 - 型号（Model）
+
+品牌和介质关键词一起查找，得到全部命中及其位置：关键词多时用多模式匹配自动机扫描一遍文本，
+关键词少时逐个 str.find 更快（C 实现，自动机的逐字符扫描是 Python 循环）。
+型号正则和排除词在初始化时准备好，提取时不再重复构建。
 """
 
 import re
 import logging
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Pattern
+from .aho_corasick import AhoCorasick
 from .data_models import AuxiliaryInfo
+from modules.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +24,22 @@ logger = logging.getLogger(__name__)
 class AuxiliaryExtractor:
     """辅助信息提取器"""
     
+    # 常见的单位和技术术语，不应该被识别为型号（不区分大小写）
+    MODEL_EXCLUDE_WORDS = frozenset(word.upper() for word in (
+        'VDC', 'VAC', 'DC', 'AC',  # 电压单位
+        'mA', 'A', 'V', 'W',  # 电流、电压、功率单位
+        'RS485', 'RS232', 'RS488', 'RS',  # 通讯协议
+        'Modbus', 'BACnet', 'CAN',  # 通讯协议
+        'TCP', 'IP', 'UDP',  # 网络协议
+        'LED', 'LCD', 'OLED',  # 显示技术
+        'USB', 'UART', 'I2C', 'SPI',  # 接口
+        'PM', 'CO', 'CO2', 'NO2', 'SO2',  # 气体符号
+        'CPU', 'GPU', 'RAM', 'ROM',  # 计算机术语
+    ))
+    
+    # 关键词总数达到该值时用自动机扫描，否则逐个 str.find
+    AUTOMATON_MIN_KEYWORDS = 100
+    
     def __init__(self, config: Dict[str, Any]):
         """
         初始化提取器
@@ -33,9 +55,72 @@ class AuxiliaryExtractor:
         self.brand_keywords = self.brand_config.get('keywords', [])
         self.medium_keywords = self.medium_config.get('keywords', [])
         self.model_pattern = self.model_config.get('pattern', r'[A-Z]{2,}[-]?[A-Z0-9]+')
+        self._model_regex = self._compile_model_pattern(self.model_pattern)
+        
+        # 关键词 -> 在列表中的顺序（同时命中多个时取列表中靠前的，与逐个检查相同）
+        self._brand_ranks = self._build_ranks(self.brand_keywords)
+        self._medium_ranks = self._build_ranks(self.medium_keywords)
+        self._keywords = list(dict.fromkeys(list(self._brand_ranks) + list(self._medium_ranks)))
+        self.keyword_automaton = (
+            AhoCorasick(self._keywords) if len(self._keywords) >= self.AUTOMATON_MIN_KEYWORDS else None
+        )
         
         logger.info(f"辅助信息提取器初始化完成，品牌数：{len(self.brand_keywords)}")
     
+    @staticmethod
+    def _build_ranks(keywords: List[str]) -> Dict[str, int]:
+        """关键词在列表中第一次出现的顺序"""
+        ranks: Dict[str, int] = {}
+        for rank, keyword in enumerate(keywords):
+            if isinstance(keyword, str):
+                ranks.setdefault(keyword, rank)
+        return ranks
+    
+    @staticmethod
+    def _compile_model_pattern(pattern: str) -> Optional[Pattern]:
+        """编译型号正则，无效时记录警告并关闭型号提取"""
+        try:
+            return re.compile(pattern)
+        except re.error as e:
+            logger.warning(f"型号正则无效，已跳过型号提取: {pattern} ({e})")
+            return None
+    
+    def find_keywords(self, text: str) -> Dict[str, int]:
+        """
+        扫描一遍文本，找出出现的品牌/介质关键词
+        
+        Args:
+            text: 输入文本
+            
+        Returns:
+            Dict[str, int]: 关键词 -> 第一次出现的起始位置
+        """
+        hits: Dict[str, int] = {}
+        if self.keyword_automaton is None:
+            for keyword in self._keywords:
+                position = text.find(keyword)
+                if position >= 0:
+                    hits[keyword] = position
+            return hits
+        
+        if '' in self._brand_ranks or '' in self._medium_ranks:
+            hits[''] = 0
+        for end, keyword in self.keyword_automaton.iter_matches(text):
+            if keyword not in hits:
+                hits[keyword] = end - len(keyword)
+        return hits
+    
+    @staticmethod
+    def _first_by_rank(ranks: Dict[str, int], hits: Dict[str, int]) -> Optional[str]:
+        """命中的关键词中列表顺序最靠前的一个"""
+        best, best_rank = None, None
+        for keyword in hits:
+            rank = ranks.get(keyword)
+            if rank is not None and (best_rank is None or rank < best_rank):
+                best, best_rank = keyword, rank
+        return best
+    
+    @metrics.timed('auxiliary_extraction')
     def extract(self, text: str) -> AuxiliaryInfo:
         """
         提取辅助信息
@@ -46,18 +131,20 @@ class AuxiliaryExtractor:
         Returns:
             AuxiliaryInfo: 辅助信息
         """
+        hits = self.find_keywords(text)
         return AuxiliaryInfo(
-            brand=self._extract_brand(text),
-            medium=self._extract_medium(text),
+            brand=self._extract_brand(text, hits),
+            medium=self._extract_medium(text, hits),
             model=self._extract_model(text)
         )
     
-    def _extract_brand(self, text: str) -> Optional[str]:
+    def _extract_brand(self, text: str, hits: Optional[Dict[str, int]] = None) -> Optional[str]:
         """
         提取品牌
         
         Args:
             text: 输入文本
+            hits: find_keywords 的结果（为 None 时扫描文本）
             
         Returns:
             str: 品牌名称，如果未找到返回None
@@ -65,19 +152,20 @@ class AuxiliaryExtractor:
         if not self.brand_config.get('enabled', True):
             return None
         
-        for brand in self.brand_keywords:
-            if brand in text:
-                logger.debug(f"识别到品牌：{brand}")
-                return brand
-        
-        return None
+        if hits is None:
+            hits = self.find_keywords(text)
+        brand = self._first_by_rank(self._brand_ranks, hits)
+        if brand is not None:
+            logger.debug(f"识别到品牌：{brand}")
+        return brand
     
-    def _extract_medium(self, text: str) -> Optional[str]:
+    def _extract_medium(self, text: str, hits: Optional[Dict[str, int]] = None) -> Optional[str]:
         """
         提取介质
         
         Args:
             text: 输入文本
+            hits: find_keywords 的结果（为 None 时扫描文本）
             
         Returns:
             str: 介质类型，如果未找到返回None
@@ -85,12 +173,12 @@ class AuxiliaryExtractor:
         if not self.medium_config.get('enabled', True):
             return None
         
-        for medium in self.medium_keywords:
-            if medium in text:
-                logger.debug(f"识别到介质：{medium}")
-                return medium
-        
-        return None
+        if hits is None:
+            hits = self.find_keywords(text)
+        medium = self._first_by_rank(self._medium_ranks, hits)
+        if medium is not None:
+            logger.debug(f"识别到介质：{medium}")
+        return medium
     
     def _extract_model(self, text: str) -> Optional[str]:
         """
@@ -105,34 +193,14 @@ class AuxiliaryExtractor:
         if not self.model_config.get('enabled', True):
             return None
         
-        # 常见的单位和技术术语，不应该被识别为型号
-        exclude_patterns = [
-            r'VDC', r'VAC', r'DC', r'AC',  # 电压单位
-            r'mA', r'A', r'V', r'W',  # 电流、电压、功率单位
-            r'RS485', r'RS232', r'RS488',  # 通讯协议
-            r'Modbus', r'BACnet', r'CAN',  # 通讯协议
-            r'TCP', r'IP', r'UDP',  # 网络协议
-            r'LED', r'LCD', r'OLED',  # 显示技术
-            r'USB', r'UART', r'I2C', r'SPI',  # 接口
-            r'PM', r'CO', r'CO2', r'NO2', r'SO2',  # 气体符号
-            r'CPU', r'GPU', r'RAM', r'ROM',  # 计算机术语
-        ]
-        
-        # 构建排除正则
-        exclude_regex = '|'.join(exclude_patterns)
+        if self._model_regex is None:
+            return None
         
         # 查找所有可能的型号
-        matches = re.finditer(self.model_pattern, text)
-        for match in matches:
+        for match in self._model_regex.finditer(text):
             model = match.group(0)
-            # 检查是否在排除列表中
-            if re.match(f'^({exclude_regex})$', model, re.IGNORECASE):
-                continue
-            # 检查是否是纯数字或纯字母（太短的不太可能是型号）
-            if len(model) < 3:
-                continue
-            # 检查是否只包含常见单位
-            if model.upper() in ['VDC', 'VAC', 'DC', 'AC', 'MA', 'RS']:
+            # 太短的不太可能是型号；单位和技术术语不是型号
+            if len(model) < 3 or model.upper() in self.MODEL_EXCLUDE_WORDS:
                 continue
             logger.debug(f"识别到型号：{model}")
             return model
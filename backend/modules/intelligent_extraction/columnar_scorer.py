@@ -0,0 +1,316 @@
+"""
+列式评分后端
+
+把设备库按列存储，一次向量化计算全部设备的加权总分：
+- device_type / brand / 描述+型号：整数编码列，每种取值只用匹配器原有的评分函数计算一次，
+  再按编码整列取值
+- 关键词：直接使用关键词倒排索引的命中位置
+- 参数：设备参数值去重后编码为 (设备位置, 参数值编码) 列，每个参数候选只需对
+  去重后的参数值判断一次包含关系，数字范围重叠通过区间索引查询，再散射为设备命中位图
+
+权重和阈值沿用匹配器配置，计算顺序与 Python 逐设备评分一致，总分逐位相同。
+设备增量更新后关键词/区间索引的位置与列存储位置不再一一对应，查询结果经映射表转换；
+列式后端重建完成前，索引中新加入的设备不在旧的列存储中，查询结果里的这些位置被丢弃。
+numpy 为可选依赖，未安装时匹配器使用原有的逐设备评分。
+"""
+
+import logging
+from typing import Dict, List, Optional, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - 取决于运行环境
+    np = None
+
+from modules.lru_cache import LRUCache
+from .data_models import ExtractionResult
+from .device_profile import DeviceProfile, normalize_param_value
+
+logger = logging.getLogger(__name__)
+
+# 设备列表位置数组缓存上限（匹配器的类型/主类型/全部设备列表在设备库版本内是固定对象，数量有限）
+MAX_CACHED_POSITION_LISTS = 64
+
+
+def is_available() -> bool:
+    """列式评分后端是否可用（需要 numpy）"""
+    return np is not None
+
+
+class ColumnarScorer:
+    """列式评分后端"""
+
+    def __init__(self, matcher, profiles: Sequence[DeviceProfile]):
+        """
+        构建设备库的列式存储
+
+        Args:
+            matcher: 智能匹配器（提供权重、关键词索引和各维度评分函数）
+            profiles: 设备匹配档案列表
+        """
+        if np is None:
+            raise RuntimeError("列式评分后端需要 numpy")
+
+        self.matcher = matcher
+        self.profiles = list(profiles)
+        self._positions = {id(profile): pos for pos, profile in enumerate(self.profiles)}
+        # id(设备列表) -> (设备列表, 按设备ID去重后的位置数组)；有界，
+        # 每次请求新建的列表不会被长期持有（列式后端随设备库变化整体重建，缓存随之失效）
+        self._list_positions = LRUCache(MAX_CACHED_POSITION_LISTS)
+
+        # 每列：取值编码数组 + 每种取值的代表档案（评分函数只读取对应字段）
+        self.type_codes, self._type_reps = self._encode(lambda p: p.device_type)
+        self.brand_codes, self._brand_reps = self._encode(lambda p: p.brand)
+        self.other_codes, self._other_reps = self._encode(lambda p: (p.raw_description, p.spec_model))
+
+        # 参数列：每个 (设备, 参数) 一行，参数值按归一化值去重编码
+        value_codes: Dict[str, int] = {}
+        self._values: List[tuple] = []  # (归一化值, 数字范围, 规范单位范围)
+        param_devices = []
+        param_values = []
+        for pos, profile in enumerate(self.profiles):
+            for param in profile.params:
+                code = value_codes.get(param.value_normalized)
+                if code is None:
+                    code = len(self._values)
+                    value_codes[param.value_normalized] = code
+                    self._values.append((param.value_normalized, param.value_range, param.value_canonical))
+                param_devices.append(pos)
+                param_values.append(code)
+        self.param_devices = np.array(param_devices, dtype=np.int64)
+        self.param_values = np.array(param_values, dtype=np.int64)
+
+        # 关键词/区间索引位置 -> 列存储位置（位置一致时为 None）
+        self._keyword_positions = self._index_positions(matcher.keyword_index)
+        self._range_positions = self._index_positions(matcher.range_index)
+
+        logger.info(f"列式评分后端构建完成: {len(self.profiles)} 个设备, {len(self._values)} 个不同参数值")
+
+    def after_fork(self):
+        """fork 出的子进程中重建缓存锁（fork 时其他线程可能正持有锁）"""
+        self._list_positions.after_fork()
+
+    def _encode(self, field):
+        """将一列取值编码为整数数组，并记录每种取值的代表档案"""
+        codes: Dict = {}
+        reps: List[DeviceProfile] = []
+        column = np.empty(len(self.profiles), dtype=np.int64)
+        for pos, profile in enumerate(self.profiles):
+            key = field(profile)
+            code = codes.get(key)
+            if code is None:
+                code = len(reps)
+                codes[key] = code
+                reps.append(profile)
+            column[pos] = code
+        return column, reps
+
+    def _index_positions(self, index):
+        """索引位置到列存储位置的映射表；索引不可用或位置完全一致时返回 None"""
+        if index is None:
+            return None
+        index_positions = [index.position(profile) for profile in self.profiles]
+        if all(index_pos == pos for pos, index_pos in enumerate(index_positions)):
+            return None
+
+        size = max((index_pos for index_pos in index_positions if index_pos is not None), default=-1) + 1
+        mapping = np.full(size, -1, dtype=np.int64)
+        for pos, index_pos in enumerate(index_positions):
+            if index_pos is not None:
+                mapping[index_pos] = pos
+        return mapping
+
+    def _to_columnar(self, mapping, index_positions):
+        """
+        把索引位置转换为列存储位置（丢弃列存储中没有的设备）
+
+        关键词/区间索引由匹配器共享：增量更新时先加入新设备，再重建列式后端，
+        重建期间仍由旧的列式后端评分的请求会查到超出列存储范围的位置，需要丢弃。
+        """
+        if mapping is None:
+            n = len(self.profiles)
+            return [pos for pos in index_positions if pos < n]
+        index_positions = np.fromiter(index_positions, dtype=np.int64)
+        positions = mapping[index_positions[index_positions < len(mapping)]]
+        return positions[positions >= 0]
+
+    def positions_for(self, devices: List[DeviceProfile]):
+        """
+        设备列表在列存储中的位置（按设备ID去重，保留首次出现的设备）
+
+        Returns:
+            位置数组；列表中有不在列存储中的设备时返回 None
+        """
+        cached = self._list_positions.get(id(devices))
+        if cached is not None and cached[0] is devices:
+            return cached[1]
+
+        positions = []
+        seen_device_ids = set()
+        for profile in devices:
+            if profile.device_id in seen_device_ids:
+                continue
+            seen_device_ids.add(profile.device_id)
+            pos = self._positions.get(id(profile))
+            if pos is None:
+                return None
+            positions.append(pos)
+
+        result = np.array(positions, dtype=np.int64)
+        # 同时保存列表引用，保证 id(devices) 在缓存期间不会被复用
+        self._list_positions.put(id(devices), (devices, result))
+        return result
+
+    def shortlist(self, all_scores, positions, low: float, high: Optional[float],
+                  limit: int) -> List[DeviceProfile]:
+        """
+        筛出总分在 [low, high) 区间内、且不低于区间内第 limit 高分的设备
+
+        低于第 limit 高分的设备不可能进入前 limit 名；与之同分的设备全部保留，
+        由调用方精确评分后按匹配参数数量、价格决定顺序。
+
+        Args:
+            all_scores: score_all 返回的总分数组
+            positions: positions_for 返回的位置数组
+            low: 总分下限（含）
+            high: 总分上限（不含），None 表示不设上限
+            limit: 需要的数量
+
+        Returns:
+            List[DeviceProfile]: 设备档案（保持输入顺序）
+        """
+        scores = all_scores[positions]
+        mask = scores >= low
+        if high is not None:
+            mask &= scores < high
+        positions = positions[mask]
+        scores = scores[mask]
+
+        if len(scores) > limit:
+            kth = len(scores) - limit
+            positions = positions[scores >= np.partition(scores, kth)[kth]]
+
+        return [self.profiles[pos] for pos in positions]
+
+    def score_all(self, extraction: ExtractionResult):
+        """
+        计算全部设备的加权总分
+
+        Returns:
+            按档案位置排列的总分数组
+        """
+        return self.score_group([extraction])[0]
+
+    def score_group(self, extractions: List[ExtractionResult]) -> List:
+        """
+        为设备类型信息相同的一组提取结果计算全部设备的加权总分
+
+        设备类型、关键词两列只计算一次；品牌、其他两列按各自读取的字段取值复用；
+        参数候选的设备命中位图在组内共享。
+
+        Returns:
+            与 extractions 一一对应的总分数组
+        """
+        matcher = self.matcher
+        weights = matcher.weights
+        n = len(self.profiles)
+        first = extractions[0]
+
+        device_type_scores = self._column_scores(self.type_codes, self._type_reps, matcher._score_device_type, first)
+
+        # 关键词：倒排索引命中任一参数即满分
+        keyword_scores = np.zeros(n, dtype=np.float64)
+        keywords = first.device_type.keywords
+        if keywords:
+            hit_positions = (pos for pos, names in matcher.keyword_index.match_keywords(keywords).items() if names)
+            keyword_scores[self._to_columnar(self._keyword_positions, hit_positions)] = 1.0
+
+        type_part = device_type_scores * weights['device_type'] * 100 + keyword_scores * weights['keyword'] * 100
+
+        # 品牌评分只读取品牌，其他评分只读取介质和型号
+        brand_parts: Dict = {}
+        other_parts: Dict = {}
+        hits_by_value: Dict[str, object] = {}
+        results = []
+        for extraction in extractions:
+            auxiliary = extraction.auxiliary
+            brand_part = brand_parts.get(auxiliary.brand)
+            if brand_part is None:
+                brand_scores = self._column_scores(self.brand_codes, self._brand_reps, matcher._score_brand, extraction)
+                brand_part = brand_parts[auxiliary.brand] = brand_scores * weights['brand'] * 100
+            other_key = (auxiliary.medium, auxiliary.model)
+            other_part = other_parts.get(other_key)
+            if other_part is None:
+                other_scores = self._column_scores(self.other_codes, self._other_reps, matcher._score_others, extraction)
+                other_part = other_parts[other_key] = other_scores * weights['others'] * 100
+
+            param_scores = self._param_scores(extraction.parameter_candidates, hits_by_value)
+
+            # 与逐设备评分保持相同的运算顺序，保证浮点结果逐位一致
+            results.append(type_part + param_scores * weights['parameters'] * 100 + brand_part + other_part)
+
+        return results
+
+    def _column_scores(self, codes, reps: List[DeviceProfile], score_func, extraction: ExtractionResult):
+        """每种取值评分一次，再按编码整列取值"""
+        if not reps:
+            return np.zeros(0, dtype=np.float64)
+        table = np.array([score_func(extraction, rep) for rep in reps], dtype=np.float64)
+        return table[codes]
+
+    def _param_scores(self, candidates: List, hits_by_value: Optional[Dict[str, object]] = None):
+        """参数候选匹配得分：命中的候选数 / 候选总数（hits_by_value 为可共享的候选值命中位图缓存）"""
+        n = len(self.profiles)
+        if not candidates:
+            return np.zeros(n, dtype=np.float64)
+
+        match_counts = np.zeros(n, dtype=np.int64)
+        if hits_by_value is None:
+            hits_by_value = {}
+
+        for candidate in candidates:
+            candidate_normalized = normalize_param_value(candidate.value)
+            device_hits = hits_by_value.get(candidate_normalized)
+            if device_hits is None:
+                device_hits = self._candidate_device_hits(candidate_normalized)
+                hits_by_value[candidate_normalized] = device_hits
+
+            match_counts += device_hits
+
+        return match_counts / len(candidates)
+
+    def _candidate_device_hits(self, candidate_normalized: str):
+        """单个参数候选的设备命中位图：任一参数包含候选值或数字范围重叠"""
+        matcher = self.matcher
+        n = len(self.profiles)
+        range_index = matcher.range_index
+        candidate_range, candidate_canonical = matcher._candidate_range_info(candidate_normalized)
+
+        if range_index is not None:
+            # 直接包含：只需对去重后的参数值判断；数字范围重叠：查询区间索引
+            value_hits = np.fromiter(
+                (candidate_normalized in value_normalized for value_normalized, _, _ in self._values),
+                dtype=bool, count=len(self._values)
+            )
+            device_hits = np.zeros(n, dtype=bool)
+            device_hits[self.param_devices[value_hits[self.param_values]]] = True
+            if candidate_range or candidate_canonical is not None:
+                overlapping = range_index.overlapping_params(candidate_range, candidate_canonical)
+                device_hits[self._to_columnar(self._range_positions, overlapping)] = True
+            return device_hits
+
+        value_hits = np.zeros(len(self._values), dtype=bool)
+        for code, (value_normalized, value_range, value_canonical) in enumerate(self._values):
+            # 直接包含
+            matched = candidate_normalized in value_normalized
+            # 数字范围匹配
+            if not matched and (value_range or value_canonical is not None):
+                matched = matcher._param_range_overlap(
+                    candidate_range, candidate_canonical, value_range, value_canonical
+                )
+            value_hits[code] = matched
+
+        # 散射为设备命中位图：任一参数命中即算该候选匹配一次
+        device_hits = np.zeros(n, dtype=bool)
+        device_hits[self.param_devices[value_hits[self.param_values]]] = True
+        return device_hits
@@ -0,0 +1,137 @@
+"""
+设备匹配档案
+
+在匹配器建立索引时为每个设备预先构建一份不可变的"匹配档案"：
+- 解析 key_params（JSON 只解析一次）
+- 预先计算参数值的小写/归一化字符串
+- 预先解析参数值中的数字范围（以及换算到规范单位的范围）
+
+评分阶段只读取档案，不再重复 json.loads 和字符串处理。
+"""
+
+import json
+import logging
+import re
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Dict, Mapping, Optional, Tuple
+
+from .units import CanonicalRange, parse_canonical
+
+logger = logging.getLogger(__name__)
+
+# 数字范围格式：数字~数字 或 数字-数字（与匹配器 _extract_range_from_value 保持一致）
+RANGE_VALUE_PATTERN = re.compile(r'(\d+(?:\.\d+)?)\s*[-~到]\s*(\d+(?:\.\d+)?)')
+
+
+def normalize_param_value(value: str) -> str:
+    """参数值归一化：小写，并统一全角波浪线/连字符"""
+    return value.lower().replace('～', '~').replace('－', '-')
+
+
+def parse_value_range(normalized_value: str) -> Optional[Tuple[float, float]]:
+    """从归一化后的参数值中解析数字范围"""
+    match = RANGE_VALUE_PATTERN.search(normalized_value)
+    if match:
+        try:
+            return (float(match.group(1)), float(match.group(2)))
+        except ValueError:
+            return None
+    return None
+
+
+def format_device_value(value: Any) -> str:
+    """格式化设备参数值：{'value': 'xxx'} 或直接值"""
+    if not value:
+        return ''
+    if isinstance(value, dict):
+        return str(value.get('value', ''))
+    return str(value)
+
+
+@dataclass(frozen=True)
+class ProfileParam:
+    """设备档案中的单个参数"""
+    name: str
+    value: str                                   # 格式化后的参数值
+    value_lower: str                             # 小写参数值（关键词匹配用）
+    value_normalized: str                        # 归一化参数值（候选值匹配用）
+    value_range: Optional[Tuple[float, float]]   # 预解析的数字范围
+    value_canonical: Optional[CanonicalRange] = None   # 规范单位下的范围（单位已注册时）
+
+
+@dataclass(frozen=True)
+class DeviceProfile:
+    """设备匹配档案（不可变）"""
+    device_id: str
+    device_name: str
+    device_type: str
+    brand: str
+    spec_model: str
+    unit_price: float
+    raw_description: str
+    params: Tuple[ProfileParam, ...]
+    all_params: Mapping[str, str]                # 非空参数（参数名: 参数值），只读
+    key_params: Mapping[str, Any]                # 解析后的原始 key_params，只读
+
+
+def parse_key_params(key_params: Any) -> Dict[str, Any]:
+    """解析设备的 key_params（JSON 字符串或字典）"""
+    if not key_params:
+        return {}
+    if isinstance(key_params, str):
+        try:
+            key_params = json.loads(key_params)
+        except (ValueError, TypeError):
+            return {}
+    if not isinstance(key_params, dict):
+        return {}
+    return key_params
+
+
+def build_device_profile(device: Dict[str, Any]) -> DeviceProfile:
+    """
+    根据设备字典构建匹配档案
+
+    Args:
+        device: 设备字典（包含 key_params 等字段）
+
+    Returns:
+        DeviceProfile: 设备匹配档案
+    """
+    key_params = parse_key_params(device.get('key_params'))
+
+    params = []
+    all_params = {}
+    for param_name, param_value in key_params.items():
+        value = format_device_value(param_value)
+        normalized = normalize_param_value(value)
+        params.append(ProfileParam(
+            name=param_name,
+            value=value,
+            value_lower=value.lower(),
+            value_normalized=normalized,
+            value_range=parse_value_range(normalized),
+            value_canonical=parse_canonical(normalized)
+        ))
+
+        # 与 CandidateDevice.all_params 的原有口径保持一致
+        if isinstance(param_value, dict):
+            display_value = param_value.get('value', '')
+        else:
+            display_value = str(param_value) if param_value else ''
+        if display_value:
+            all_params[param_name] = display_value
+
+    return DeviceProfile(
+        device_id=device.get('device_id', ''),
+        device_name=device.get('device_name', ''),
+        device_type=device.get('device_type', '') or '',
+        brand=device.get('brand', ''),
+        spec_model=device.get('spec_model', ''),
+        unit_price=device.get('unit_price', 0) or 0,
+        raw_description=device.get('raw_description', '') or '',
+        params=tuple(params),
+        all_params=MappingProxyType(all_params),
+        key_params=MappingProxyType(key_params)
+    )
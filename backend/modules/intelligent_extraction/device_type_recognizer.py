@@ -6,12 +6,20 @@
 - 模糊匹配（置信度90%）
 - 关键词匹配（置信度80%）
 - 类型推断（置信度70%）
+
+精确/模糊/关键词匹配共用一个由全部设备类型构建的 Aho-Corasick 自动机：
+扫描一遍归一化文本即可找出出现的全部设备类型，识别耗时与配置的设备类型数量无关。
+各模式内仍按配置顺序取第一个出现的设备类型（与逐个 search 的结果相同）。
+
+类型推断的前缀词在初始化时按长度降序排好，编译为一个带边界的择一正则。
 """
 
 import re
 import logging
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Set
+from .aho_corasick import AhoCorasick
 from .data_models import DeviceTypeInfo
+from modules.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -42,13 +50,18 @@ class DeviceTypeRecognizer:
             except Exception as e:
                 logger.warning(f"文本预处理器初始化失败: {e}，将不进行文本归一化")
         
-        # 预编译正则模式
+        # 各识别模式的设备类型列表和多模式匹配自动机
         self.patterns = self._build_patterns()
+        self._ranks = self._build_ranks()
+        self.automaton = AhoCorasick(
+            entry[-2] for entries in self.patterns.values() for entry in entries
+        )
+        self._inference_prefixes, self._inference_pattern = self._build_inference_pattern()
         
         logger.info(f"设备类型识别器初始化完成，设备类型数：{len(self.device_types)}")
     
     def _build_patterns(self) -> Dict[str, List[tuple]]:
-        """构建正则模式"""
+        """构建各识别模式的 (..., 设备类型, 置信度) 列表，列表顺序即模式内的优先级"""
         patterns = {
             'exact': [],
             'fuzzy': [],
@@ -57,16 +70,14 @@ class DeviceTypeRecognizer:
         
         # 精确匹配模式
         for device_type in self.device_types:
-            pattern = re.escape(device_type)
-            patterns['exact'].append((re.compile(pattern), device_type, 1.0))
+            patterns['exact'].append((device_type, device_type, 1.0))
         
         # 模糊匹配模式（完整设备类型）
         # 注意：prefix_keywords 中的 types 现在是完整的设备类型列表
         for prefix, types in self.prefix_keywords.items():
             for dtype in types:
                 # dtype 已经是完整类型（如"压力传感器"），直接使用
-                pattern = re.escape(dtype)
-                patterns['fuzzy'].append((re.compile(pattern), dtype, 0.9))
+                patterns['fuzzy'].append((dtype, dtype, 0.9))
         
         # 关键词匹配模式（完整设备类型）
         for prefix, types in self.prefix_keywords.items():
@@ -76,6 +87,59 @@ class DeviceTypeRecognizer:
         
         return patterns
     
+    def _build_ranks(self) -> Dict[str, Dict[str, int]]:
+        """各模式中设备类型 -> 首次出现的位置（位置越小优先级越高）"""
+        ranks = {}
+        for mode, entries in self.patterns.items():
+            mode_ranks = ranks[mode] = {}
+            for rank, entry in enumerate(entries):
+                mode_ranks.setdefault(entry[-2], rank)
+        return ranks
+    
+    def _build_inference_pattern(self) -> tuple:
+        """
+        构建类型推断的前缀正则
+        
+        前缀按长度降序排列（长度相同时保持配置顺序，如 co2 优先于 co），每个前缀一个捕获组，
+        组号越小优先级越高。整体放在零宽先行断言中，文本的每个位置都会尝试（重叠的出现也能找到），
+        同一位置按择一顺序取优先级最高的前缀。没有对应类型的前缀不参与推断。
+        
+        Returns:
+            (按优先级排列的 (前缀, 类型列表), 编译后的正则或 None)
+        """
+        sorted_prefixes = [
+            (prefix, types)
+            for prefix, types in sorted(self.prefix_keywords.items(), key=lambda x: len(x[0]), reverse=True)
+            if types
+        ]
+        if not sorted_prefixes:
+            return sorted_prefixes, None
+        
+        # 前面是空格/标点/开头，后面是空格/标点/结尾（不是其他词的一部分）
+        alternation = '|'.join(f'({re.escape(prefix)})(?![a-zA-Z0-9])' for prefix, _ in sorted_prefixes)
+        # 先检查当前字符能否作为某个前缀的首字符，大部分位置不必逐个尝试择一分支
+        first_chars = '' if any(not prefix for prefix, _ in sorted_prefixes) else \
+            ''.join(sorted({re.escape(prefix[0]) for prefix, _ in sorted_prefixes}))
+        guard = f'(?=[{first_chars}])' if first_chars else ''
+        pattern = re.compile(f'(?={guard}(?<![a-zA-Z0-9])(?:{alternation}))', re.IGNORECASE)
+        return sorted_prefixes, pattern
+    
+    def _first_mention(self, mode: str, text: str, mentions: Optional[Set[str]]) -> Optional[tuple]:
+        """
+        某个模式中第一个（按配置顺序）出现在文本中的条目
+        
+        Args:
+            mode: exact/fuzzy/keyword
+            text: 归一化文本
+            mentions: 文本中出现的设备类型（为 None 时扫描文本）
+        """
+        if mentions is None:
+            mentions = self.automaton.find_all(text)
+        ranks = self._ranks[mode]
+        best = min((ranks[dtype] for dtype in mentions if dtype in ranks), default=None)
+        return None if best is None else self.patterns[mode][best]
+    
+    @metrics.timed('device_type_recognition')
     def recognize(self, text: str) -> DeviceTypeInfo:
         """
         识别设备类型
@@ -105,20 +169,23 @@ class DeviceTypeRecognizer:
                 logger.warning(f"文本归一化失败: {e}，使用原始文本")
                 normalized_text = text
         
+        # 扫描一遍文本，找出出现的全部设备类型（精确/模糊/关键词匹配共用）
+        mentions = self.automaton.find_all(normalized_text)
+        
         # 1. 精确匹配
-        result = self._exact_match(normalized_text)
+        result = self._exact_match(normalized_text, mentions)
         if result and result.confidence >= 0.95:
             logger.debug(f"精确匹配成功：{result.sub_type}")
             return result
         
         # 2. 模糊匹配
-        result = self._fuzzy_match(normalized_text)
+        result = self._fuzzy_match(normalized_text, mentions)
         if result and result.confidence >= 0.85:
             logger.debug(f"模糊匹配成功：{result.sub_type}")
             return result
         
         # 3. 关键词匹配
-        result = self._keyword_match(normalized_text)
+        result = self._keyword_match(normalized_text, mentions)
         if result and result.confidence >= 0.75:
             logger.debug(f"关键词匹配成功：{result.sub_type}")
             return result
@@ -134,75 +201,77 @@ class DeviceTypeRecognizer:
             mode="none"
         )
     
-    def _exact_match(self, text: str) -> Optional[DeviceTypeInfo]:
+    def _exact_match(self, text: str, mentions: Optional[Set[str]] = None) -> Optional[DeviceTypeInfo]:
         """精确匹配：完整的设备类型名称"""
-        for pattern, device_type, confidence in self.patterns['exact']:
-            if pattern.search(text):
-                main_type = self._extract_main_type(device_type)
-                return DeviceTypeInfo(
-                    main_type=main_type,
-                    sub_type=device_type,
-                    keywords=[device_type],
-                    confidence=confidence,
-                    mode='exact'
-                )
+        entry = self._first_mention('exact', text, mentions)
+        if entry:
+            _, device_type, confidence = entry
+            main_type = self._extract_main_type(device_type)
+            return DeviceTypeInfo(
+                main_type=main_type,
+                sub_type=device_type,
+                keywords=[device_type],
+                confidence=confidence,
+                mode='exact'
+            )
         return None
     
-    def _fuzzy_match(self, text: str) -> Optional[DeviceTypeInfo]:
+    def _fuzzy_match(self, text: str, mentions: Optional[Set[str]] = None) -> Optional[DeviceTypeInfo]:
         """模糊匹配：前缀+类型组合"""
-        for pattern, device_type, confidence in self.patterns['fuzzy']:
-            if pattern.search(text):
-                main_type = self._extract_main_type(device_type)
-                return DeviceTypeInfo(
-                    main_type=main_type,
-                    sub_type=device_type,
-                    keywords=[device_type],
-                    confidence=confidence,
-                    mode='fuzzy'
-                )
+        entry = self._first_mention('fuzzy', text, mentions)
+        if entry:
+            _, device_type, confidence = entry
+            main_type = self._extract_main_type(device_type)
+            return DeviceTypeInfo(
+                main_type=main_type,
+                sub_type=device_type,
+                keywords=[device_type],
+                confidence=confidence,
+                mode='fuzzy'
+            )
         return None
     
-    def _keyword_match(self, text: str) -> Optional[DeviceTypeInfo]:
+    def _keyword_match(self, text: str, mentions: Optional[Set[str]] = None) -> Optional[DeviceTypeInfo]:
         """关键词匹配：直接匹配完整设备类型"""
-        for prefix, dtype, confidence in self.patterns['keyword']:
-            # dtype 已经是完整类型（如"压力传感器"），直接匹配
-            if dtype in text:
-                main_type = self._extract_main_type(dtype)
-                return DeviceTypeInfo(
-                    main_type=main_type,
-                    sub_type=dtype,
-                    keywords=[dtype],
-                    confidence=confidence,
-                    mode='keyword'
-                )
+        # dtype 已经是完整类型（如"压力传感器"），直接匹配
+        entry = self._first_mention('keyword', text, mentions)
+        if entry:
+            _, dtype, confidence = entry
+            main_type = self._extract_main_type(dtype)
+            return DeviceTypeInfo(
+                main_type=main_type,
+                sub_type=dtype,
+                keywords=[dtype],
+                confidence=confidence,
+                mode='keyword'
+            )
         return None
     
     def _type_inference(self, text: str) -> Optional[DeviceTypeInfo]:
         """类型推断：根据前缀词推断完整设备类型"""
-        # 按长度降序排序，确保长的关键词优先匹配（如 co2 优先于 co）
-        sorted_prefixes = sorted(self.prefix_keywords.items(), key=lambda x: len(x[0]), reverse=True)
-        
-        matched_prefixes = []  # 记录所有匹配的前缀
-        
-        for prefix, types in sorted_prefixes:
-            # 使用正则表达式匹配，确保是独立的词（不是其他词的一部分）
-            # 匹配模式：前面是空格/标点/开头，后面是空格/标点/数字/结尾
-            pattern = r'(?<![a-zA-Z0-9])' + re.escape(prefix) + r'(?![a-zA-Z0-9])'
-            if re.search(pattern, text, re.IGNORECASE):
-                if types:
-                    dtype = types[0]
-                    main_type = self._extract_main_type(dtype)
-                    matched_prefixes.append(prefix)
-                    # 返回第一个匹配的结果（已经按长度降序排序）
-                    return DeviceTypeInfo(
-                        main_type=main_type,
-                        sub_type=dtype,
-                        keywords=[prefix],
-                        confidence=0.7,
-                        mode='inference'
-                    )
+        if self._inference_pattern is None:
+            return None
         
-        return None
+        # 所有位置中优先级最高（组号最小）的前缀：长的关键词优先（如 co2 优先于 co）
+        best = None
+        for match in self._inference_pattern.finditer(text):
+            if best is None or match.lastindex < best:
+                best = match.lastindex
+                if best == 1:
+                    break
+        if best is None:
+            return None
+        
+        prefix, types = self._inference_prefixes[best - 1]
+        dtype = types[0]
+        main_type = self._extract_main_type(dtype)
+        return DeviceTypeInfo(
+            main_type=main_type,
+            sub_type=dtype,
+            keywords=[prefix],
+            confidence=0.7,
+            mode='inference'
+        )
     
     def _extract_main_type(self, device_type: str) -> str:
         """从设备类型中提取主类型"""
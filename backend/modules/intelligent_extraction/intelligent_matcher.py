@@ -9,16 +9,144 @@
 - 智能排序
 """
 
+import bisect
+import copy
+import heapq
+import itertools
 import logging
 import re
-from typing import Dict, List, Optional, Any
+import threading
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Any
 from .data_models import (
     ExtractionResult, MatchResult, CandidateDevice, ScoreDetails,
     RangeParam, OutputParam, AccuracyParam
 )
+from .device_profile import (
+    DeviceProfile, build_device_profile, format_device_value,
+    normalize_param_value
+)
+from .keyword_index import KeywordIndex, keyword_pattern_cache
+from . import columnar_scorer
+from .model_index import ModelIndex
+from .range_index import RangeIndex
+from .top_k_collector import TopKCollector
+from .units import CanonicalRange, parse_canonical
+from modules.lru_cache import LRUCache
+from modules.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
+# 每个匹配阶段最多保留的候选数量
+STAGE_CANDIDATE_LIMIT = 15
+
+# 按主类型筛选的设备列表缓存上限
+MAX_CACHED_MAIN_TYPE_LISTS = 64
+
+# 参数候选数字范围解析结果的缓存上限
+MAX_CACHED_CANDIDATE_RANGES = 1024
+
+# 设备库版本号（进程内唯一，匹配器构建和每次增量更新时取下一个）
+_catalog_versions = itertools.count(1)
+
+
+
+class ScoredDevice(NamedTuple):
+    """设备评分的轻量结果（只有进入 Top-K 的设备才会构建 CandidateDevice）"""
+    profile: DeviceProfile
+    total_score: float
+    device_type_score: float
+    keyword_score: float
+    param_match_score: float
+    brand_score: float
+    other_score: float
+    keyword_matched_params: List[str]
+    param_matched_names: List[str]
+    matched_count: int
+
+
+class RequestScoreCache:
+    """请求级评分缓存（各匹配阶段共享，同一请求内每个设备最多评分一次）"""
+    
+    def __init__(self):
+        # 缓存中同时保存档案引用，保证 id(档案) 在请求期间不会被复用
+        self.totals: Dict[int, tuple] = {}   # id(档案) -> (档案, 总分)
+        self.results: Dict[int, tuple] = {}  # id(档案) -> (档案, ScoredDevice)
+        self.columnar_scores = None          # 列式后端计算的全部设备总分
+        self.range_hits: Dict[tuple, Dict[int, frozenset]] = {}  # (参数候选归一化值, 设备类型) -> 区间索引命中
+    
+    def total(self, profile: DeviceProfile) -> Optional[float]:
+        """已计算过的总分；未计算时返回 None"""
+        entry = self.results.get(id(profile))
+        if entry is not None:
+            return entry[1].total_score
+        entry = self.totals.get(id(profile))
+        return entry[1] if entry is not None else None
+
+
+class _CatalogChanges:
+    """一批设备变更：在设备列表、类型索引的副本上修改，提交时整体替换"""
+    
+    def __init__(self, matcher: 'IntelligentMatcher'):
+        self.matcher = matcher
+        self.profiles = list(matcher._all_profiles_cache)
+        self.devices = list(matcher._all_devices_cache)
+        self.by_type = dict(matcher.device_cache_by_type)
+        self._copied_types = set()
+    
+    def _type_list(self, device_type: str) -> List[DeviceProfile]:
+        """该类型设备列表的副本（每批只复制一次）"""
+        if device_type not in self._copied_types:
+            self.by_type[device_type] = list(self.by_type.get(device_type, []))
+            self._copied_types.add(device_type)
+        return self.by_type[device_type]
+    
+    def detach(self, profile: DeviceProfile):
+        """从设备列表和各索引中移除档案"""
+        matcher = self.matcher
+        order = matcher._catalog_order(profile)
+        
+        i = bisect.bisect_left(self.profiles, order, key=matcher._catalog_order)
+        del self.profiles[i]
+        del self.devices[i]
+        
+        if profile.device_type:
+            type_list = self._type_list(profile.device_type)
+            del type_list[bisect.bisect_left(type_list, order, key=matcher._catalog_order)]
+        
+        matcher.keyword_index.remove(profile)
+        matcher.model_index.remove(profile)
+        matcher.range_index.remove(profile)
+        del matcher._profile_order[id(profile)]
+    
+    def attach(self, profile: DeviceProfile, device: Dict, order: int):
+        """按设备库顺序把档案加入设备列表和各索引"""
+        matcher = self.matcher
+        matcher._profile_order[id(profile)] = order
+        
+        i = bisect.bisect_right(self.profiles, order, key=matcher._catalog_order)
+        self.profiles.insert(i, profile)
+        self.devices.insert(i, device)
+        
+        if profile.device_type:
+            bisect.insort(self._type_list(profile.device_type), profile, key=matcher._catalog_order)
+        
+        matcher.keyword_index.add(profile)
+        matcher.model_index.add(profile, order=matcher._catalog_order)
+        matcher.range_index.add(profile)
+    
+    def commit(self):
+        """替换匹配器的设备列表和类型索引"""
+        matcher = self.matcher
+        # 类型按首个设备在设备库中的顺序排列，与全量构建一致
+        by_type = sorted(
+            ((device_type, devices) for device_type, devices in self.by_type.items() if devices),
+            key=lambda item: matcher._catalog_order(item[1][0])
+        )
+        matcher.device_cache_by_type = dict(by_type)
+        matcher._main_type_lists.clear()
+        matcher._all_devices_cache = self.devices
+        matcher._all_profiles_cache = self.profiles
+
 
 class IntelligentMatcher:
     """智能匹配器"""
@@ -57,31 +185,178 @@ class IntelligentMatcher:
             'accuracy_tolerance': 0.2,
             'output_equivalence': True
         })
+        # 数字范围按规范单位比较（0-1000kPa 与 0-1.6MPa 视为重叠，DN25 与 25mm 等价）；
+        # 关闭时与原有规则一致只比较数字
+        self.unit_aware_ranges = bool(self.fuzzy_config.get('unit_aware_ranges', True))
+        
+        # 评分后端：python（逐设备评分）或 columnar（列式向量化评分，需要 numpy）
+        self.scoring_backend = config.get('scoring_backend', 'python')
         
-        # 构建设备类型索引缓存
+        # 构建设备类型索引缓存（索引中存放的是设备匹配档案）
         self.device_cache_by_type = {}
         self._all_devices_cache = None  # 全部设备缓存
+        self._all_profiles_cache = None  # 全部设备匹配档案缓存
+        self.keyword_index = None  # 关键词/同义词倒排索引
+        self.model_index = None  # 型号哈希/前缀索引
+        self.columnar_scorer = None  # 列式评分后端
+        self.range_index = None  # 数字范围区间索引
+        self._candidate_ranges = LRUCache(MAX_CACHED_CANDIDATE_RANGES)  # 参数候选值 -> (数字范围, 规范单位范围)
+        self._main_type_lists = LRUCache(MAX_CACHED_MAIN_TYPE_LISTS)  # 主类型 -> (类型索引, 设备列表)
+        self._profiles_by_id = {}  # 设备ID -> 设备匹配档案列表
+        self._profile_order = {}  # id(档案) -> 设备库顺序键
+        self._next_order = 0
+        self._write_lock = threading.Lock()  # 增量更新互斥（查询不加锁）
+        self.catalog_version = next(_catalog_versions)  # 设备库版本，设备变化时更新
         self._build_device_type_index()
         
         logger.info("智能匹配器初始化完成")
     
     def _build_device_type_index(self):
-        """构建设备类型索引缓存"""
+        """构建设备类型索引缓存（同时为每个设备构建匹配档案）"""
         try:
             all_devices = self._get_all_devices_as_list()
             self._all_devices_cache = all_devices  # 缓存全部设备列表
+            self._all_profiles_cache = [build_device_profile(device) for device in all_devices]
             
-            for device in all_devices:
-                device_type = device.get('device_type', '')
+            for order, profile in enumerate(self._all_profiles_cache):
+                device_type = profile.device_type
                 if device_type:
                     if device_type not in self.device_cache_by_type:
                         self.device_cache_by_type[device_type] = []
-                    self.device_cache_by_type[device_type].append(device)
+                    self.device_cache_by_type[device_type].append(profile)
+                self._profiles_by_id.setdefault(profile.device_id, []).append(profile)
+                self._profile_order[id(profile)] = order
+            self._next_order = len(self._all_profiles_cache)
+            
+            # 关键词倒排索引覆盖全部设备档案
+            self.keyword_index = KeywordIndex(self._all_profiles_cache, self.config.get('synonym_map', {}))
+            self.model_index = ModelIndex(self._all_profiles_cache)
+            self.range_index = RangeIndex(self._all_profiles_cache, unit_aware=self.unit_aware_ranges)
+            
+            if self.scoring_backend == 'columnar':
+                if columnar_scorer.is_available():
+                    self.columnar_scorer = columnar_scorer.ColumnarScorer(self, self._all_profiles_cache)
+                else:
+                    logger.warning("未安装 numpy，列式评分后端不可用，使用逐设备评分")
             
             logger.info(f"设备类型索引构建完成: {len(self.device_cache_by_type)} 种类型, 共 {len(all_devices)} 个设备")
         except Exception as e:
             logger.warning(f"构建设备类型索引失败: {e}")
     
+    def upsert_device(self, device) -> Dict[str, int]:
+        """
+        新增或更新一个设备（增量维护索引，不重建整个设备库）
+        
+        Args:
+            device: 设备字典或 Device 对象（须包含 device_id）
+        """
+        return self.apply_changes(upserts=[device])
+    
+    def remove_device(self, device_id: str) -> bool:
+        """
+        移除一个设备
+        
+        Returns:
+            bool: 设备是否存在
+        """
+        return self.apply_changes(removals=[device_id])['removed'] > 0
+    
+    def apply_changes(self, upserts: Optional[Iterable] = None,
+                      removals: Optional[Iterable[str]] = None) -> Dict[str, int]:
+        """
+        批量应用设备变更：先移除，再新增/更新
+        
+        已有设备更新后保持原来在设备库中的位置，新设备追加到末尾，
+        与按相同设备库顺序重新构建匹配器的结果一致（同一设备ID有多条记录时，更新后合并为一条）。
+        列式评分后端在每批变更后整体重建。
+        设备列表和类型索引采用写时复制，正在进行的匹配请求不受影响；
+        关键词/区间索引原地更新，重建完成前旧的列式后端忽略索引中新加入的设备。
+        
+        Args:
+            upserts: 新增或更新的设备（设备字典或 Device 对象）
+            removals: 移除的设备ID
+            
+        Returns:
+            Dict[str, int]: {'upserted': 新增/更新数量, 'removed': 移除数量}
+        """
+        devices = self._convert_devices_to_list(list(upserts or []))
+        removals = list(removals or [])
+        stats = {'upserted': 0, 'removed': 0}
+        if not devices and not removals:
+            return stats
+        
+        with self._write_lock:
+            if self.keyword_index is None:
+                # 索引尚未建立（如首次构建失败），直接全量重建
+                self._rebuild_device_index()
+                stats['upserted'] = len(devices)
+                stats['removed'] = len(removals)
+                return stats
+            
+            changes = _CatalogChanges(self)
+            for device_id in removals:
+                old_profiles = self._profiles_by_id.pop(device_id, None)
+                if old_profiles:
+                    for profile in old_profiles:
+                        changes.detach(profile)
+                    stats['removed'] += 1
+            
+            for device in devices:
+                device_id = device.get('device_id')
+                if device_id is None:
+                    logger.warning("增量更新的设备缺少 device_id，已跳过")
+                    continue
+                
+                old_profiles = self._profiles_by_id.pop(device_id, None)
+                if old_profiles:
+                    # 更新：保持原来在设备库中的位置
+                    order = self._profile_order[id(old_profiles[0])]
+                    for profile in old_profiles:
+                        changes.detach(profile)
+                else:
+                    order = self._next_order
+                    self._next_order += 1
+                
+                profile = build_device_profile(device)
+                changes.attach(profile, device, order)
+                self._profiles_by_id[device_id] = [profile]
+                stats['upserted'] += 1
+            
+            changes.commit()
+            
+            if self.columnar_scorer is not None:
+                self.columnar_scorer = columnar_scorer.ColumnarScorer(self, self._all_profiles_cache)
+            self.catalog_version = next(_catalog_versions)
+        
+        logger.info(f"设备索引增量更新: 新增/更新 {stats['upserted']} 个, 移除 {stats['removed']} 个")
+        return stats
+    
+    def after_fork(self):
+        """fork 出的子进程中重建锁（fork 时其他线程可能正持有锁）"""
+        self._write_lock = threading.Lock()
+        self._candidate_ranges.after_fork()
+        self._main_type_lists.after_fork()
+        if self.columnar_scorer is not None:
+            self.columnar_scorer.after_fork()
+        for index in (self.keyword_index, self.range_index):
+            if index is not None:
+                index.after_fork()
+    
+    def _rebuild_device_index(self):
+        """从设备加载器全量重建设备索引"""
+        self.device_cache_by_type = {}
+        self._all_devices_cache = None
+        self._all_profiles_cache = None
+        self._profiles_by_id = {}
+        self._profile_order = {}
+        self._build_device_type_index()
+        self._main_type_lists.clear()
+        self.catalog_version = next(_catalog_versions)
+    
+    def _catalog_order(self, profile: DeviceProfile) -> int:
+        """档案在设备库中的顺序键"""
+        return self._profile_order[id(profile)]
+    
     def match(self, extraction: ExtractionResult, top_k: int = 5) -> MatchResult:
         """
         智能匹配设备
@@ -102,15 +377,106 @@ class IntelligentMatcher:
             if model_match_result:
                 logger.info(f"型号精确匹配成功: {model_match_result[0].device_name}")
                 return MatchResult(candidates=model_match_result, extraction=extraction)
-            else:
-                # 如果提取到了型号但在数据库中找不到，返回空结果
-                logger.info(f"型号 '{model}' 在数据库中未找到，返回空结果")
-                return MatchResult(candidates=[], extraction=extraction)
+            
+            # 型号系列匹配（如 VBI61 命中 VBI61.15、VBI61.20）
+            family_match_result = self._model_family_match(extraction, top_k)
+            if family_match_result:
+                logger.info(f"型号系列匹配返回 {len(family_match_result)} 个设备")
+                return MatchResult(candidates=family_match_result, extraction=extraction)
+            
+            # 如果提取到了型号但在数据库中找不到，返回空结果
+            logger.info(f"型号 '{model}' 在数据库中未找到，返回空结果")
+            return MatchResult(candidates=[], extraction=extraction)
         
         # 如果没有提取到型号，进行多阶段权重评分匹配
-        candidates = self._multi_stage_match(extraction)
+        candidates = self._multi_stage_match(extraction, top_k)
+        return self._ranked_result(extraction, candidates, top_k)
+    
+    def match_batch(self, extractions: List[ExtractionResult], top_k: int = 5) -> List[MatchResult]:
+        """
+        批量匹配（每条结果与逐条调用 match 相同）
+        
+        提取到型号的文本逐条进行型号匹配；其余文本按设备类型信息（子类型、主类型、关键词）分组，
+        每组只解析一次同类型设备列表。组内评分依据（_score_signature）相同的文本候选设备相同，
+        只匹配一次；各不同评分依据逐设备计算总分（设备类型和关键词两项每个设备只算一次），
+        写入各自的评分缓存后再按多阶段策略选出候选。
+        
+        Args:
+            extractions: 提取结果列表
+            top_k: 返回前k个候选设备
+            
+        Returns:
+            List[MatchResult]: 与 extractions 一一对应的匹配结果
+        """
+        results: List[Optional[MatchResult]] = [None] * len(extractions)
+        groups: Dict[tuple, List[int]] = {}
+        for i, extraction in enumerate(extractions):
+            if extraction.auxiliary and extraction.auxiliary.model:
+                results[i] = self.match(extraction, top_k)
+                continue
+            device_type = extraction.device_type
+            key = (device_type.sub_type, device_type.main_type, tuple(device_type.keywords))
+            groups.setdefault(key, []).append(i)
+        
+        for indexes in groups.values():
+            group = [extractions[i] for i in indexes]
+            for i, result in zip(indexes, self._match_type_group(group, top_k)):
+                results[i] = result
         
-        # 排序并取前k个（总分降序 → 匹配参数数量降序 → 价格升序）
+        return results
+    
+    def _match_type_group(self, group: List[ExtractionResult], top_k: int) -> List[MatchResult]:
+        """匹配设备类型信息相同的一组提取结果"""
+        type_devices = self._filter_by_device_type(group[0].device_type.sub_type)
+        
+        by_signature: Dict[tuple, List[int]] = {}
+        for i, extraction in enumerate(group):
+            by_signature.setdefault(self._score_signature(extraction), []).append(i)
+        representatives = [group[indexes[0]] for indexes in by_signature.values()]
+        caches = [RequestScoreCache() for _ in representatives]
+        self._prescore_group(representatives, type_devices, caches)
+        
+        results: List[Optional[MatchResult]] = [None] * len(group)
+        for indexes, extraction, scored in zip(by_signature.values(), representatives, caches):
+            candidates = self._multi_stage_match(extraction, top_k, scored, type_devices)
+            for n, i in enumerate(indexes):
+                # 同一评分依据的其他文本使用候选副本
+                results[i] = self._ranked_result(group[i], candidates if n == 0 else copy.deepcopy(candidates), top_k)
+        return results
+    
+    def _score_signature(self, extraction: ExtractionResult) -> tuple:
+        """评分依据：多阶段匹配读取的全部提取字段（设备类型信息、参数候选值、品牌、介质、型号）"""
+        device_type = extraction.device_type
+        auxiliary = extraction.auxiliary
+        return (
+            device_type.sub_type, device_type.main_type, tuple(device_type.keywords),
+            tuple(candidate.value for candidate in extraction.parameter_candidates),
+            auxiliary.brand, auxiliary.medium, auxiliary.model
+        )
+    
+    @metrics.timed('matcher_group_prescore')
+    def _prescore_group(self, group: List[ExtractionResult], devices: List[DeviceProfile],
+                        caches: List[RequestScoreCache]):
+        """逐设备为组内全部提取结果计算总分，写入各自的评分缓存"""
+        if self.columnar_scorer is not None:
+            for scored, scores in zip(caches, self.columnar_scorer.score_group(group)):
+                scored.columnar_scores = scores
+            return
+        
+        first = group[0]
+        for profile in devices:
+            if id(profile) in caches[0].totals:
+                continue
+            # 设备类型和关键词两项只取决于设备类型信息，组内相同
+            type_part = self._type_keyword_part(first, profile)
+            for extraction, scored in zip(group, caches):
+                scored.totals[id(profile)] = (
+                    profile, self._total_from_type_part(type_part, extraction, profile, scored.range_hits)
+                )
+    
+    def _ranked_result(self, extraction: ExtractionResult, candidates: List[CandidateDevice],
+                       top_k: int) -> MatchResult:
+        """排序并取前k个（总分降序 → 匹配参数数量降序 → 价格升序）"""
         candidates = sorted(candidates, key=lambda x: (-x.total_score, -len(x.matched_params), x.unit_price))[:top_k]
         
         return MatchResult(
@@ -118,6 +484,7 @@ class IntelligentMatcher:
             extraction=extraction
         )
     
+    @metrics.timed('matcher_model_exact')
     def _model_exact_match(self, extraction: ExtractionResult) -> Optional[List[CandidateDevice]]:
         """型号精确匹配：如果提取到型号，直接在数据库中查找"""
         model = extraction.auxiliary.model if extraction.auxiliary else None
@@ -126,36 +493,19 @@ class IntelligentMatcher:
         
         logger.info(f"尝试型号精确匹配: {model}")
         
-        # 在所有设备中查找型号
-        all_devices = self._get_all_devices_as_list()
-        matched_devices = []
+        # 优先使用型号哈希索引，索引不可用时回退到线性查找
+        if self.model_index is not None:
+            matched_profiles = self.model_index.find_exact(model)
+        else:
+            matched_profiles = [
+                p for p in self._get_all_profiles()
+                if p.spec_model and p.spec_model.lower() == model.lower()
+            ]
         
-        for device in all_devices:
-            device_model = device.get('spec_model', '')
-            if device_model and device_model.lower() == model.lower():
-                # 型号完全匹配，返回该设备
-                candidate = CandidateDevice(
-                    device_id=device.get('device_id', ''),
-                    device_name=device.get('device_name', ''),
-                    device_type=device.get('device_type', ''),
-                    brand=device.get('brand', ''),
-                    spec_model=device.get('spec_model', ''),
-                    unit_price=device.get('unit_price', 0) or 0,
-                    total_score=100.0,  # 型号精确匹配得满分
-                    score_details=ScoreDetails(
-                        device_type_score=0,
-                        keyword_score=0,
-                        parameter_score=0,
-                        brand_score=0,
-                        other_score=0,
-                        model_match_score=100.0  # 型号匹配得分
-                    ),
-                    matched_params=['型号精确匹配'],
-                    unmatched_params=[],
-                    param_match_details=[],
-                    all_params=self._extract_all_params(device)
-                )
-                matched_devices.append(candidate)
+        # 型号完全匹配得满分
+        matched_devices = [
+            self._model_candidate(profile, 100.0, '型号精确匹配') for profile in matched_profiles
+        ]
         
         if matched_devices:
             logger.info(f"型号精确匹配找到 {len(matched_devices)} 个设备")
@@ -163,133 +513,262 @@ class IntelligentMatcher:
         
         return None
     
-    def _multi_stage_match(self, extraction: ExtractionResult) -> List[CandidateDevice]:
-        """多阶段匹配策略"""
+    @metrics.timed('matcher_model_family')
+    def _model_family_match(self, extraction: ExtractionResult,
+                            top_k: Optional[int] = None) -> Optional[List[CandidateDevice]]:
+        """型号系列匹配：提取到的型号是设备型号的系列前缀（按价格升序，只构建前 top_k 个候选）"""
+        model = extraction.auxiliary.model if extraction.auxiliary else None
+        if not model or self.model_index is None:
+            return None
+        
+        profiles = self.model_index.find_family(model)
+        if not profiles:
+            return None
+        
+        # 同系列设备得分相同，按价格升序（稳定排序）
+        profiles = sorted(profiles, key=lambda p: p.unit_price)
+        if top_k is not None:
+            profiles = profiles[:top_k]
+        
+        # 系列匹配按严格匹配阈值计分，低于型号精确匹配
+        family_score = float(self.thresholds['strict'])
+        return [self._model_candidate(profile, family_score, '型号系列匹配') for profile in profiles]
+    
+    def _model_candidate(self, profile: DeviceProfile, score: float, reason: str) -> CandidateDevice:
+        """构建型号匹配的候选设备"""
+        return CandidateDevice(
+            device_id=profile.device_id,
+            device_name=profile.device_name,
+            device_type=profile.device_type,
+            brand=profile.brand,
+            spec_model=profile.spec_model,
+            unit_price=profile.unit_price,
+            total_score=score,
+            score_details=ScoreDetails(
+                device_type_score=0,
+                keyword_score=0,
+                parameter_score=0,
+                brand_score=0,
+                other_score=0,
+                model_match_score=score  # 型号匹配得分
+            ),
+            matched_params=[reason],
+            unmatched_params=[],
+            param_match_details=[],
+            all_params=dict(profile.all_params)
+        )
+    
+    def _multi_stage_match(self, extraction: ExtractionResult, top_k: Optional[int] = None,
+                           scored: Optional[RequestScoreCache] = None,
+                           type_devices: Optional[List[DeviceProfile]] = None) -> List[CandidateDevice]:
+        """
+        多阶段匹配策略（同一请求内每个设备最多评分一次）
+        
+        Args:
+            extraction: 提取结果
+            top_k: 调用方最终需要的候选数量，用于收紧各阶段保留的数量
+            scored: 评分缓存（批量匹配时已预先写入同类型设备的总分）
+            type_devices: 同类型设备列表（批量匹配时按组解析一次）
+        """
+        # 评分缓存，各阶段共享
+        if scored is None:
+            scored = RequestScoreCache()
+        limit = self._stage_limit(top_k)
+        
+        # 严格/宽松阶段使用同一份同类型设备列表
+        if type_devices is None:
+            type_devices = self._filter_by_device_type(extraction.device_type.sub_type)
+        
         # 第一阶段：严格匹配（90+分）
-        candidates = self._strict_match(extraction)
+        candidates = self._strict_match(extraction, type_devices, scored, limit)
         if candidates:
             logger.info(f"严格匹配找到 {len(candidates)} 个候选设备")
             return candidates
         
         # 第二阶段：宽松匹配（70-89分）
-        candidates = self._relaxed_match(extraction)
+        candidates = self._relaxed_match(extraction, type_devices, scored, limit)
         if candidates:
             logger.info(f"宽松匹配找到 {len(candidates)} 个候选设备")
             return candidates
         
         # 第三阶段：模糊匹配（50-69分）
-        candidates = self._fuzzy_match(extraction)
+        candidates = self._fuzzy_match(extraction, scored, limit)
         if candidates:
             logger.info(f"模糊匹配找到 {len(candidates)} 个候选设备")
             return candidates
         
         # 第四阶段：兜底匹配（30-49分）
-        candidates = self._fallback_match(extraction)
+        candidates = self._fallback_match(extraction, scored, limit)
         logger.info(f"兜底匹配找到 {len(candidates)} 个候选设备")
         return candidates
     
-    def _strict_match(self, extraction: ExtractionResult) -> List[CandidateDevice]:
-        """严格匹配：设备类型+主要参数都匹配"""
-        # 筛选同类型设备
-        devices = self._filter_by_device_type(extraction.device_type.sub_type)
+    def _stage_limit(self, top_k: Optional[int]) -> int:
+        """各阶段保留的候选数量：不超过15个，调用方只需要更少时按 top_k 收紧"""
+        if top_k is None or top_k < 1:
+            return STAGE_CANDIDATE_LIMIT
+        return min(top_k, STAGE_CANDIDATE_LIMIT)
+    
+    def _score_devices(self, extraction: ExtractionResult, devices: List[DeviceProfile],
+                       scored: Optional[RequestScoreCache] = None) -> List[ScoredDevice]:
+        """
+        对设备列表评分（按设备ID去重，保留首次出现的设备）
         
-        # 评分并筛选
-        candidates = []
+        Args:
+            extraction: 提取结果
+            devices: 设备匹配档案列表
+            scored: 请求级评分缓存，已评分的设备直接复用结果
+            
+        Returns:
+            List[ScoredDevice]: 按输入顺序排列的轻量评分结果
+        """
+        if scored is None:
+            scored = RequestScoreCache()
+        
+        results = []
         seen_device_ids = set()
-        for device in devices:
-            device_id = device.get('device_id')
+        for profile in devices:
+            device_id = profile.device_id
             if device_id in seen_device_ids:
                 continue
             seen_device_ids.add(device_id)
             
-            candidate = self._score_device(extraction, device)
-            if candidate.total_score >= self.thresholds['strict']:
-                candidates.append(candidate)
+            entry = scored.results.get(id(profile))
+            if entry is None:
+                entry = (profile, self._score_profile(extraction, profile, scored.range_hits))
+                scored.results[id(profile)] = entry
+            results.append(entry[1])
         
-        # 排序并限制数量（分数相同时，按匹配项数量降序，再按价格升序）
-        candidates.sort(key=lambda x: (-x.total_score, -len(x.matched_params), x.unit_price))
-        return candidates[:15]
+        return results
     
-    def _relaxed_match(self, extraction: ExtractionResult) -> List[CandidateDevice]:
-        """宽松匹配：设备类型匹配，参数部分匹配"""
-        # 筛选同类型设备
-        devices = self._filter_by_device_type(extraction.device_type.sub_type)
+    def _select_top(self, extraction: ExtractionResult, devices: List[DeviceProfile],
+                    scored: Optional[RequestScoreCache], low: float, high: Optional[float],
+                    limit: int) -> List[CandidateDevice]:
+        """
+        评分并用有界堆选出前 limit 个设备，只为入选设备构建候选对象
+        
+        分两步：先只计算总分筛出可能入选的设备，再对这些设备完整评分（收集匹配的参数名）。
+        排序规则：总分降序 → 匹配参数数量降序 → 价格升序（同分保持输入顺序）
         
-        # 评分并筛选
-        candidates = []
+        Args:
+            extraction: 提取结果
+            devices: 设备匹配档案列表
+            scored: 请求级评分缓存
+            low: 总分下限（含）
+            high: 总分上限（不含），None 表示不设上限
+            limit: 保留的最大数量
+        """
+        if scored is None:
+            scored = RequestScoreCache()
+        
+        # 列式后端向量化计算总分，否则逐设备只计算总分
+        shortlist = self._columnar_shortlist(extraction, devices, scored, low, high, limit)
+        if shortlist is None:
+            shortlist = self._total_shortlist(extraction, devices, scored, low, high, limit)
+        
+        collector = TopKCollector(limit)
+        for result in self._score_devices(extraction, shortlist, scored):
+            score = result.total_score
+            if score >= low and (high is None or score < high):
+                collector.push(score, result.matched_count, result.profile.unit_price, result)
+        return [self._build_candidate(result) for result in collector.results()]
+    
+    def _total_shortlist(self, extraction: ExtractionResult, devices: List[DeviceProfile],
+                         scored: RequestScoreCache, low: float, high: Optional[float],
+                         limit: int) -> List[DeviceProfile]:
+        """
+        只计算总分，筛出总分在区间内且不低于第 limit 高分的设备（保持输入顺序，按设备ID去重）
+        
+        低于第 limit 高分的设备不可能入选；同分设备全部保留，由完整评分决定顺序。
+        """
+        entries = []
         seen_device_ids = set()
-        for device in devices:
-            device_id = device.get('device_id')
+        for profile in devices:
+            device_id = profile.device_id
             if device_id in seen_device_ids:
                 continue
             seen_device_ids.add(device_id)
             
-            candidate = self._score_device(extraction, device)
-            if self.thresholds['relaxed'] <= candidate.total_score < self.thresholds['strict']:
-                candidates.append(candidate)
+            total = scored.total(profile)
+            if total is None:
+                total = self._score_total(extraction, profile, scored.range_hits)
+                scored.totals[id(profile)] = (profile, total)
+            if total >= low and (high is None or total < high):
+                entries.append((profile, total))
+        
+        if 0 < limit < len(entries):
+            kth_score = heapq.nlargest(limit, (total for _, total in entries))[-1]
+            entries = [entry for entry in entries if entry[1] >= kth_score]
+        
+        return [profile for profile, _ in entries]
+    
+    def _columnar_shortlist(self, extraction: ExtractionResult, devices: List[DeviceProfile],
+                            scored: RequestScoreCache, low: float, high: Optional[float],
+                            limit: int) -> Optional[List[DeviceProfile]]:
+        """
+        列式后端：筛出总分在区间内且不低于第 limit 高分的设备（保持输入顺序，已按设备ID去重）
+        
+        Returns:
+            List[DeviceProfile]: 候选设备；列式后端不可用时返回 None
+        """
+        scorer = self.columnar_scorer
+        if scorer is None:
+            return None
+        
+        positions = scorer.positions_for(devices)
+        if positions is None:
+            return None
+        
+        # 同一请求内全部设备的总分只计算一次
+        if scored.columnar_scores is None:
+            scored.columnar_scores = scorer.score_all(extraction)
+        all_scores = scored.columnar_scores
         
-        # 排序并限制数量（分数相同时，按匹配项数量降序，再按价格升序）
-        candidates.sort(key=lambda x: (-x.total_score, -len(x.matched_params), x.unit_price))
-        return candidates[:15]
+        return scorer.shortlist(all_scores, positions, low, high, limit)
     
-    def _fuzzy_match(self, extraction: ExtractionResult) -> List[CandidateDevice]:
+    @metrics.timed('matcher_strict')
+    def _strict_match(self, extraction: ExtractionResult, devices: Optional[List[DeviceProfile]] = None,
+                      scored: Optional[RequestScoreCache] = None, limit: int = STAGE_CANDIDATE_LIMIT) -> List[CandidateDevice]:
+        """严格匹配：设备类型+主要参数都匹配"""
+        # 筛选同类型设备
+        if devices is None:
+            devices = self._filter_by_device_type(extraction.device_type.sub_type)
+        
+        return self._select_top(extraction, devices, scored, self.thresholds['strict'], None, limit)
+    
+    @metrics.timed('matcher_relaxed')
+    def _relaxed_match(self, extraction: ExtractionResult, devices: Optional[List[DeviceProfile]] = None,
+                       scored: Optional[RequestScoreCache] = None, limit: int = STAGE_CANDIDATE_LIMIT) -> List[CandidateDevice]:
+        """宽松匹配：设备类型匹配，参数部分匹配"""
+        # 筛选同类型设备
+        if devices is None:
+            devices = self._filter_by_device_type(extraction.device_type.sub_type)
+        
+        return self._select_top(extraction, devices, scored,
+                                self.thresholds['relaxed'], self.thresholds['strict'], limit)
+    
+    @metrics.timed('matcher_fuzzy')
+    def _fuzzy_match(self, extraction: ExtractionResult, scored: Optional[RequestScoreCache] = None,
+                     limit: int = STAGE_CANDIDATE_LIMIT) -> List[CandidateDevice]:
         """模糊匹配：主类型匹配，参数模糊匹配"""
         # 筛选主类型设备
         devices = self._filter_by_main_type(extraction.device_type.main_type)
         
-        # 评分并筛选
-        candidates = []
-        seen_device_ids = set()
-        for device in devices:
-            device_id = device.get('device_id')
-            if device_id in seen_device_ids:
-                continue
-            seen_device_ids.add(device_id)
-            
-            candidate = self._score_device(extraction, device)
-            if self.thresholds['fuzzy'] <= candidate.total_score < self.thresholds['relaxed']:
-                candidates.append(candidate)
-        
-        # 排序并限制数量（分数相同时，按匹配项数量降序，再按价格升序）
-        candidates.sort(key=lambda x: (-x.total_score, -len(x.matched_params), x.unit_price))
-        return candidates[:15]
+        return self._select_top(extraction, devices, scored,
+                                self.thresholds['fuzzy'], self.thresholds['relaxed'], limit)
     
-    def _fallback_match(self, extraction: ExtractionResult) -> List[CandidateDevice]:
+    @metrics.timed('matcher_fallback')
+    def _fallback_match(self, extraction: ExtractionResult, scored: Optional[RequestScoreCache] = None,
+                        limit: int = STAGE_CANDIDATE_LIMIT) -> List[CandidateDevice]:
         """兜底匹配：返回相近类型的设备（最多15个)"""
-        # 获取所有设备并转换为字典列表
-        devices = self._get_all_devices_as_list()
-        
-        # 评分并筛选
-        candidates = []
-        seen_device_ids = set()  # 用于去重
-        for device in devices:
-            device_id = device.get('device_id')
-            if device_id in seen_device_ids:
-                continue  # 跳过已添加的设备
-            seen_device_ids.add(device_id)
-            
-            candidate = self._score_device(extraction, device)
-            if candidate.total_score >= self.thresholds['fallback']:
-                candidates.append(candidate)
+        # 获取所有设备的匹配档案（评分时已按设备ID去重）
+        devices = self._get_all_profiles()
         
-        # 按分数降序排序，分数相同时按匹配项数量降序，再按价格升序
-        candidates.sort(key=lambda x: (-x.total_score, -len(x.matched_params), x.unit_price))
-        
-        # 匉设备ID去重（只保留前10个）
-        unique_candidates = []
-        seen_device_ids_final = set()
-        for c in candidates:
-            if c.device_id not in seen_device_ids_final:
-                unique_candidates.append(c)
-                seen_device_ids_final.add(c.device_id)
-        
-        # 限制返回数量
-        return unique_candidates[:15]
+        return self._select_top(extraction, devices, scored, self.thresholds['fallback'], None, limit)
     
-    def _filter_by_device_type(self, device_type: str) -> List[Dict]:
+    def _filter_by_device_type(self, device_type: str) -> List[DeviceProfile]:
         """根据设备类型筛选（使用缓存索引）"""
         if not device_type or device_type == "未知":
-            return self._get_all_devices_as_list()
+            return self._get_all_profiles()
         
         # 优先使用缓存索引
         if device_type in self.device_cache_by_type:
@@ -299,20 +778,32 @@ class IntelligentMatcher:
         # 尝试使用 get_devices_by_type 方法
         if hasattr(self.device_loader, 'get_devices_by_type'):
             devices = self.device_loader.get_devices_by_type(device_type)
-            return self._convert_devices_to_list(devices)
+            return [build_device_profile(d) for d in self._convert_devices_to_list(devices)]
         
         # 否则手动筛选
-        all_devices = self._get_all_devices_as_list()
-        return [d for d in all_devices if d.get('device_type', '') == device_type]
+        all_profiles = self._get_all_profiles()
+        return [p for p in all_profiles if p.device_type == device_type]
     
-    def _filter_by_main_type(self, main_type: str) -> List[Dict]:
-        """根据主类型筛选（使用缓存索引）"""
+    def _filter_by_main_type(self, main_type: str) -> List[DeviceProfile]:
+        """根据主类型筛选（结果按主类型缓存，同一份类型索引内返回同一个列表对象）"""
         if not main_type or main_type == "未知":
-            return self._get_all_devices_as_list()
+            return self._get_all_profiles()
+        
+        # 类型索引在设备变更时整体替换，缓存条目只在记录的类型索引仍是当前索引时有效
+        by_type = self.device_cache_by_type
+        cached = self._main_type_lists.get(main_type)
+        if cached is not None and cached[0] is by_type:
+            return cached[1]
         
+        devices = self._collect_main_type(main_type, by_type)
+        self._main_type_lists.put(main_type, (by_type, devices))
+        return devices
+    
+    def _collect_main_type(self, main_type: str, by_type: Dict[str, List[DeviceProfile]]) -> List[DeviceProfile]:
+        """收集设备类型包含主类型的全部设备"""
         # 使用缓存索引查找包含主类型的设备类型
         matched_devices = []
-        for dtype, devices in self.device_cache_by_type.items():
+        for dtype, devices in by_type.items():
             if main_type in dtype:
                 matched_devices.extend(devices)
         
@@ -321,8 +812,8 @@ class IntelligentMatcher:
             return matched_devices
         
         # 回退到手动筛选
-        all_devices = self._get_all_devices_as_list()
-        return [d for d in all_devices if main_type in d.get('device_type', '')]
+        all_profiles = self._get_all_profiles()
+        return [p for p in all_profiles if main_type in p.device_type]
     
     def _get_all_devices_as_list(self) -> List[Dict]:
         """获取所有设备并转换为字典列表（使用缓存）"""
@@ -333,6 +824,14 @@ class IntelligentMatcher:
         self._all_devices_cache = self._convert_devices_to_list(devices)
         return self._all_devices_cache
     
+    def _get_all_profiles(self) -> List[DeviceProfile]:
+        """获取所有设备的匹配档案（使用缓存）"""
+        if self._all_profiles_cache is not None:
+            return self._all_profiles_cache
+        
+        self._all_profiles_cache = [build_device_profile(d) for d in self._get_all_devices_as_list()]
+        return self._all_profiles_cache
+    
     def _convert_devices_to_list(self, devices) -> List[Dict]:
         """
         将设备数据转换为字典列表
@@ -383,60 +882,115 @@ class IntelligentMatcher:
             logger.error(f"不支持的设备数据格式: {type(devices)}")
             return []
     
-    def _score_device(self, extraction: ExtractionResult, device: Dict) -> CandidateDevice:
-        """对单个设备进行评分"""
+    def _score_device(self, extraction: ExtractionResult, profile: DeviceProfile) -> CandidateDevice:
+        """对单个设备进行评分（只读取设备匹配档案）"""
+        return self._build_candidate(self._score_profile(extraction, profile))
+    
+    def _score_profile(self, extraction: ExtractionResult, profile: DeviceProfile,
+                       range_hits: Optional[Dict] = None) -> ScoredDevice:
+        """
+        计算单个设备的各维度得分（不构建候选对象）
+        
+        Args:
+            range_hits: 请求级区间索引命中缓存（见 _iter_candidate_matches），None 时逐参数比较数字范围
+        """
         # 设备类型得分
-        device_type_score = self._score_device_type(extraction, device)
+        device_type_score = self._score_device_type(extraction, profile)
         
         # 关键词得分（返回得分和匹配的参数名）
-        keyword_score, keyword_matched_params = self._score_keyword_match(extraction, device)
+        keyword_score, keyword_matched_params = self._score_keyword_match(extraction, profile)
         
         # 参数候选匹配得分（新增）
         param_match_score, matched_candidates, param_matched_names = self._match_candidates_to_device(
-            extraction.parameter_candidates, device
+            extraction.parameter_candidates, profile, range_hits
         )
         
         # 品牌得分
-        brand_score = self._score_brand(extraction, device)
+        brand_score = self._score_brand(extraction, profile)
         
         # 其他得分
-        other_score = self._score_others(extraction, device)
+        other_score = self._score_others(extraction, profile)
         
         # 计算总分
-        total_score = (
+        total_score = self._weighted_total(
+            device_type_score, keyword_score, param_match_score, brand_score, other_score
+        )
+        
+        return ScoredDevice(
+            profile=profile,
+            total_score=total_score,
+            device_type_score=device_type_score,
+            keyword_score=keyword_score,
+            param_match_score=param_match_score,
+            brand_score=brand_score,
+            other_score=other_score,
+            keyword_matched_params=keyword_matched_params,
+            param_matched_names=param_matched_names,
+            matched_count=len(set(keyword_matched_params + param_matched_names))
+        )
+    
+    def _score_total(self, extraction: ExtractionResult, profile: DeviceProfile,
+                     range_hits: Optional[Dict] = None) -> float:
+        """只计算单个设备的总分（不收集匹配的参数名），用于筛选入选设备"""
+        return self._total_from_type_part(self._type_keyword_part(extraction, profile), extraction, profile,
+                                          range_hits)
+    
+    def _type_keyword_part(self, extraction: ExtractionResult, profile: DeviceProfile) -> float:
+        """总分中的设备类型和关键词两项（只取决于提取结果的设备类型信息）"""
+        return (
+            self._score_device_type(extraction, profile) * self.weights['device_type'] * 100 +
+            self._score_keyword_only(extraction, profile) * self.weights['keyword'] * 100
+        )
+    
+    def _total_from_type_part(self, type_part: float, extraction: ExtractionResult,
+                              profile: DeviceProfile, range_hits: Optional[Dict] = None) -> float:
+        """在设备类型和关键词两项上累加其余各项（运算顺序与 _weighted_total 相同，结果逐位一致）"""
+        return (
+            type_part +
+            self._score_candidates_only(extraction.parameter_candidates, profile, range_hits) *
+            self.weights['parameters'] * 100 +
+            self._score_brand(extraction, profile) * self.weights['brand'] * 100 +
+            self._score_others(extraction, profile) * self.weights['others'] * 100
+        )
+    
+    def _weighted_total(self, device_type_score: float, keyword_score: float, param_match_score: float,
+                        brand_score: float, other_score: float) -> float:
+        """按权重计算总分（0-100）"""
+        return (
             device_type_score * self.weights['device_type'] * 100 +
             keyword_score * self.weights['keyword'] * 100 +
             param_match_score * self.weights['parameters'] * 100 +
             brand_score * self.weights['brand'] * 100 +
             other_score * self.weights['others'] * 100
         )
+    
+    def _build_candidate(self, result: ScoredDevice) -> CandidateDevice:
+        """由评分结果构建候选设备"""
+        profile = result.profile
         
-        # 提取设备的所有参数
-        all_params = self._extract_all_params(device)
+        # 设备的所有参数（档案中已预先提取）
+        all_params = dict(profile.all_params)
         
         # 合并所有匹配的参数名（去重）
-        all_matched_params = list(set(keyword_matched_params + param_matched_names))
+        all_matched_params = list(set(result.keyword_matched_params + result.param_matched_names))
         
         # 计算未匹配的参数（设备有但用户输入没有匹配的参数）
         unmatched_params = [name for name in all_params.keys() if name not in all_matched_params]
         
-        # 提取价格
-        unit_price = device.get('unit_price', 0) or 0
-        
         return CandidateDevice(
-            device_id=device.get('device_id', ''),
-            device_name=device.get('device_name', ''),
-            device_type=device.get('device_type', ''),
-            brand=device.get('brand', ''),
-            spec_model=device.get('spec_model', ''),
-            unit_price=unit_price,
-            total_score=total_score,
+            device_id=profile.device_id,
+            device_name=profile.device_name,
+            device_type=profile.device_type,
+            brand=profile.brand,
+            spec_model=profile.spec_model,
+            unit_price=profile.unit_price,
+            total_score=result.total_score,
             score_details=ScoreDetails(
-                device_type_score=device_type_score * 30,
-                keyword_score=keyword_score * 30,
-                parameter_score=param_match_score * 20,
-                brand_score=brand_score * 15,
-                other_score=other_score * 5,
+                device_type_score=result.device_type_score * 30,
+                keyword_score=result.keyword_score * 30,
+                parameter_score=result.param_match_score * 20,
+                brand_score=result.brand_score * 15,
+                other_score=result.other_score * 5,
                 model_match_score=0.0
             ),
             matched_params=all_matched_params,
@@ -445,9 +999,9 @@ class IntelligentMatcher:
             all_params=all_params
         )
     
-    def _score_device_type(self, extraction: ExtractionResult, device: Dict) -> float:
+    def _score_device_type(self, extraction: ExtractionResult, profile: DeviceProfile) -> float:
         """设备类型评分（0-1）"""
-        device_type = device.get('device_type', '')
+        device_type = profile.device_type
         extracted_type = extraction.device_type.sub_type
         extracted_main = extraction.device_type.main_type
         keywords = extraction.device_type.keywords
@@ -469,48 +1023,42 @@ class IntelligentMatcher:
         # 相近类型
         return 0.5
     
-    def _score_keyword_match(self, extraction: ExtractionResult, device: Dict) -> tuple:
+    def _score_keyword_only(self, extraction: ExtractionResult, profile: DeviceProfile) -> float:
+        """设备类型关键词评分（只返回得分）"""
+        keywords = extraction.device_type.keywords
+        if not keywords or not profile.params:
+            return 0.0
+        
+        if self.keyword_index is not None:
+            hit = self.keyword_index.has_match(keywords, profile)
+            if hit is not None:
+                return 1.0 if hit else 0.0
+        
+        return self._score_keyword_match(extraction, profile)[0]
+    
+    def _score_keyword_match(self, extraction: ExtractionResult, profile: DeviceProfile) -> tuple:
         """设备类型关键词评分，返回(得分, 匹配的参数名列表)"""
         keywords = extraction.device_type.keywords
         if not keywords:
             return 0.0, []
         
-        key_params_str = device.get('key_params')
-        if not key_params_str:
+        if not profile.params:
             return 0.0, []
         
-        import json
-        try:
-            key_params = json.loads(key_params_str) if isinstance(key_params_str, str) else key_params_str
-        except:
-            return 0.0, []
+        # 优先查询倒排索引（不在索引中的设备回退到逐参数匹配）
+        if self.keyword_index is not None:
+            matched_param_names = self.keyword_index.matched_params(keywords, profile)
+            if matched_param_names is not None:
+                return (1.0, matched_param_names) if matched_param_names else (0.0, [])
         
-        # 记录匹配的参数名
+        # 记录匹配的参数名（每个关键词与其同义词合并为一个缓存的交替正则，确保独立匹配）
         matched_param_names = []
-        synonym_map = self.config.get('synonym_map', {})
         
         for keyword in keywords:
-            keyword_lower = keyword.lower()
-            synonyms = self._get_synonyms(keyword, synonym_map)
-            
-            for param_name, param_value in key_params.items():
-                if isinstance(param_value, dict):
-                    value_str = param_value.get('value', '').lower()
-                else:
-                    value_str = str(param_value).lower() if param_value else ''
-                
-                # 使用正则表达式确保独立匹配
-                pattern = r'(?<![a-zA-Z])' + re.escape(keyword_lower) + r'(?![a-zA-Z])|(?<![a-zA-Z])' + re.escape(keyword_lower) + r'(?=\d)'
-                if re.search(pattern, value_str, re.IGNORECASE):
-                    if param_name not in matched_param_names:
-                        matched_param_names.append(param_name)
-                
-                # 同义词匹配
-                for synonym in synonyms:
-                    synonym_pattern = r'(?<![a-zA-Z])' + re.escape(synonym.lower()) + r'(?![a-zA-Z])|(?<![a-zA-Z])' + re.escape(synonym.lower()) + r'(?=\d)'
-                    if re.search(synonym_pattern, value_str, re.IGNORECASE):
-                        if param_name not in matched_param_names:
-                            matched_param_names.append(param_name)
+            pattern = self._keywords_pattern([keyword])
+            for param in profile.params:
+                if pattern.search(param.value_lower) and param.name not in matched_param_names:
+                    matched_param_names.append(param.name)
         
         # 如果有匹配，返回满分和匹配的参数名
         if matched_param_names:
@@ -566,93 +1114,81 @@ class IntelligentMatcher:
     
     def _score_keywords(self, keywords: List[str], key_params: Dict) -> float:
         """关键词匹配评分（只要匹配到任意关键词就得满分1.0分）"""
-        synonym_map = self.config.get('synonym_map', {})
+        if not keywords:
+            return 0.0
         
-        for keyword in keywords:
-            keyword_lower = keyword.lower()
-            synonyms = self._get_synonyms(keyword, synonym_map)
+        # 使用正则表达式确保独立匹配（避免PM匹配到ppm），关键词和同义词合并为一个交替正则
+        pattern = self._keywords_pattern(keywords)
+        
+        for param_name, param_value in key_params.items():
+            if isinstance(param_value, dict):
+                value_str = param_value.get('value', '').lower()
+            else:
+                value_str = str(param_value).lower() if param_value else ''
             
-            for param_name, param_value in key_params.items():
-                if isinstance(param_value, dict):
-                    value_str = param_value.get('value', '').lower()
-                else:
-                    value_str = str(param_value).lower() if param_value else ''
-                
-                # 使用正则表达式确保独立匹配（避免PM匹配到ppm）
-                # 匹配模式：关键词前后不能有字母或数字（但可以匹配PM2.5这种形式）
-                pattern = r'(?<![a-zA-Z])' + re.escape(keyword_lower) + r'(?![a-zA-Z])|(?<![a-zA-Z])' + re.escape(keyword_lower) + r'(?=\d)'
-                if re.search(pattern, value_str, re.IGNORECASE):
-                    return 1.0  # 满分
-                
-                # 同义词匹配
-                for synonym in synonyms:
-                    synonym_pattern = r'(?<![a-zA-Z])' + re.escape(synonym.lower()) + r'(?![a-zA-Z])|(?<![a-zA-Z])' + re.escape(synonym.lower()) + r'(?=\d)'
-                    if re.search(synonym_pattern, value_str, re.IGNORECASE):
-                        return 1.0  # 满分
+            if pattern.search(value_str):
+                return 1.0  # 满分
         
         return 0.0
     
-    def _score_brand(self, extraction: ExtractionResult, device: Dict) -> float:
+    def _keywords_pattern(self, keywords: List[str]):
+        """关键词及其同义词的交替边界正则（进程级缓存）"""
+        synonym_map = self.config.get('synonym_map', {})
+        terms = []
+        for keyword in keywords:
+            terms.append(keyword)
+            terms.extend(self._get_synonyms(keyword, synonym_map))
+        return keyword_pattern_cache.keywords(terms)
+    
+    def _score_brand(self, extraction: ExtractionResult, profile: DeviceProfile) -> float:
         """品牌评分（0-1）"""
-        if extraction.auxiliary.brand and device.get('brand'):
-            if extraction.auxiliary.brand == device['brand']:
+        if extraction.auxiliary.brand and profile.brand:
+            if extraction.auxiliary.brand == profile.brand:
                 return 1.0
         return 0.0
     
-    def _score_others(self, extraction: ExtractionResult, device: Dict) -> float:
+    def _score_others(self, extraction: ExtractionResult, profile: DeviceProfile) -> float:
         """其他评分（0-1）"""
         score = 0.0
         
         # 介质评分（0.5）
         if extraction.auxiliary.medium:
             # 简单检查设备描述中是否包含介质
-            if extraction.auxiliary.medium in device.get('raw_description', ''):
+            if extraction.auxiliary.medium in profile.raw_description:
                 score += 0.5
         
         # 型号评分（0.5）
-        if extraction.auxiliary.model and device.get('spec_model'):
-            if extraction.auxiliary.model in device['spec_model']:
+        if extraction.auxiliary.model and profile.spec_model:
+            if extraction.auxiliary.model in profile.spec_model:
                 score += 0.5
         
         return score
     
-    def _match_candidates_to_device(self, candidates: List, device: Dict) -> tuple:
+    def _match_candidates_to_device(self, candidates: List, profile: DeviceProfile,
+                                    range_hits: Optional[Dict] = None) -> tuple:
         """
         将参数候选匹配到设备参数
         
         Args:
             candidates: 参数候选列表
-            device: 设备字典
+            profile: 设备匹配档案
+            range_hits: 请求级区间索引命中缓存
             
         Returns:
             (匹配得分, 匹配的候选列表, 匹配的参数名列表)
         """
-        key_params_str = device.get('key_params')
-        if not key_params_str:
-            return 0.0, [], []
-        
-        import json
-        try:
-            key_params = json.loads(key_params_str) if isinstance(key_params_str, str) else key_params_str
-        except:
+        if not profile.params:
             return 0.0, [], []
         
         matched_candidates = []
         matched_param_names = []
         match_count = 0
         
-        for candidate in candidates:
-            # 在所有key_params中查找匹配
-            for param_name, param_value in key_params.items():
-                value_str = self._format_device_value(param_value)
-                
-                # 检查候选值是否在设备参数中
-                if self._value_matches(candidate.value, value_str):
-                    matched_candidates.append(candidate)
-                    if param_name not in matched_param_names:
-                        matched_param_names.append(param_name)
-                    match_count += 1
-                    break
+        for candidate, param in self._iter_candidate_matches(candidates, profile, range_hits):
+            matched_candidates.append(candidate)
+            if param.name not in matched_param_names:
+                matched_param_names.append(param.name)
+            match_count += 1
         
         # 计算匹配得分
         if len(candidates) == 0:
@@ -661,13 +1197,65 @@ class IntelligentMatcher:
         match_score = match_count / len(candidates)
         return match_score, matched_candidates, matched_param_names
     
+    def _score_candidates_only(self, candidates: List, profile: DeviceProfile,
+                               range_hits: Optional[Dict] = None) -> float:
+        """参数候选匹配得分（只返回得分）"""
+        if not profile.params or not candidates:
+            return 0.0
+        match_count = sum(1 for _ in self._iter_candidate_matches(candidates, profile, range_hits))
+        return match_count / len(candidates)
+    
+    def _iter_candidate_matches(self, candidates: List, profile: DeviceProfile,
+                                range_hits: Optional[Dict] = None):
+        """
+        逐个参数候选查找第一个匹配的设备参数，产出 (候选, 设备参数)
+        
+        Args:
+            range_hits: 请求级区间索引命中缓存 {(参数候选归一化值, 设备类型): {档案位置: 参数下标}}；
+                给出时每个参数候选按设备类型只查询一次区间索引，逐设备查表代替逐参数比较数字范围。
+                档案不在区间索引中（增量更新进行中）时仍逐参数比较。
+        """
+        position = None
+        if range_hits is not None and self.range_index is not None:
+            position = self.range_index.position(profile)
+        
+        for candidate in candidates:
+            # 候选值只归一化一次，设备侧使用档案中预先归一化的值
+            candidate_normalized = normalize_param_value(candidate.value)
+            
+            if position is not None:
+                param_hits = self._candidate_range_hits(
+                    range_hits, candidate_normalized, profile.device_type
+                ).get(position, ())
+                for param_idx, param in enumerate(profile.params):
+                    if candidate_normalized in param.value_normalized or param_idx in param_hits:
+                        yield candidate, param
+                        break
+                continue
+            
+            candidate_range = None
+            candidate_canonical = None
+            
+            # 在所有key_params中查找匹配
+            for param in profile.params:
+                # 直接包含
+                matched = candidate_normalized in param.value_normalized
+                
+                # 数字范围匹配
+                if not matched and (param.value_range or param.value_canonical):
+                    if candidate_range is None:
+                        candidate_range, candidate_canonical = self._candidate_range_info(candidate_normalized)
+                    if self._param_range_overlap(
+                            candidate_range, candidate_canonical, param.value_range, param.value_canonical):
+                        matched = True
+                
+                if matched:
+                    yield candidate, param
+                    break
+    
     def _format_device_value(self, value) -> str:
         """格式化设备值用于显示和匹配"""
-        if not value:
-            return ''
-        if isinstance(value, dict):
-            return str(value.get('value', ''))
-        return str(value)
+        return format_device_value(value)
     
     def _value_matches(self, candidate_value: str, device_value: str) -> bool:
         """
@@ -710,6 +1298,49 @@ class IntelligentMatcher:
                 return None
         return None
     
+    def _candidate_range_hits(self, range_hits: Dict, candidate_normalized: str,
+                              device_type: str) -> Dict[int, frozenset]:
+        """同类型设备中与参数候选数字范围重叠的参数（按请求缓存）：{档案位置: 参数下标}"""
+        key = (candidate_normalized, device_type)
+        hits = range_hits.get(key)
+        if hits is None:
+            candidate_range, candidate_canonical = self._candidate_range_info(candidate_normalized)
+            if candidate_range or candidate_canonical is not None:
+                hits = self.range_index.overlapping_params(candidate_range, candidate_canonical, device_type)
+            else:
+                hits = {}
+            range_hits[key] = hits
+        return hits
+    
+    def _candidate_range_info(self, candidate_normalized: str) -> Tuple[tuple, Optional[CanonicalRange]]:
+        """
+        参数候选值的 (数字范围, 规范单位范围)，解析结果跨设备、跨请求缓存
+        
+        无法解析时数字范围为空元组；规范单位范围只在开启按单位比较且单位已注册时解析，否则为 None
+        （单个通径值 DN25 只有规范单位范围）
+        """
+        cached = self._candidate_ranges.get(candidate_normalized)
+        if cached is not None:
+            return cached
+        
+        value_range = self._extract_range_from_value(candidate_normalized) or ()
+        canonical = parse_canonical(candidate_normalized) if self.unit_aware_ranges else None
+        info = (value_range, canonical)
+        self._candidate_ranges.put(candidate_normalized, info)
+        return info
+    
+    def _param_range_overlap(self, candidate_range: tuple, candidate_canonical: Optional[CanonicalRange],
+                             value_range: Optional[tuple], value_canonical: Optional[CanonicalRange]) -> bool:
+        """
+        参数候选与设备参数的数字范围是否重叠
+        
+        同一规范单位时比较换算后的范围，否则两侧都有数字范围时只比较数字
+        """
+        if (candidate_canonical is not None and value_canonical is not None
+                and candidate_canonical.comparable(value_canonical)):
+            return candidate_canonical.overlaps(value_canonical)
+        return bool(candidate_range and value_range) and self._ranges_overlap_simple(candidate_range, value_range)
+    
     def _ranges_overlap_simple(self, range1: tuple, range2: tuple) -> bool:
         """检查两个范围是否重叠"""
         min1, max1 = range1
@@ -1111,15 +1742,13 @@ class IntelligentMatcher:
                 
                 # 1. 直接匹配（使用正则表达式确保独立匹配）
                 # 匹配模式：关键词前后不能有字母或数字（但可以匹配PM2.5这种形式）
-                pattern = r'(?<![a-zA-Z])' + re.escape(keyword_lower) + r'(?![a-zA-Z])|(?<![a-zA-Z])' + re.escape(keyword_lower) + r'(?=\d)'
-                if re.search(pattern, value_str, re.IGNORECASE):
+                if keyword_pattern_cache.keyword(keyword_lower).search(value_str):
                     matched_keyword = keyword
                     match_type = 'exact'
                 # 2. 同义词匹配
                 else:
                     for synonym in synonyms:
-                        synonym_pattern = r'(?<![a-zA-Z])' + re.escape(synonym.lower()) + r'(?![a-zA-Z])|(?<![a-zA-Z])' + re.escape(synonym.lower()) + r'(?=\d)'
-                        if re.search(synonym_pattern, value_str, re.IGNORECASE):
+                        if keyword_pattern_cache.keyword(synonym).search(value_str):
                             matched_keyword = synonym
                             match_type = 'synonym'
                             break
@@ -1166,26 +1795,4 @@ class IntelligentMatcher:
     
     def _extract_all_params(self, device: Dict) -> Dict[str, str]:
         """提取设备的所有参数"""
-        all_params = {}
-        
-        import json
-        key_params_str = device.get('key_params')
-        if not key_params_str:
-            return all_params
-        
-        try:
-            key_params = json.loads(key_params_str) if isinstance(key_params_str, str) else key_params_str
-        except:
-            return all_params
-        
-        # 遍历所有参数，提取参数名和值
-        for param_name, param_value in key_params.items():
-            if isinstance(param_value, dict):
-                value = param_value.get('value', '')
-            else:
-                value = str(param_value) if param_value else ''
-            
-            if value:
-                all_params[param_name] = value
-        
-        return all_params
+        return dict(build_device_profile(device).all_params)
@@ -0,0 +1,371 @@
+"""
+关键词倒排索引
+
+为匹配器的关键词评分建立倒排索引：归一化词条 -> (设备, 参数) 倒排表。
+- 纯字母词条（如 pm、co）：建索引时把每个参数值切分为最长连续字母串，
+  直接查表即可，天然满足"前后不能紧邻字母"的边界规则（pm 不会命中 ppm）
+- 其他词条（如 pm2.5、温度）：首次查询时扫描一次全部参数值并缓存倒排表
+- 同义词：建索引时把 synonym_map 展开为 小写源词 -> 同义词列表
+
+关键词评分由"设备 × 参数 × 关键词 × 同义词"的正则嵌套循环变为倒排表查询。
+设备增删时通过 add/remove 增量维护倒排表（写时复制，查询线程不受影响）。
+
+边界正则统一由进程级的编译缓存提供（keyword_pattern_cache），按小写关键词缓存，
+跨设备、跨请求复用，并记录命中/未命中次数。
+"""
+
+import logging
+import os
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Pattern, Sequence, Tuple
+
+from .device_profile import DeviceProfile
+
+logger = logging.getLogger(__name__)
+
+# 最长连续字母串（与关键词边界规则中的 [a-zA-Z] 保持一致）
+LETTER_RUN_PATTERN = re.compile(r'[a-zA-Z]+')
+PURE_LETTER_PATTERN = re.compile(r'[a-z]+')
+
+# 每组关键词的查询结果缓存上限
+MAX_CACHED_KEYWORD_SETS = 256
+
+# 编译正则缓存上限
+MAX_CACHED_PATTERNS = 2048
+
+
+def keyword_boundary_pattern(keyword: str) -> str:
+    """关键词独立匹配的正则：前后不能紧邻字母（但可以匹配PM2.5这种形式）"""
+    escaped = re.escape(keyword.lower())
+    return r'(?<![a-zA-Z])' + escaped + r'(?![a-zA-Z])|(?<![a-zA-Z])' + escaped + r'(?=\d)'
+
+
+class KeywordPatternCache:
+    """关键词边界正则的编译缓存（线程安全，LRU 淘汰，记录命中/未命中次数）"""
+
+    def __init__(self, maxsize: int = MAX_CACHED_PATTERNS):
+        self.maxsize = maxsize
+        self._patterns: 'OrderedDict[Tuple[str, ...], Pattern]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def keyword(self, keyword: str) -> Pattern:
+        """单个关键词的边界正则"""
+        return self._get((keyword.lower(),))
+
+    def keywords(self, terms: Iterable[str]) -> Pattern:
+        """
+        多个关键词（含同义词）合并为一个交替正则
+
+        命中任一词条即匹配，等价于逐个词条分别查找后取"或"。
+        """
+        return self._get(tuple(OrderedDict.fromkeys(term.lower() for term in terms)))
+
+    def _get(self, key: Tuple[str, ...]) -> Pattern:
+        with self._lock:
+            pattern = self._patterns.get(key)
+            if pattern is not None:
+                self.hits += 1
+                self._patterns.move_to_end(key)
+                return pattern
+            self.misses += 1
+
+        if not key:
+            source = r'(?!)'  # 没有词条时不匹配任何内容
+        elif len(key) == 1:
+            source = keyword_boundary_pattern(key[0])
+        else:
+            alternation = '(?:' + '|'.join(re.escape(term) for term in key) + ')'
+            source = r'(?<![a-zA-Z])' + alternation + r'(?![a-zA-Z])|(?<![a-zA-Z])' + alternation + r'(?=\d)'
+        pattern = re.compile(source, re.IGNORECASE)
+
+        with self._lock:
+            self._patterns[key] = pattern
+            if len(self._patterns) > self.maxsize:
+                self._patterns.popitem(last=False)
+        return pattern
+
+    def after_fork(self):
+        """fork 出的子进程中重建锁（fork 时其他线程可能正持有锁）"""
+        self._lock = threading.Lock()
+
+    def stats(self) -> Dict[str, int]:
+        """缓存统计：命中次数、未命中次数、缓存条目数"""
+        with self._lock:
+            return {'hits': self.hits, 'misses': self.misses, 'size': len(self._patterns)}
+
+    def clear(self):
+        """清空缓存和计数"""
+        with self._lock:
+            self._patterns.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+# 进程级的关键词边界正则缓存
+keyword_pattern_cache = KeywordPatternCache()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=keyword_pattern_cache.after_fork)
+
+
+def build_synonym_lookup(synonym_map: Any) -> Dict[str, List[str]]:
+    """
+    将同义词映射展开为 小写源词 -> 同义词列表
+
+    支持数组格式 [{'source': ..., 'target': ...}] 和字典格式 {source: target}，
+    同一源词出现多次时按配置顺序合并。
+    """
+    lookup: Dict[str, List[str]] = {}
+
+    if isinstance(synonym_map, list):
+        for item in synonym_map:
+            if not isinstance(item, dict):
+                continue
+            source = item.get('source', '')
+            target = item.get('target', '')
+            if not target:
+                continue
+            if isinstance(target, list):
+                targets = [t for t in target if isinstance(t, str)]
+            elif isinstance(target, str):
+                targets = [target]
+            else:
+                continue
+            lookup.setdefault(source.lower(), []).extend(targets)
+    elif isinstance(synonym_map, dict):
+        for source, target in synonym_map.items():
+            if isinstance(target, str):
+                targets = [target]
+            elif isinstance(target, list):
+                targets = [t for t in target if isinstance(t, str)]
+            else:
+                continue
+            lookup.setdefault(source.lower(), []).extend(targets)
+
+    return lookup
+
+
+class KeywordIndex:
+    """关键词/同义词倒排索引"""
+
+    def __init__(self, profiles: Sequence[DeviceProfile], synonym_map: Any = None):
+        """
+        构建倒排索引
+
+        Args:
+            profiles: 设备匹配档案列表（索引只覆盖这些档案）
+            synonym_map: 同义词映射配置
+        """
+        # 档案列表只追加不删除：移除的档案从倒排表和位置映射中删除，位置不复用
+        self._profiles = list(profiles)
+        self._positions = {id(profile): pos for pos, profile in enumerate(self._profiles)}
+        self._synonyms = build_synonym_lookup(synonym_map or {})
+        self._lock = threading.Lock()
+
+        # 字母词条倒排表：词条 -> {档案位置: (参数下标, ...)}
+        self._letter_postings: Dict[str, Dict[int, Tuple[int, ...]]] = {}
+        # 其他词条的倒排表（首次查询时构建）
+        self._term_postings: Dict[str, Dict[int, Tuple[int, ...]]] = {}
+        # 关键词组 -> {档案位置: 匹配的参数名列表}
+        self._keyword_set_cache: 'OrderedDict[Tuple[str, ...], Dict[int, List[str]]]' = OrderedDict()
+        # 每次增删递增，避免把增删前算出的查询结果写回缓存
+        self._generation = 0
+
+        self._build_letter_postings()
+        logger.info(f"关键词倒排索引构建完成: {len(self._profiles)} 个设备, {len(self._letter_postings)} 个字母词条")
+
+    def _build_letter_postings(self):
+        """把每个参数值切分为最长连续字母串，建立字母词条倒排表"""
+        postings: Dict[str, Dict[int, List[int]]] = {}
+        for pos, profile in enumerate(self._profiles):
+            for param_idx, param in enumerate(profile.params):
+                for token in set(LETTER_RUN_PATTERN.findall(param.value_lower)):
+                    postings.setdefault(token, {}).setdefault(pos, []).append(param_idx)
+
+        self._letter_postings = {
+            token: {pos: tuple(idxs) for pos, idxs in by_profile.items()}
+            for token, by_profile in postings.items()
+        }
+
+    def add(self, profile: DeviceProfile):
+        """增量加入一个设备档案"""
+        with self._lock:
+            pos = len(self._profiles)
+            self._profiles.append(profile)
+            self._positions[id(profile)] = pos
+
+            for token, idxs in self._letter_tokens(profile).items():
+                postings = dict(self._letter_postings.get(token, {}))
+                postings[pos] = idxs
+                self._letter_postings[token] = postings
+
+            for term, cached in list(self._term_postings.items()):
+                idxs = self._term_param_indexes(term, profile)
+                if idxs:
+                    postings = dict(cached)
+                    postings[pos] = idxs
+                    self._term_postings[term] = postings
+
+            self._keyword_set_cache = OrderedDict()
+            self._generation += 1
+
+    def remove(self, profile: DeviceProfile) -> bool:
+        """
+        增量移除一个设备档案
+
+        Returns:
+            bool: 档案是否在索引中
+        """
+        with self._lock:
+            pos = self._positions.pop(id(profile), None)
+            if pos is None:
+                return False
+
+            for token in self._letter_tokens(profile):
+                postings = dict(self._letter_postings.get(token, {}))
+                postings.pop(pos, None)
+                if postings:
+                    self._letter_postings[token] = postings
+                else:
+                    self._letter_postings.pop(token, None)
+
+            for term, cached in list(self._term_postings.items()):
+                if pos in cached:
+                    postings = dict(cached)
+                    del postings[pos]
+                    self._term_postings[term] = postings
+
+            self._keyword_set_cache = OrderedDict()
+            self._generation += 1
+            return True
+
+    def _letter_tokens(self, profile: DeviceProfile) -> Dict[str, Tuple[int, ...]]:
+        """档案的字母词条 -> 命中的参数下标"""
+        tokens: Dict[str, List[int]] = {}
+        for param_idx, param in enumerate(profile.params):
+            for token in set(LETTER_RUN_PATTERN.findall(param.value_lower)):
+                tokens.setdefault(token, []).append(param_idx)
+        return {token: tuple(idxs) for token, idxs in tokens.items()}
+
+    def _term_param_indexes(self, term: str, profile: DeviceProfile) -> Tuple[int, ...]:
+        """档案中与非纯字母词条匹配的参数下标"""
+        pattern = keyword_pattern_cache.keyword(term)
+        return tuple(
+            param_idx for param_idx, param in enumerate(profile.params)
+            if term in param.value_lower and pattern.search(param.value_lower)
+        )
+
+    def after_fork(self):
+        """fork 出的子进程中重建锁（fork 时其他线程可能正持有锁）"""
+        self._lock = threading.Lock()
+
+    def position(self, profile: DeviceProfile) -> Optional[int]:
+        """档案在索引中的位置；不在索引中时返回 None"""
+        return self._positions.get(id(profile))
+
+    def synonyms(self, keyword: str) -> List[str]:
+        """获取关键词的所有同义词"""
+        return self._synonyms.get(keyword.lower(), [])
+
+    def postings(self, term: str) -> Dict[int, Tuple[int, ...]]:
+        """
+        查询词条的倒排表
+
+        Args:
+            term: 词条（关键词或同义词）
+
+        Returns:
+            Dict[int, Tuple[int, ...]]: 档案位置 -> 命中的参数下标
+        """
+        term = term.lower()
+        if PURE_LETTER_PATTERN.fullmatch(term):
+            return self._letter_postings.get(term, {})
+
+        cached = self._term_postings.get(term)
+        if cached is not None:
+            return cached
+
+        with self._lock:
+            result: Dict[int, Tuple[int, ...]] = {}
+            for pos, profile in enumerate(self._profiles):
+                if self._positions.get(id(profile)) != pos:
+                    continue  # 已移除
+                idxs = self._term_param_indexes(term, profile)
+                if idxs:
+                    result[pos] = idxs
+
+            self._term_postings[term] = result
+        return result
+
+    def match_keywords(self, keywords: Sequence[str]) -> Dict[int, List[str]]:
+        """
+        查询一组关键词（含同义词）命中的设备参数
+
+        Args:
+            keywords: 设备类型识别得到的关键词列表
+
+        Returns:
+            Dict[int, List[str]]: 档案位置 -> 匹配的参数名（按关键词、参数顺序去重）
+        """
+        cache_key = tuple(keywords)
+        # 命中时的 move_to_end 与写入/淘汰在同一把锁下，避免其他线程在 get 之后淘汰该键
+        with self._lock:
+            cached = self._keyword_set_cache.get(cache_key)
+            if cached is not None:
+                self._keyword_set_cache.move_to_end(cache_key)
+                return cached
+            generation = self._generation
+
+        # 每个关键词：档案位置 -> 命中的参数下标（关键词本身或任一同义词）
+        per_keyword: List[Dict[int, set]] = []
+        for keyword in keywords:
+            hits: Dict[int, set] = {}
+            for term in [keyword] + self.synonyms(keyword):
+                for pos, idxs in self.postings(term).items():
+                    hits.setdefault(pos, set()).update(idxs)
+            per_keyword.append(hits)
+
+        result: Dict[int, List[str]] = {}
+        for hits in per_keyword:
+            for pos, idxs in hits.items():
+                params = self._profiles[pos].params
+                names = result.setdefault(pos, [])
+                for param_idx in sorted(idxs):
+                    name = params[param_idx].name
+                    if name not in names:
+                        names.append(name)
+
+        with self._lock:
+            if generation == self._generation:
+                self._keyword_set_cache[cache_key] = result
+                if len(self._keyword_set_cache) > MAX_CACHED_KEYWORD_SETS:
+                    self._keyword_set_cache.popitem(last=False)
+        return result
+
+    def has_match(self, keywords: Sequence[str], profile: DeviceProfile) -> Optional[bool]:
+        """
+        档案中是否有参数与关键词匹配
+
+        Returns:
+            bool: 是否匹配；档案不在索引中时返回 None
+        """
+        pos = self._positions.get(id(profile))
+        if pos is None:
+            return None
+        return bool(self.match_keywords(keywords).get(pos))
+
+    def matched_params(self, keywords: Sequence[str], profile: DeviceProfile) -> Optional[List[str]]:
+        """
+        查询档案中与关键词匹配的参数名
+
+        Returns:
+            List[str]: 匹配的参数名；档案不在索引中时返回 None
+        """
+        pos = self._positions.get(id(profile))
+        if pos is None:
+            return None
+        return list(self.match_keywords(keywords).get(pos, []))
@@ -0,0 +1,102 @@
+"""
+匹配结果缓存
+
+报价清单中同一描述常常重复出现（如每层楼都有"温度传感器 量程-50~150℃"），
+修改后重新上传的清单也大多是相同的行。匹配结果缓存放在 IntelligentExtractionAPI.match 前面：
+- 缓存键：(输入文本, top_k, 配置版本, 设备库版本)
+- 配置版本为配置内容的指纹，保存配置后重建的 API 自然不再命中旧结果
+- 设备库版本在匹配器构建和每次增量更新时递增（进程内唯一），设备变化后旧结果自动失效
+- 进程级 LRU，线程安全，记录命中/未命中次数
+
+缓存键使用原始输入文本而不是归一化文本：参数、品牌、型号提取读取的是原始文本（大小写、空格、
+温度单位都会影响结果），归一化后相同的两段文本匹配结果未必相同。
+
+缓存中保存序列化后的结果，每次命中都返回独立的副本，调用方修改结果不会影响缓存。
+
+提取结果缓存（extraction_cache）复用同一实现，放在 extract/preview/match 的特征提取前面：
+- 缓存键：(输入文本, 配置版本)，与设备库无关，设备增量更新后仍然有效
+- 用户在界面上对同一文本依次预览、提取、匹配时，设备类型识别、参数/参数候选/辅助信息提取只执行一次
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional
+
+# 匹配结果缓存上限（每条结果包含至多 top_k 个候选设备及其参数）
+MAX_CACHED_MATCH_RESULTS = 1024
+
+# 提取结果缓存上限
+MAX_CACHED_EXTRACTIONS = 1024
+
+
+def config_fingerprint(config: Dict[str, Any]) -> str:
+    """配置内容的指纹（配置版本）"""
+    payload = json.dumps(config, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+class MatchResultCache:
+    """匹配结果 LRU 缓存（线程安全，记录命中/未命中次数）"""
+
+    def __init__(self, maxsize: int = MAX_CACHED_MATCH_RESULTS):
+        self.maxsize = maxsize
+        self._results: 'OrderedDict[Hashable, bytes]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Dict[str, Any]]:
+        """查询缓存，命中时返回结果副本，未命中返回 None"""
+        with self._lock:
+            payload = self._results.get(key)
+            if payload is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._results.move_to_end(key)
+        return pickle.loads(payload)
+
+    def put(self, key: Hashable, result: Dict[str, Any]):
+        """写入缓存"""
+        payload = pickle.dumps(result, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            self._results[key] = payload
+            self._results.move_to_end(key)
+            if len(self._results) > self.maxsize:
+                self._results.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计：命中次数、未命中次数、命中率、缓存条目数"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'size': len(self._results),
+                'maxsize': self.maxsize,
+            }
+
+    def clear(self):
+        """清空缓存和计数"""
+        with self._lock:
+            self._results.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def after_fork(self):
+        """fork 出的子进程中重建锁（fork 时其他线程可能正持有锁）"""
+        self._lock = threading.Lock()
+
+
+# 进程级的匹配结果缓存和提取结果缓存
+match_result_cache = MatchResultCache()
+extraction_cache = MatchResultCache(MAX_CACHED_EXTRACTIONS)
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=match_result_cache.after_fork)
+    os.register_at_fork(after_in_child=extraction_cache.after_fork)
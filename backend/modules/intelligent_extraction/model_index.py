@@ -0,0 +1,125 @@
+"""
+型号索引
+
+为设备的 spec_model 建立两类索引，随设备缓存一起构建：
+- 哈希索引：小写型号 -> 设备档案列表，用于型号精确匹配
+- 有序前缀索引：排序后的小写型号列表，用于型号系列查找（如 VBI61 -> VBI61.15、VBI61.20）
+
+设备增删时通过 add/remove 增量维护（写时复制，查询线程不受影响）。
+"""
+
+import bisect
+import logging
+from typing import Callable, Dict, List, Optional, Sequence
+
+from .device_profile import DeviceProfile
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_model(model: str) -> str:
+    """型号归一化（忽略大小写）"""
+    return model.lower()
+
+
+class ModelIndex:
+    """设备型号索引"""
+
+    def __init__(self, profiles: Sequence[DeviceProfile]):
+        """
+        构建型号索引
+
+        Args:
+            profiles: 设备匹配档案列表
+        """
+        self._by_model: Dict[str, List[DeviceProfile]] = {}
+        for profile in profiles:
+            if profile.spec_model:
+                self._by_model.setdefault(normalize_model(profile.spec_model), []).append(profile)
+
+        self._sorted_models: List[str] = sorted(self._by_model)
+        logger.info(f"型号索引构建完成: {len(self._sorted_models)} 个型号")
+
+    def add(self, profile: DeviceProfile, order: Optional[Callable[[DeviceProfile], int]] = None):
+        """
+        增量加入一个设备档案
+
+        Args:
+            profile: 设备匹配档案
+            order: 档案在设备库中的顺序键；不提供时追加到同型号设备末尾
+        """
+        if not profile.spec_model:
+            return
+        model = normalize_model(profile.spec_model)
+
+        existing = self._by_model.get(model)
+        profiles = list(existing) if existing else []
+        if order is None:
+            profiles.append(profile)
+        else:
+            bisect.insort(profiles, profile, key=order)
+        self._by_model[model] = profiles
+
+        if existing is None:
+            models = list(self._sorted_models)
+            bisect.insort(models, model)
+            self._sorted_models = models
+
+    def remove(self, profile: DeviceProfile) -> bool:
+        """
+        增量移除一个设备档案
+
+        Returns:
+            bool: 档案是否在索引中
+        """
+        if not profile.spec_model:
+            return False
+        model = normalize_model(profile.spec_model)
+
+        existing = self._by_model.get(model, [])
+        profiles = [p for p in existing if p is not profile]
+        if len(profiles) == len(existing):
+            return False
+
+        if profiles:
+            self._by_model[model] = profiles
+        else:
+            del self._by_model[model]
+            models = list(self._sorted_models)
+            del models[bisect.bisect_left(models, model)]
+            self._sorted_models = models
+        return True
+
+    def find_exact(self, model: str) -> List[DeviceProfile]:
+        """
+        型号精确查找（忽略大小写）
+
+        Returns:
+            List[DeviceProfile]: 型号相同的设备档案（保持设备库顺序）
+        """
+        if not model:
+            return []
+        return list(self._by_model.get(normalize_model(model), []))
+
+    def find_family(self, prefix: str) -> List[DeviceProfile]:
+        """
+        型号系列查找：型号以 prefix 开头，且前缀后紧跟分隔符（如 . - /）
+
+        VBI61 命中 VBI61.15、VBI61-20，但不命中 VBI610。
+
+        Returns:
+            List[DeviceProfile]: 同系列设备档案（按型号排序）
+        """
+        key = normalize_model(prefix) if prefix else ''
+        if not key:
+            return []
+
+        result = []
+        models = self._sorted_models
+        for i in range(bisect.bisect_left(models, key), len(models)):
+            model = models[i]
+            if not model.startswith(key):
+                break
+            if len(model) == len(key) or not model[len(key)].isalnum():
+                result.extend(self._by_model.get(model, ()))
+        return result
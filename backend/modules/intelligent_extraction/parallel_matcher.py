@@ -0,0 +1,179 @@
+"""
+多进程并行匹配
+
+把一批待匹配文本按块分发到进程池，用于 /api/match 的大批量设备行：
+- 子进程以 fork 方式创建，直接继承主进程中已构建好的匹配器和索引（只读副本），
+  不重新加载设备库，也不需要序列化匹配器
+- 进程池长期复用（应用启动时由 start_pool 预先创建，或首次并行匹配时创建），所有请求共用；
+  API 处理器、匹配器或设备库版本（catalog_version）变化后，下一次匹配时重新 fork，
+  旧进程池处理完已提交的块后退出
+- 各块结果按输入顺序拼回，每块由 api.match_batch_uncached 匹配（文本足够多时按设备类型分组），
+  每条结果与串行调用 api.match_uncached 完全相同
+- 子进程中记录的阶段耗时（modules/metrics.py）随每块结果取回，合并到主进程的指标中
+
+不支持 fork 的平台（如 Windows）、单进程配置或文本数量不足两块时使用串行匹配；
+进程池异常时丢弃进程池、记录警告并回退串行。
+"""
+
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# 默认每块文本数量
+DEFAULT_CHUNK_SIZE = 50
+
+# 子进程继承的 API 处理器
+_worker_api = None
+
+
+def fork_available() -> bool:
+    """当前平台是否支持以 fork 方式创建子进程"""
+    return 'fork' in multiprocessing.get_all_start_methods()
+
+
+def _init_worker(api):
+    """子进程初始化：保存继承的 API 处理器，重建 fork 时可能被其他线程持有的锁，并清空继承的指标"""
+    global _worker_api
+    _worker_api = api
+    api.matcher.after_fork()
+    metrics.reset()
+
+
+def _match_chunk(texts: List[str], top_k: int) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """子进程中匹配一块文本，同时取回这块匹配期间记录的指标"""
+    return _worker_api.match_batch_uncached(texts, top_k), metrics.drain()
+
+
+def _worker_ready() -> bool:
+    """空任务：用于触发子进程创建"""
+    return True
+
+
+class MatchWorkerPool:
+    """
+    长期复用的 fork 进程池（线程安全）
+    
+    进程池绑定创建时的 API 处理器、匹配器和设备库版本，任一变化或进程数变化时重新创建。
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._owner: Optional[tuple] = None  # (API 处理器, 匹配器, 设备库版本, 进程数)
+    
+    def _is_current(self, api, workers: int) -> bool:
+        """进程池是否由当前的 API 处理器、匹配器和设备库版本创建"""
+        if self._pool is None:
+            return False
+        owner_api, owner_matcher, catalog_version, owner_workers = self._owner
+        return (owner_api is api and owner_matcher is api.matcher
+                and catalog_version == api.matcher.catalog_version and owner_workers == workers)
+    
+    def _current(self, api, workers: int) -> ProcessPoolExecutor:
+        """当前可用的进程池，不存在或已过期时重新创建（调用方加锁）"""
+        if self._is_current(api, workers):
+            return self._pool
+        
+        if self._pool is not None:
+            # 已提交的块继续在旧进程池中完成
+            self._pool.shutdown(wait=False)
+        context = multiprocessing.get_context('fork')
+        # fork 方式下 initargs 随进程复制继承，API 处理器不会被序列化
+        self._pool = ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                                         initializer=_init_worker, initargs=(api,))
+        self._owner = (api, api.matcher, api.matcher.catalog_version, workers)
+        logger.info(f"并行匹配进程池已创建: {workers} 个进程, 设备库版本 {api.matcher.catalog_version}")
+        return self._pool
+    
+    def start(self, api, workers: int):
+        """预先创建进程池（fork 方式下进程池在首次提交任务时创建全部子进程）"""
+        with self._lock:
+            future = self._current(api, workers).submit(_worker_ready)
+        future.result()
+    
+    def map_chunks(self, api, chunks: List[List[str]], top_k: int, workers: int) -> List[List[Dict[str, Any]]]:
+        """在进程池中匹配各块文本，按块顺序返回结果，并合并子进程记录的指标"""
+        with self._lock:
+            pool = self._current(api, workers)
+            # 在锁内提交，避免其他线程替换进程池后提交到已关闭的进程池
+            futures = [pool.submit(_match_chunk, chunk, top_k) for chunk in chunks]
+        
+        try:
+            chunk_results = []
+            for future in futures:
+                results, worker_metrics = future.result()
+                metrics.merge(worker_metrics)
+                chunk_results.append(results)
+            return chunk_results
+        except BrokenProcessPool:
+            # 子进程异常退出后进程池不可再用
+            self.discard(pool)
+            raise
+    
+    def discard(self, pool: Optional[ProcessPoolExecutor] = None):
+        """关闭进程池（指定 pool 时只在它仍是当前进程池时关闭），下次匹配时重新创建"""
+        with self._lock:
+            if self._pool is None or (pool is not None and pool is not self._pool):
+                return
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+            self._owner = None
+
+
+# 所有请求共用的进程池
+_shared_pool = MatchWorkerPool()
+
+
+def start_pool(api, workers: int):
+    """应用启动时预先创建进程池（在服务线程启动前 fork）；不支持 fork 或单进程配置时不创建"""
+    if workers > 1 and fork_available():
+        _shared_pool.start(api, workers)
+
+
+def shutdown_pool():
+    """关闭共用的进程池"""
+    _shared_pool.discard()
+
+
+def match_texts(api, texts: List[str], top_k: int = 5, workers: int = 0,
+                chunk_size: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    批量匹配文本（可并行）
+
+    Args:
+        api: 智能提取API处理器
+        texts: 待匹配文本列表
+        top_k: 每条文本返回的候选数量
+        workers: 子进程数量，0 或 1 表示串行
+        chunk_size: 每块文本数量
+
+    Returns:
+        List[Dict]: 与 texts 一一对应的 api.match_uncached 返回结果
+    """
+    chunk_size = max(1, chunk_size or DEFAULT_CHUNK_SIZE)
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+
+    if workers > 1 and len(chunks) > 1 and fork_available():
+        try:
+            return _match_chunks_parallel(api, chunks, top_k, workers)
+        except Exception as e:
+            logger.warning(f"并行匹配失败，回退串行匹配: {e}")
+
+    return api.match_batch_uncached(texts, top_k)
+
+
+def _match_chunks_parallel(api, chunks: List[List[str]], top_k: int, workers: int) -> List[Dict[str, Any]]:
+    """在共用的 fork 进程池中匹配各块文本，按块顺序拼回结果"""
+    results = []
+    for chunk_results in _shared_pool.map_chunks(api, chunks, top_k, workers):
+        results.extend(chunk_results)
+
+    logger.info(f"并行匹配完成: {sum(len(chunk) for chunk in chunks)} 条, {len(chunks)} 块, {workers} 个进程")
+    return results
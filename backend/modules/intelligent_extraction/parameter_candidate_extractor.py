@@ -2,11 +2,14 @@
 参数候选提取器
 
 使用正则表达式和关键词匹配提取所有可能的参数候选
+
+正则模式在初始化时反转义并编译一次；介质和品牌关键词由一个多模式匹配自动机扫描一遍文本找出。
 """
 
 import re
 import logging
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Pattern, Tuple
+from .aho_corasick import AhoCorasick
 from .data_models import ParameterCandidate
 
 logger = logging.getLogger(__name__)
@@ -79,14 +82,51 @@ class ParameterCandidateExtractor:
         # 从配置中读取品牌关键词
         self.brand_keywords = config.get('brand_keywords', [])
         
-        print(f"[DEBUG] 参数候选提取器初始化:")
-        print(f"  - patterns 类型: {type(self.patterns)}")
-        print(f"  - patterns 长度: {len(self.patterns)}")
-        if self.patterns:
-            print(f"  - 第一个模式: {self.patterns[0].get('id')} - {self.patterns[0].get('pattern')[:30]}...")
+        # 预处理：启用的正则模式反转义后编译一次，关键词构建多模式匹配自动机
+        self._compiled_patterns = self._compile_patterns(self.patterns)
+        self._medium_keywords = [k for k in dict.fromkeys(self.medium_keywords) if isinstance(k, str) and k]
+        self._brand_keywords = [k for k in dict.fromkeys(self.brand_keywords) if isinstance(k, str) and k]
+        self._keyword_automaton = AhoCorasick(self._medium_keywords + self._brand_keywords)
+        
+        if logger.isEnabledFor(logging.DEBUG) and self.patterns:
+            logger.debug(f"第一个模式: {self.patterns[0].get('id')} - {str(self.patterns[0].get('pattern'))[:30]}...")
         
         logger.info(f"参数候选提取器初始化完成: {len(self.patterns)}个正则模式, {len(self.medium_keywords)}个介质关键词, {len(self.brand_keywords)}个品牌关键词")
     
+    @staticmethod
+    def _normalize_pattern(pattern: Any) -> str:
+        """处理双重转义的正则表达式（配置中保存的模式可能被多转义了一次）"""
+        if not isinstance(pattern, str):
+            return str(pattern)
+        
+        pattern_str = pattern
+        # 检测双重转义：如果包含 \\d, \\s, \\w 等，说明需要反转义
+        # 但要注意保护中文字符，只反转义常见的正则转义序列
+        if '\\\\' in repr(pattern_str) or ('\\d' not in pattern_str and '\\\\d' in repr(pattern_str)):
+            for char in 'dsw.+*?()[]{}|^$':
+                pattern_str = pattern_str.replace('\\\\' + char, '\\' + char)
+        return pattern_str
+    
+    @classmethod
+    def _compile_patterns(cls, patterns: List[Dict[str, Any]]) -> List[Tuple[Pattern, str, Dict[str, Any]]]:
+        """编译启用的正则模式：[(编译后的正则, 反转义后的模式串, 模式配置)]，配置错误的模式跳过"""
+        compiled = []
+        for pattern_config in patterns:
+            if not pattern_config.get('enabled', True):
+                continue
+            
+            pattern = pattern_config.get('pattern')
+            if pattern is None or 'id' not in pattern_config:
+                logger.warning(f"参数模式配置不完整，已跳过: {pattern_config}")
+                continue
+            
+            pattern_str = cls._normalize_pattern(pattern)
+            try:
+                compiled.append((re.compile(pattern_str, re.IGNORECASE), pattern_str, pattern_config))
+            except re.error as e:
+                logger.warning(f"正则表达式错误 [{pattern}]: {e}")
+        return compiled
+    
     def extract_all_candidates(self, text: str) -> List[ParameterCandidate]:
         """
         提取所有可能的参数候选
@@ -97,100 +137,58 @@ class ParameterCandidateExtractor:
         Returns:
             参数候选列表
         """
-        print(f"[DEBUG] extract_all_candidates 被调用，文本长度: {len(text)}")
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug(f"extract_all_candidates 被调用，文本长度: {len(text)}")
         candidates = []
         
-        # 1. 使用正则表达式提取格式化参数
-        for pattern_config in self.patterns:
-            if not pattern_config.get('enabled', True):
-                continue
+        # 1. 使用正则表达式提取格式化参数（各模式独立匹配，同一段文本可以同时是量程和输出信号候选）
+        for compiled, pattern_str, pattern_config in self._compiled_patterns:
+            matches = list(compiled.finditer(text))
+            if debug:
+                logger.debug(f"模式 [{pattern_config['id']}] {pattern_str}: 找到 {len(matches)} 个匹配")
             
-            pattern = pattern_config['pattern']
-            try:
-                # 处理双重转义的正则表达式
-                if isinstance(pattern, str):
-                    pattern_str = pattern
-                    # 检测双重转义：如果包含 \\d, \\s, \\w 等，说明需要反转义
-                    # 但要注意保护中文字符
-                    if '\\\\' in repr(pattern_str) or ('\\d' not in pattern_str and '\\\\d' in repr(pattern_str)):
-                        try:
-                            # 使用更安全的反转义方法
-                            # 只反转义常见的正则转义序列
-                            pattern_str = pattern_str.replace('\\\\d', '\\d')
-                            pattern_str = pattern_str.replace('\\\\s', '\\s')
-                            pattern_str = pattern_str.replace('\\\\w', '\\w')
-                            pattern_str = pattern_str.replace('\\\\.', '\\.')
-                            pattern_str = pattern_str.replace('\\\\+', '\\+')
-                            pattern_str = pattern_str.replace('\\\\*', '\\*')
-                            pattern_str = pattern_str.replace('\\\\?', '\\?')
-                            pattern_str = pattern_str.replace('\\\\(', '\\(')
-                            pattern_str = pattern_str.replace('\\\\)', '\\)')
-                            pattern_str = pattern_str.replace('\\\\[', '\\[')
-                            pattern_str = pattern_str.replace('\\\\]', '\\]')
-                            pattern_str = pattern_str.replace('\\\\{', '\\{')
-                            pattern_str = pattern_str.replace('\\\\}', '\\}')
-                            pattern_str = pattern_str.replace('\\\\|', '\\|')
-                            pattern_str = pattern_str.replace('\\\\^', '\\^')
-                            pattern_str = pattern_str.replace('\\\\$', '\\$')
-                        except:
-                            pass
-                else:
-                    pattern_str = str(pattern)
-                
-                print(f"[DEBUG] 尝试匹配模式 [{pattern_config['id']}]: {pattern_str}")
-                matches = list(re.finditer(pattern_str, text, re.IGNORECASE))
-                print(f"[DEBUG] 找到 {len(matches)} 个匹配")
-                
-                for match in matches:
-                    # 优先使用分组1的值（如果存在），否则使用完整匹配
-                    value = match.group(1).strip() if match.lastindex and match.lastindex >= 1 else match.group(0).strip()
-                    candidate = ParameterCandidate(
-                        value=value,
-                        param_type=pattern_config['id'],
-                        position=match.start(),
-                        confidence=0.9,
-                        pattern=pattern_str,
-                        description=pattern_config.get('description', '')
-                    )
-                    candidates.append(candidate)
-            except re.error as e:
-                logger.warning(f"正则表达式错误 [{pattern}]: {e}")
-        
-        # 2. 提取介质关键词
-        for keyword in self.medium_keywords:
-            if keyword in text:
-                # 查找所有出现的位置
-                start = 0
-                while True:
-                    pos = text.find(keyword, start)
-                    if pos == -1:
-                        break
-                    
-                    candidate = ParameterCandidate(
-                        value=keyword,
-                        param_type='medium',
-                        position=pos,
-                        confidence=0.95,
-                        pattern='keyword',
-                        description='介质关键词'
-                    )
-                    candidates.append(candidate)
-                    start = pos + len(keyword)
-        
-        # 3. 提取品牌关键词
-        for keyword in self.brand_keywords:
-            if keyword in text:
-                pos = text.find(keyword)
-                if pos != -1:
-                    candidate = ParameterCandidate(
-                        value=keyword,
-                        param_type='brand',
-                        position=pos,
-                        confidence=0.95,
-                        pattern='keyword',
-                        description='品牌关键词'
-                    )
-                    candidates.append(candidate)
+            for match in matches:
+                # 优先使用分组1的值（如果存在），否则使用完整匹配
+                value = match.group(1).strip() if match.lastindex and match.lastindex >= 1 else match.group(0).strip()
+                candidate = ParameterCandidate(
+                    value=value,
+                    param_type=pattern_config['id'],
+                    position=match.start(),
+                    confidence=0.9,
+                    pattern=pattern_str,
+                    description=pattern_config.get('description', '')
+                )
+                candidates.append(candidate)
+        
+        # 2/3. 介质和品牌关键词：扫描一遍文本找出每个关键词第一次出现的位置
+        # （同一关键词的后续出现在去重时会被移除，只需第一次出现）
+        first_positions = {}
+        if self._keyword_automaton.patterns:
+            for end, keyword in self._keyword_automaton.iter_matches(text):
+                first_positions.setdefault(keyword, end - len(keyword))
+        
+        for keyword in self._medium_keywords:
+            if keyword in first_positions:
+                candidates.append(ParameterCandidate(
+                    value=keyword,
+                    param_type='medium',
+                    position=first_positions[keyword],
+                    confidence=0.95,
+                    pattern='keyword',
+                    description='介质关键词'
+                ))
+        
+        for keyword in self._brand_keywords:
+            if keyword in first_positions:
+                candidates.append(ParameterCandidate(
+                    value=keyword,
+                    param_type='brand',
+                    position=first_positions[keyword],
+                    confidence=0.95,
+                    pattern='keyword',
+                    description='品牌关键词'
+                ))
         
         # 去重
         candidates = self._deduplicate_candidates(candidates)
@@ -198,7 +196,8 @@ class ParameterCandidateExtractor:
         # 按位置排序
         candidates.sort(key=lambda x: x.position)
         
-        logger.info(f"提取到 {len(candidates)} 个参数候选")
+        if debug:
+            logger.debug(f"提取到 {len(candidates)} 个参数候选")
         return candidates
     
     def _deduplicate_candidates(self, candidates: List[ParameterCandidate]) -> List[ParameterCandidate]:
@@ -2,6 +2,7 @@ import re
 import logging
 from typing import Dict, List, Optional, Any
 from .data_models import ParameterInfo, RangeParam, OutputParam, AccuracyParam
+from modules.metrics import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -13,6 +14,7 @@ class ParameterExtractor:
         self.accuracy_config = config.get('accuracy', {})
         self.specs_config = config.get('specs', {})
     
+    @metrics.timed('parameter_extraction')
     def extract(self, text):
         """提取技术参数"""
         return ParameterInfo(
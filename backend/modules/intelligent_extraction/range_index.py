@@ -0,0 +1,258 @@
+"""
+数字范围区间索引
+
+匹配器建立索引时把设备参数中的数字范围预先解析成区间，查询时不再对设备值跑正则：
+带数字范围的参数 (设备, 参数) -> [min, max]，按 (设备类型, 单位) 分组，每组一棵区间树。
+单位为空的一组保存原始数字范围（与原有规则一致，不区分单位）；开启按单位比较（unit_aware）时，
+单位已注册的参数另按规范单位分组（包括只有规范单位范围的单个通径值，如 DN25）：
+参数候选与设备参数规范单位相同时按换算后的范围判断重叠，否则仍只比较数字。
+
+用于参数候选的范围重叠匹配：逐设备评分时每个请求按设备类型只查询一次、之后逐设备查表，
+列式评分时查询全部设备类型。参数只占总分的一部分，不能按范围预先排除设备。
+
+区间按起点排序，并用"最大终点"线段树剪枝，重叠查询复杂度 O(log n + k)。
+设备增删时不重建静态区间树：新增区间暂存在待合并列表中线性扫描，移除的设备位置
+在查询结果中过滤，累积到一定数量后再整体重建。
+"""
+
+import bisect
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from modules.lru_cache import LRUCache
+from .device_profile import DeviceProfile
+from .units import CanonicalRange
+
+logger = logging.getLogger(__name__)
+
+# 参数值区间重叠查询结果缓存上限
+MAX_CACHED_RANGE_QUERIES = 1024
+
+# 增量更新累积到该数量（新增区间 + 移除设备）后重建静态区间树
+MAX_PENDING_RANGE_UPDATES = 256
+
+
+class IntervalIndex:
+    """静态区间索引（按起点排序 + 最大终点线段树）"""
+
+    def __init__(self, intervals: Iterable[Tuple[float, float, Any]]):
+        """
+        Args:
+            intervals: (下限, 上限, 条目) 列表
+        """
+        entries = sorted(intervals, key=lambda entry: entry[0])
+        self._starts = [entry[0] for entry in entries]
+        self._items = [entry[2] for entry in entries]
+
+        # 隐式完全二叉树：叶子从 _size 开始，内部节点保存子树的最大终点
+        size = 1
+        while size < len(entries):
+            size *= 2
+        self._size = size
+        tree = [float('-inf')] * (2 * size)
+        for i, entry in enumerate(entries):
+            tree[size + i] = entry[1]
+        for node in range(size - 1, 0, -1):
+            tree[node] = max(tree[2 * node], tree[2 * node + 1])
+        self._max_end = tree
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def overlapping(self, low: float, high: float) -> List[Any]:
+        """
+        查询与 [low, high] 重叠的条目（起点 <= high 且终点 >= low）
+
+        Returns:
+            List[Any]: 条目列表（按区间起点排序）
+        """
+        # 起点 <= high 的条目是一个前缀，只在前缀内查找终点 >= low 的条目
+        limit = bisect.bisect_right(self._starts, high)
+        if limit == 0:
+            return []
+
+        result = []
+        tree = self._max_end
+        stack = [(1, 0, self._size)]
+        while stack:
+            node, left, right = stack.pop()
+            if left >= limit or tree[node] < low:
+                continue
+            if right - left == 1:
+                result.append(self._items[left])
+                continue
+            mid = (left + right) // 2
+            stack.append((2 * node + 1, mid, right))
+            stack.append((2 * node, left, mid))
+        return result
+
+
+class RangeIndex:
+    """设备参数数字范围索引（按设备类型和单位分组）"""
+
+    def __init__(self, profiles: Sequence[DeviceProfile], unit_aware: bool = False):
+        """
+        构建区间索引
+
+        Args:
+            profiles: 设备匹配档案列表
+            unit_aware: 是否按规范单位分组建立区间索引
+        """
+        self.unit_aware = unit_aware
+        # 档案列表只追加不删除：移除的档案从位置映射中删除，位置不复用
+        self._profiles = list(profiles)
+        self._positions = {id(profile): pos for pos, profile in enumerate(self._profiles)}
+        # (数字范围, 规范单位范围, 设备类型) -> 查询结果；设备增删时整体替换（查询中途的线程仍写入旧缓存，不会留下过期结果）
+        self._query_cache = LRUCache(MAX_CACHED_RANGE_QUERIES)
+        self._lock = threading.Lock()
+
+        self._rebuild()
+        logger.info(f"数字范围索引构建完成: {len(self._indexes)} 组, "
+                    f"{sum(len(index) for index in self._indexes.values())} 个参数区间")
+
+    def _rebuild(self):
+        """由当前档案重建静态区间树，并清空待合并的增量更新"""
+        intervals: Dict[Tuple[str, str], List] = {}
+        for pos, profile in enumerate(self._profiles):
+            if self._positions.get(id(profile)) != pos:
+                continue  # 已移除
+            self._collect_intervals(pos, profile, intervals)
+
+        # (设备类型, 单位) -> 区间树；单位为空表示原始数字范围
+        self._indexes = {key: IntervalIndex(group) for key, group in intervals.items()}
+        self._pending: Dict[Tuple[str, str], List[Tuple[float, float, Tuple[int, int]]]] = {}
+        self._pending_count = 0
+        self._device_types = frozenset(device_type for device_type, _ in intervals)
+        self._removed: frozenset = frozenset()
+
+    def _collect_intervals(self, pos: int, profile: DeviceProfile, intervals: Dict[Tuple[str, str], List]) -> int:
+        """收集一个档案的参数区间（按设备类型和单位分组），返回收集的区间数量"""
+        count = 0
+        device_type = profile.device_type
+        for param_idx, param in enumerate(profile.params):
+            if param.value_range:
+                low, high = param.value_range
+                intervals.setdefault((device_type, ''), []).append((low, high, (pos, param_idx)))
+                count += 1
+            canonical = param.value_canonical
+            if self.unit_aware and canonical is not None:
+                intervals.setdefault((device_type, canonical.unit), []).append(
+                    (canonical.low, canonical.high, (pos, param_idx))
+                )
+                count += 1
+        return count
+
+    def add(self, profile: DeviceProfile):
+        """增量加入一个设备档案"""
+        with self._lock:
+            pos = len(self._profiles)
+            self._profiles.append(profile)
+            self._positions[id(profile)] = pos
+
+            # 写时复制：查询线程始终看到完整的一份待合并列表
+            pending = {key: list(group) for key, group in self._pending.items()}
+            count = self._collect_intervals(pos, profile, pending)
+            if count:
+                self._pending = pending
+                self._pending_count += count
+                self._device_types = self._device_types | {profile.device_type}
+            self._after_update()
+
+    def remove(self, profile: DeviceProfile) -> bool:
+        """
+        增量移除一个设备档案
+
+        Returns:
+            bool: 档案是否在索引中
+        """
+        with self._lock:
+            pos = self._positions.pop(id(profile), None)
+            if pos is None:
+                return False
+            self._removed = self._removed | {pos}
+            self._after_update()
+            return True
+
+    def _after_update(self):
+        """清空查询缓存，增量更新过多时重建静态区间树"""
+        if self._pending_count + len(self._removed) > MAX_PENDING_RANGE_UPDATES:
+            self._rebuild()
+        self._query_cache = LRUCache(MAX_CACHED_RANGE_QUERIES)
+
+    def after_fork(self):
+        """fork 出的子进程中重建锁（fork 时其他线程可能正持有锁）"""
+        self._lock = threading.Lock()
+        self._query_cache = LRUCache(MAX_CACHED_RANGE_QUERIES)
+
+    def position(self, profile: DeviceProfile) -> Optional[int]:
+        """档案在索引中的位置；不在索引中时返回 None"""
+        return self._positions.get(id(profile))
+
+    def overlapping_params(self, value_range: Tuple[float, float],
+                           canonical: Optional[CanonicalRange] = None,
+                           device_type: Optional[str] = None) -> Dict[int, frozenset]:
+        """
+        查询与给定范围重叠的设备参数
+
+        Args:
+            value_range: (下限, 上限)；空元组表示只按规范单位范围查询
+            canonical: 规范单位下的范围；开启按单位比较时，与之规范单位相同的参数按换算后的范围判断
+            device_type: 只查询该类型的设备；None 表示全部设备类型
+
+        Returns:
+            Dict[int, frozenset]: 档案位置 -> 区间重叠的参数下标
+        """
+        if not self.unit_aware:
+            canonical = None
+        key = (value_range, canonical, device_type)
+        # 先取出缓存对象：设备增删后写入的是已被替换的旧缓存
+        query_cache = self._query_cache
+        cached = query_cache.get(key)
+        if cached is not None:
+            return cached
+
+        # 先取出一份状态：查询过程中增量更新替换的是新对象
+        profiles = self._profiles
+        indexes = self._indexes
+        pending = self._pending
+        removed = self._removed
+        device_types = self._device_types if device_type is None else (device_type,)
+        unit = canonical.unit if canonical is not None else None
+
+        hits = []
+        for group_type in device_types:
+            if value_range:
+                value_hits = self._overlapping(indexes, pending, (group_type, ''), value_range)
+                if unit is not None:
+                    # 规范单位相同的参数不按数字判断，改由规范单位区间索引判断
+                    value_hits = [hit for hit in value_hits if not self._same_unit(profiles, hit, canonical)]
+                hits.extend(value_hits)
+            if unit is not None:
+                hits.extend(self._overlapping(indexes, pending, (group_type, unit), (canonical.low, canonical.high)))
+
+        by_position: Dict[int, set] = {}
+        for pos, param_idx in hits:
+            if pos not in removed:
+                by_position.setdefault(pos, set()).add(param_idx)
+        result = {pos: frozenset(idxs) for pos, idxs in by_position.items()}
+
+        query_cache.put(key, result)
+        return result
+
+    @staticmethod
+    def _overlapping(indexes: Dict, pending: Dict, key: Tuple[str, str],
+                     value_range: Tuple[float, float]) -> List[Tuple[int, int]]:
+        """一组区间（静态区间树 + 待合并区间）中与给定范围重叠的条目"""
+        low, high = value_range
+        index = indexes.get(key)
+        hits = index.overlapping(low, high) if index is not None else []
+        hits.extend(item for start, end, item in pending.get(key, ()) if end >= low and start <= high)
+        return hits
+
+    @staticmethod
+    def _same_unit(profiles: List[DeviceProfile], hit: Tuple[int, int], canonical: CanonicalRange) -> bool:
+        """设备参数与给定范围是否为同一规范单位"""
+        pos, param_idx = hit
+        param_canonical = profiles[pos].params[param_idx].value_canonical
+        return param_canonical is not None and canonical.comparable(param_canonical)
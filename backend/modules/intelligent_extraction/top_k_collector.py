@@ -0,0 +1,50 @@
+"""
+有界 Top-K 收集器
+
+匹配阶段只需要得分最高的前 k 个设备，不必为每个合格设备都构建
+CandidateDevice 再整体排序。收集器用最小堆只保留 k 个轻量元组，
+排序规则与原有排序完全一致：
+    总分降序 → 匹配参数数量降序 → 价格升序 → 输入顺序（稳定排序）
+"""
+
+import heapq
+from typing import Any, List, Tuple
+
+
+class TopKCollector:
+    """有界 Top-K 收集器"""
+
+    def __init__(self, k: int):
+        """
+        Args:
+            k: 保留的最大数量
+        """
+        self.k = k
+        self._heap: List[Tuple[Tuple, Any]] = []
+        self._seq = 0
+
+    def push(self, score: float, matched_count: int, price: float, item: Any):
+        """
+        加入一个候选
+
+        Args:
+            score: 总分
+            matched_count: 匹配参数数量
+            price: 价格
+            item: 候选的轻量数据
+        """
+        # 排序键越大越好；序号取负，保证同分时先加入者优先（等价于稳定排序）
+        key = (score, matched_count, -price, -self._seq)
+        self._seq += 1
+
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, (key, item))
+        elif self._heap and key > self._heap[0][0]:
+            heapq.heapreplace(self._heap, (key, item))
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def results(self) -> List[Any]:
+        """按排序规则返回保留的候选（最优在前）"""
+        return [item for _, item in sorted(self._heap, key=lambda entry: entry[0], reverse=True)]
@@ -0,0 +1,140 @@
+"""
+单位注册表
+
+把提取结果和设备参数中的数字范围统一换算到规范单位（只换算一次），之后的比较都是浮点数比较：
+- 同一物理量的不同写法/量级换算到同一个规范单位，如 kPa、MPa、bar -> Pa，mA、A -> mA
+- 电压输出 0-10V、2-10VDC 都归为 voltage，电流输出 4-20mA 归为 current
+- 通径 DN 与毫米等价（DN25 与 25mm 都是 25mm）；通径常写单个值，DN25、25mm 按 [25, 25] 处理
+
+注册表中没有的单位保留小写写法、不归属任何物理量：只有写法相同才视为同一单位，
+不同物理量之间不换算。
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class UnitSpec:
+    """单位定义：规范值 = 原值 * factor + offset"""
+    quantity: str                 # 物理量：pressure、temperature、current、voltage 等
+    canonical: str                # 规范单位
+    factor: float = 1.0
+    offset: float = 0.0
+
+
+@dataclass(frozen=True)
+class CanonicalRange:
+    """换算到规范单位的数字范围"""
+    quantity: str                 # 物理量；未注册的单位为空
+    unit: str                     # 规范单位（小写）
+    low: float
+    high: float
+
+    def comparable(self, other: 'CanonicalRange') -> bool:
+        """两个范围是否为同一物理量、可以直接比较数值"""
+        return bool(self.quantity) and self.quantity == other.quantity and self.unit == other.unit
+
+    def overlaps(self, other: 'CanonicalRange') -> bool:
+        """两个范围是否有交集（不检查单位）"""
+        return self.high >= other.low and self.low <= other.high
+
+
+def _units(quantity: str, canonical: str, **aliases: Tuple[float, ...]) -> Dict[str, UnitSpec]:
+    """构建同一物理量的一组单位"""
+    return {alias: UnitSpec(quantity, canonical, *scale) for alias, scale in aliases.items()}
+
+
+# 单位写法（小写）-> 单位定义
+UNIT_REGISTRY: Dict[str, UnitSpec] = {}
+UNIT_REGISTRY.update(_units('pressure', 'pa', pa=(1.0,), kpa=(1e3,), mpa=(1e6,), hpa=(1e2,),
+                            bar=(1e5,), mbar=(1e2,), psi=(6894.757,)))
+UNIT_REGISTRY.update(_units('current', 'ma', ma=(1.0,), a=(1e3,), ua=(1e-3,), μa=(1e-3,)))
+UNIT_REGISTRY.update(_units('voltage', 'v', v=(1.0,), vdc=(1.0,), vac=(1.0,), mv=(1e-3,), kv=(1e3,)))
+UNIT_REGISTRY.update(_units('length', 'mm', mm=(1.0,), dn=(1.0,), cm=(10.0,), m=(1e3,)))
+UNIT_REGISTRY.update(_units('concentration', 'ppm', ppm=(1.0,), ppb=(1e-3,)))
+UNIT_REGISTRY.update(_units('flow', 'm³/h', **{'m³/h': (1.0,), 'm3/h': (1.0,), 'l/h': (1e-3,),
+                                               'l/min': (0.06,), 'l/s': (3.6,)}))
+UNIT_REGISTRY.update(_units('power', 'w', w=(1.0,), kw=(1e3,)))
+UNIT_REGISTRY.update(_units('frequency', 'hz', hz=(1.0,), khz=(1e3,)))
+UNIT_REGISTRY.update(_units('illuminance', 'lx', lx=(1.0,), lux=(1.0,)))
+UNIT_REGISTRY.update(_units('humidity', '%rh', **{'%rh': (1.0,)}))
+UNIT_REGISTRY.update(_units('ratio', '%', **{'%': (1.0,)}))
+UNIT_REGISTRY.update(_units('temperature', '℃', **{'℃': (1.0,), '°c': (1.0,), '°': (1.0,),
+                                                 '℉': (5 / 9, -160 / 9), '°f': (5 / 9, -160 / 9)}))
+
+# 数字范围及单位（小写文本），如 0-250ppm、4~20ma、-40~80℃
+RANGE_PATTERN = re.compile(r'(-?\d+(?:\.\d+)?)\s*[-~到]\s*(-?\d+(?:\.\d+)?)\s*([a-z%℃℉°/μ³²\d.]*)')
+
+# 通径（小写文本）：dn25、dn15-dn50、dn15~50
+DN_PATTERN = re.compile(r'dn\s*(\d+(?:\.\d+)?)(?:\s*[-~到]\s*(?:dn)?\s*(\d+(?:\.\d+)?))?')
+
+# 单个毫米值（小写文本），如 25mm；不匹配范围的一端和 mm²、mm/s 等复合单位
+LENGTH_VALUE_PATTERN = re.compile(r'(?<![\d.~-])(\d+(?:\.\d+)?)\s*mm(?![a-z²³/\d])')
+
+
+def lookup_unit(unit: str) -> Optional[UnitSpec]:
+    """查找单位定义（不区分大小写）；未注册时返回 None"""
+    return UNIT_REGISTRY.get(unit.strip().lower())
+
+
+def canonical_range(low: float, high: float, unit: str) -> CanonicalRange:
+    """
+    把数字范围换算到规范单位
+
+    Args:
+        low: 下限
+        high: 上限
+        unit: 单位（任意写法，如 kPa、VDC、DN）
+
+    Returns:
+        CanonicalRange: 规范单位下的范围；未注册的单位原样保留（小写）
+    """
+    spec = lookup_unit(unit)
+    if spec is None:
+        return CanonicalRange('', unit.strip().lower(), float(low), float(high))
+    return CanonicalRange(
+        spec.quantity,
+        spec.canonical,
+        float(low) * spec.factor + spec.offset,
+        float(high) * spec.factor + spec.offset
+    )
+
+
+def parse_range(value_normalized: str) -> Optional[Tuple[float, float, str]]:
+    """
+    解析小写文本中的第一个数字范围
+
+    Returns:
+        (下限, 上限, 原单位)；没有数字范围时返回 None
+    """
+    match = RANGE_PATTERN.search(value_normalized)
+    if match is None:
+        return None
+    return float(match.group(1)), float(match.group(2)), match.group(3)
+
+
+def parse_canonical(value_normalized: str) -> Optional[CanonicalRange]:
+    """
+    解析小写文本中的数字范围并换算到规范单位
+
+    依次尝试通径（dn25、dn15-50）、带单位的数字范围、单个毫米值（25mm）。
+
+    Returns:
+        CanonicalRange: 规范单位下的范围；没有可识别的范围或单位未注册时返回 None
+    """
+    match = DN_PATTERN.search(value_normalized)
+    if match is not None:
+        return canonical_range(float(match.group(1)), float(match.group(2) or match.group(1)), 'dn')
+
+    parsed = parse_range(value_normalized)
+    if parsed is not None:
+        canonical = canonical_range(*parsed)
+        if canonical.quantity:
+            return canonical
+
+    match = LENGTH_VALUE_PATTERN.search(value_normalized)
+    if match is not None:
+        return canonical_range(float(match.group(1)), float(match.group(1)), 'mm')
+    return None
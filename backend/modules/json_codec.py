@@ -0,0 +1,69 @@
+"""
+JSON 编码模块
+匹配/预览/提取接口的响应一次性编码为 UTF-8 字节，不再经过 jsonify 的标准库编码器
+
+- 安装了 orjson 时使用 orjson（C 实现，比标准库快一个数量级），否则回退到标准库 json
+- 两种实现对相同的类型做相同的转换：
+  - dataclass 有 to_dict 时调用 to_dict（与现有响应格式相同，该层不是 dataclass 原生编码），
+    否则按字段逐个编码
+  - datetime/date 输出 ISO 格式，Decimal/UUID 输出字符串，set/tuple 输出数组
+  - numpy 数组和标量输出为列表/Python 数值
+- 两种实现的字节不保证一致（除 NaN/Infinity 外解析后的数据相同）：
+  - 浮点数指数格式不同，如 1e-07 编码为 1e-7（orjson）/ 1e-07（标准库），1e20 编码为 1e20 / 1e+20
+  - NaN/Infinity 在 orjson 下输出 null，标准库输出 NaN/Infinity（不是合法 JSON）
+- 与 jsonify 相比不再按键排序，也不转义非 ASCII 字符（直接输出 UTF-8）
+- orjson 列在 requirements.txt 中，未安装时仍可使用标准库回退
+"""
+
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import date, datetime
+from typing import Any
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - 取决于运行环境
+    orjson = None
+
+# dataclass 和 datetime 交给 _default 处理，保证两种实现做相同的转换
+_ORJSON_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_PASSTHROUGH_DATETIME
+) if orjson else 0
+
+
+def is_fast_path_available() -> bool:
+    """是否使用 orjson 编码"""
+    return orjson is not None
+
+
+def _default(obj: Any) -> Any:
+    """编码器不能直接处理的类型"""
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        to_dict = getattr(obj, 'to_dict', None)
+        if to_dict is not None:
+            return to_dict()
+        # 只展开一层，嵌套的字段由编码器继续处理
+        return {f.name: getattr(obj, f.name) for f in dataclasses.fields(obj)}
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if isinstance(obj, (decimal.Decimal, uuid.UUID)):
+        return str(obj)
+    if isinstance(obj, (set, frozenset, tuple)):
+        return list(obj)
+    if hasattr(obj, 'tolist'):  # numpy 数组和标量
+        return obj.tolist()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj: Any) -> bytes:
+    """编码为 UTF-8 JSON 字节（紧凑格式，不转义非 ASCII 字符）"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=_ORJSON_OPTIONS)
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def dumps_str(obj: Any) -> str:
+    """编码为 JSON 字符串（用于 NDJSON/SSE 等文本拼接）"""
+    return dumps(obj).decode('utf-8')
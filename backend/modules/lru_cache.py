@@ -0,0 +1,53 @@
+"""
+线程安全的有界 LRU 缓存
+
+匹配器、区间索引等共享对象被多个请求线程同时使用，缓存的查找、调整顺序和淘汰必须在同一把锁下完成：
+否则一个线程 get 命中后、move_to_end 之前，另一个线程可能已把该键淘汰，move_to_end 抛出 KeyError。
+
+- 只缓存计算结果，不负责计算：未命中时由调用方计算后 put
+- 多个线程同时未命中同一个键时会各自计算，后写入的覆盖先写入的（结果相同，无害）
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+class LRUCache:
+    """线程安全的有界 LRU 缓存"""
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._items: 'OrderedDict[Hashable, Any]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """查询缓存，命中时标记为最近使用；未命中返回 default"""
+        with self._lock:
+            try:
+                value = self._items[key]
+            except KeyError:
+                return default
+            self._items.move_to_end(key)
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        """写入缓存，超过上限时淘汰最久未使用的条目"""
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            if len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+    def after_fork(self):
+        """fork 出的子进程中重建锁（fork 时其他线程可能正持有锁）"""
+        self._lock = threading.Lock()
@@ -0,0 +1,237 @@
+"""
+异步匹配任务管理器
+
+职责：大批量 /api/match 请求改为后台任务执行，HTTP 请求耗时与报价清单大小无关
+- 提交任务时把待匹配的行保存到数据库（match_jobs 表），立即返回任务ID
+- 本地线程池在后台按批匹配，每批的行结果（match_job_rows 表）与进度计数在同一事务中写入
+- 查询任务进度（已完成行数/总行数、预计剩余时间），分页读取已完成的行结果
+- 进程重启后继续执行未完成的任务，从最后一个已保存的批次之后开始
+"""
+
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+from .models import Base, MatchJob, MatchJobRow
+
+logger = logging.getLogger(__name__)
+
+# 任务状态
+JOB_PENDING = 'pending'
+JOB_RUNNING = 'running'
+JOB_COMPLETED = 'completed'
+JOB_FAILED = 'failed'
+
+
+class MatchJobManager:
+    """
+    异步匹配任务管理器
+
+    match_rows(batch, counters) 匹配一批行并返回与 batch 一一对应的行结果，
+    同时累加 counters 中的 total_devices/matched/unmatched（即 app.py 的 _match_row_batch）。
+    """
+
+    def __init__(self, db_manager, match_rows: Callable[[List[Dict], Dict], List[Dict]],
+                 workers: int = 1, batch_size: int = 50):
+        """
+        初始化异步匹配任务管理器
+
+        Args:
+            db_manager: 数据库管理器实例
+            match_rows: 批量匹配函数
+            workers: 同时执行的任务数量
+            batch_size: 每批匹配并保存的行数
+        """
+        self.db_manager = db_manager
+        self.match_rows = match_rows
+        self.batch_size = max(1, batch_size)
+
+        # 旧数据库中没有任务表时自动创建
+        Base.metadata.create_all(
+            db_manager.engine,
+            tables=[MatchJob.__table__, MatchJobRow.__table__],
+            checkfirst=True
+        )
+
+        self._executor = ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='match-job')
+        self._active_jobs = set()
+        self._lock = threading.Lock()
+        logger.info(f"异步匹配任务管理器初始化完成 - 并发任务数: {max(1, workers)}, 每批行数: {self.batch_size}")
+
+    def submit(self, rows: List[Dict]) -> Dict:
+        """
+        提交匹配任务
+
+        Args:
+            rows: 待匹配的行（与 /api/match 请求中的 rows 相同）
+
+        Returns:
+            任务信息字典
+        """
+        job_id = f"JOB_{uuid.uuid4().hex[:12]}"
+        job = MatchJob(
+            job_id=job_id,
+            status=JOB_PENDING,
+            rows=rows,
+            total_rows=len(rows),
+            processed_rows=0,
+            total_devices=0,
+            matched=0,
+            unmatched=0,
+            resumed_rows=0,
+            created_at=datetime.utcnow()
+        )
+        with self.db_manager.session_scope() as session:
+            session.add(job)
+            job_dict = self._job_dict(job)
+
+        self._schedule(job_id)
+        logger.info(f"匹配任务已提交: {job_id}, {len(rows)} 行")
+        return job_dict
+
+    def resume_unfinished(self) -> int:
+        """
+        继续执行未完成的任务（进程启动时调用）
+
+        Returns:
+            重新调度的任务数量
+        """
+        with self.db_manager.session_scope() as session:
+            job_ids = [
+                job_id for (job_id,) in session.query(MatchJob.job_id)
+                .filter(MatchJob.status.in_([JOB_PENDING, JOB_RUNNING]))
+                .order_by(MatchJob.created_at)
+                .all()
+            ]
+
+        for job_id in job_ids:
+            self._schedule(job_id)
+        if job_ids:
+            logger.info(f"继续执行未完成的匹配任务: {len(job_ids)} 个")
+        return len(job_ids)
+
+    def get_job(self, job_id: str) -> Optional[Dict]:
+        """
+        查询任务进度
+
+        Returns:
+            任务信息字典（含 progress 百分比和 eta_seconds 预计剩余秒数），任务不存在时返回 None
+        """
+        with self.db_manager.session_scope() as session:
+            job = session.get(MatchJob, job_id)
+            return self._job_dict(job) if job else None
+
+    def get_results(self, job_id: str, page: int = 1, page_size: int = 100) -> Optional[Dict]:
+        """
+        分页读取已完成的行结果（任务执行中也可读取已完成的部分）
+
+        Returns:
+            包含任务信息和行结果的字典，任务不存在时返回 None
+        """
+        page = max(1, page)
+        page_size = max(1, page_size)
+        with self.db_manager.session_scope() as session:
+            job = session.get(MatchJob, job_id)
+            if job is None:
+                return None
+
+            results = session.query(MatchJobRow.result) \
+                .filter(MatchJobRow.job_id == job_id) \
+                .order_by(MatchJobRow.row_index) \
+                .offset((page - 1) * page_size) \
+                .limit(page_size) \
+                .all()
+
+            return {
+                'job': self._job_dict(job),
+                'total': job.processed_rows,
+                'page': page,
+                'page_size': page_size,
+                'rows': [result for (result,) in results]
+            }
+
+    def shutdown(self, wait: bool = True):
+        """停止线程池（未完成的任务在下次启动时继续）"""
+        self._executor.shutdown(wait=wait)
+
+    def _schedule(self, job_id: str):
+        """把任务放入线程池（同一任务不会被重复调度）"""
+        with self._lock:
+            if job_id in self._active_jobs:
+                return
+            self._active_jobs.add(job_id)
+        self._executor.submit(self._run, job_id)
+
+    def _run(self, job_id: str):
+        """执行任务：从已保存的行之后开始，按批匹配并保存"""
+        try:
+            with self.db_manager.session_scope() as session:
+                job = session.get(MatchJob, job_id)
+                if job is None or job.status not in (JOB_PENDING, JOB_RUNNING):
+                    return
+                rows = job.rows
+                processed = job.processed_rows
+                counters = {
+                    'total_devices': job.total_devices,
+                    'matched': job.matched,
+                    'unmatched': job.unmatched
+                }
+                job.status = JOB_RUNNING
+                job.started_at = datetime.utcnow()
+                job.resumed_rows = processed
+
+            while processed < len(rows):
+                batch = rows[processed:processed + self.batch_size]
+                matched_rows = self.match_rows(batch, counters)
+
+                with self.db_manager.session_scope() as session:
+                    session.add_all([
+                        MatchJobRow(job_id=job_id, row_index=processed + offset, result=matched_row)
+                        for offset, matched_row in enumerate(matched_rows)
+                    ])
+                    processed += len(batch)
+                    job = session.get(MatchJob, job_id)
+                    job.processed_rows = processed
+                    job.total_devices = counters['total_devices']
+                    job.matched = counters['matched']
+                    job.unmatched = counters['unmatched']
+
+            self._finish(job_id, JOB_COMPLETED)
+            logger.info(f"匹配任务完成: {job_id}, {processed} 行")
+        except Exception as e:
+            logger.error(f"匹配任务失败: {job_id}, {e}")
+            try:
+                self._finish(job_id, JOB_FAILED, str(e))
+            except Exception as finish_error:
+                logger.error(f"更新匹配任务状态失败: {job_id}, {finish_error}")
+        finally:
+            with self._lock:
+                self._active_jobs.discard(job_id)
+
+    def _finish(self, job_id: str, status: str, error_message: str = None):
+        """记录任务结束状态"""
+        with self.db_manager.session_scope() as session:
+            job = session.get(MatchJob, job_id)
+            job.status = status
+            job.error_message = error_message
+            job.finished_at = datetime.utcnow()
+
+    @staticmethod
+    def _job_dict(job: MatchJob) -> Dict:
+        """任务信息：在 to_dict 基础上增加进度百分比和预计剩余时间"""
+        job_dict = job.to_dict()
+        job_dict['progress'] = round(job.processed_rows / job.total_rows * 100, 2) if job.total_rows else 100.0
+
+        # 按本轮运行的平均速度估算剩余时间
+        eta_seconds = None
+        if job.status == JOB_COMPLETED:
+            eta_seconds = 0
+        elif job.status == JOB_RUNNING and job.started_at:
+            done = job.processed_rows - (job.resumed_rows or 0)
+            if done > 0:
+                elapsed = (datetime.utcnow() - job.started_at).total_seconds()
+                eta_seconds = round(elapsed / done * (job.total_rows - job.processed_rows), 1)
+        job_dict['eta_seconds'] = eta_seconds
+        return job_dict
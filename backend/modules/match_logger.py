@@ -9,6 +9,7 @@ import uuid
 from datetime import datetime
 from typing import List, Optional, Dict
 from .models import MatchLog
+from .metrics import metrics
 
 logger = logging.getLogger(__name__)
 
@@ -35,6 +36,7 @@ class MatchLogger:
         self.db_manager = db_manager
         logger.info("匹配日志记录器初始化完成")
     
+    @metrics.timed('match_log_write')
     def log_match(
         self,
         input_description: str,
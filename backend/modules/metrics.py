@@ -0,0 +1,239 @@
+"""
+运行指标模块
+记录匹配流程各阶段的耗时直方图和出错次数，以 Prometheus 文本格式输出（/api/metrics）
+
+- 每个阶段一个直方图（固定桶，记录一次只需一次二分查找和一次加锁累加）
+- p50/p95/p99 由桶计数线性插值估算（与 Prometheus histogram_quantile 相同的算法）
+- 指标是进程级的：多进程并行匹配时子进程每匹配完一块就用 drain 取出记录，由主进程 merge 合并
+"""
+
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, List, Optional
+
+# 耗时直方图的桶上限（秒）：0.1ms ~ 10s，每个数量级 1/2.5/5 三档
+DEFAULT_BUCKETS = (
+    0.0001, 0.00025, 0.0005,
+    0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05,
+    0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0
+)
+
+# 输出的分位数
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    """单个阶段的耗时直方图（非累计桶计数，输出时再累加）"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # 最后一个桶为 +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        """记录一次耗时（调用方加锁）"""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def merge(self, counts: List[int], total: float, count: int):
+        """合并另一个相同桶配置的直方图的记录（调用方加锁）"""
+        for index, bucket_count in enumerate(counts):
+            self.counts[index] += bucket_count
+        self.sum += total
+        self.count += count
+
+    def cumulative_counts(self) -> List[int]:
+        """各桶（含 +Inf）的累计计数"""
+        total = 0
+        cumulative = []
+        for count in self.counts:
+            total += count
+            cumulative.append(total)
+        return cumulative
+
+    def quantile(self, q: float) -> Optional[float]:
+        """由桶计数估算分位数（桶内线性插值）；没有记录时返回 None"""
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        cumulative = self.cumulative_counts()
+        index = bisect.bisect_left(cumulative, rank)
+        if index >= len(self.buckets):
+            # 落在 +Inf 桶中，返回最大的有限桶上限
+            return self.buckets[-1]
+
+        lower = self.buckets[index - 1] if index > 0 else 0.0
+        upper = self.buckets[index]
+        below = cumulative[index - 1] if index > 0 else 0
+        in_bucket = cumulative[index] - below
+        if in_bucket == 0:
+            return upper
+        return lower + (upper - lower) * (rank - below) / in_bucket
+
+
+class MetricsRegistry:
+    """各阶段耗时直方图和出错计数（线程安全）"""
+
+    def __init__(self, namespace: str = 'excel_matching', buckets=DEFAULT_BUCKETS):
+        self.namespace = namespace
+        self.buckets = tuple(buckets)
+        self._histograms: Dict[str, Histogram] = {}
+        self._errors: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float):
+        """记录一个阶段的一次耗时"""
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = self._histograms[stage] = Histogram(self.buckets)
+            histogram.observe(seconds)
+
+    def record_error(self, stage: str):
+        """记录一个阶段的一次出错"""
+        with self._lock:
+            self._errors[stage] = self._errors.get(stage, 0) + 1
+
+    @contextmanager
+    def time(self, stage: str):
+        """计时上下文：记录代码块耗时，抛出异常时同时记录出错次数"""
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.record_error(stage)
+            raise
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def timed(self, stage: str) -> Callable:
+        """计时装饰器"""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                except Exception:
+                    self.record_error(stage)
+                    raise
+                finally:
+                    self.observe(stage, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def snapshot(self) -> Dict[str, Dict]:
+        """各阶段的调用次数、出错次数、总耗时和 p50/p95/p99（秒）"""
+        with self._lock:
+            stages = sorted(set(self._histograms) | set(self._errors))
+            result = {}
+            for stage in stages:
+                histogram = self._histograms.get(stage) or Histogram(self.buckets)
+                entry = {
+                    'count': histogram.count,
+                    'errors': self._errors.get(stage, 0),
+                    'sum_seconds': histogram.sum
+                }
+                for q in QUANTILES:
+                    entry[f'p{int(q * 100)}_seconds'] = histogram.quantile(q)
+                result[stage] = entry
+            return result
+
+    def render(self) -> str:
+        """Prometheus 文本格式（0.0.4）"""
+        duration = f'{self.namespace}_stage_duration_seconds'
+        quantile = f'{self.namespace}_stage_duration_quantile_seconds'
+        errors = f'{self.namespace}_stage_errors_total'
+
+        lines = [
+            f'# HELP {duration} 匹配流程各阶段耗时（秒）',
+            f'# TYPE {duration} histogram'
+        ]
+        quantile_lines = [
+            f'# HELP {quantile} 由直方图估算的各阶段耗时分位数（秒）',
+            f'# TYPE {quantile} gauge'
+        ]
+        error_lines = [
+            f'# HELP {errors} 匹配流程各阶段出错次数',
+            f'# TYPE {errors} counter'
+        ]
+
+        with self._lock:
+            for stage in sorted(self._histograms):
+                histogram = self._histograms[stage]
+                label = _escape_label(stage)
+                cumulative = histogram.cumulative_counts()
+                for bound, count in zip(self.buckets, cumulative):
+                    lines.append(f'{duration}_bucket{{stage="{label}",le="{_format_float(bound)}"}} {count}')
+                lines.append(f'{duration}_bucket{{stage="{label}",le="+Inf"}} {cumulative[-1]}')
+                lines.append(f'{duration}_sum{{stage="{label}"}} {_format_float(histogram.sum)}')
+                lines.append(f'{duration}_count{{stage="{label}"}} {histogram.count}')
+                for q in QUANTILES:
+                    value = histogram.quantile(q)
+                    quantile_lines.append(
+                        f'{quantile}{{stage="{label}",quantile="{q}"}} {_format_float(value)}'
+                    )
+            for stage in sorted(self._errors):
+                error_lines.append(f'{errors}{{stage="{_escape_label(stage)}"}} {self._errors[stage]}')
+
+        return '\n'.join(lines + quantile_lines + error_lines) + '\n'
+
+    def drain(self) -> Dict[str, Any]:
+        """取出并清空全部记录（可序列化，子进程用它把记录交回主进程）"""
+        with self._lock:
+            data = {
+                'histograms': {
+                    stage: (list(histogram.counts), histogram.sum, histogram.count)
+                    for stage, histogram in self._histograms.items()
+                },
+                'errors': dict(self._errors)
+            }
+            self._histograms.clear()
+            self._errors.clear()
+        return data
+
+    def merge(self, data: Dict[str, Any]):
+        """合并 drain 取出的记录（两边的桶配置相同）"""
+        with self._lock:
+            for stage, (counts, total, count) in data['histograms'].items():
+                histogram = self._histograms.get(stage)
+                if histogram is None:
+                    histogram = self._histograms[stage] = Histogram(self.buckets)
+                histogram.merge(counts, total, count)
+            for stage, count in data['errors'].items():
+                self._errors[stage] = self._errors.get(stage, 0) + count
+
+    def reset(self):
+        """清空全部指标"""
+        with self._lock:
+            self._histograms.clear()
+            self._errors.clear()
+
+    def after_fork(self):
+        """fork 出的子进程中重建锁（fork 时其他线程可能正持有锁）"""
+        self._lock = threading.Lock()
+
+
+def _escape_label(value: str) -> str:
+    """转义 Prometheus 标签值"""
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_float(value: float) -> str:
+    """Prometheus 数值格式"""
+    return repr(float(value))
+
+
+# 全局指标注册表
+metrics = MetricsRegistry()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=metrics.after_fork)
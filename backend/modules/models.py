@@ -179,3 +179,55 @@ class ConfigHistory(Base):
             'remark': self.remark,
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
+
+
+class MatchJob(Base):
+    """异步匹配任务模型"""
+    __tablename__ = 'match_jobs'
+    
+    job_id = Column(String(50), primary_key=True)
+    status = Column(String(20), nullable=False, default='pending', index=True)  # pending/running/completed/failed
+    rows = Column(JSON, nullable=False)  # 待匹配的行（/api/match 请求中的 rows）
+    total_rows = Column(Integer, nullable=False)
+    processed_rows = Column(Integer, nullable=False, default=0)
+    total_devices = Column(Integer, nullable=False, default=0)
+    matched = Column(Integer, nullable=False, default=0)
+    unmatched = Column(Integer, nullable=False, default=0)
+    resumed_rows = Column(Integer, nullable=False, default=0)  # 本轮开始运行时已完成的行数（用于估算剩余时间）
+    error_message = Column(Text)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow, index=True)
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    
+    def __repr__(self):
+        return f"<MatchJob(job_id='{self.job_id}', status='{self.status}', progress={self.processed_rows}/{self.total_rows})>"
+    
+    def to_dict(self):
+        """转换为字典格式（不含待匹配的行）"""
+        return {
+            'job_id': self.job_id,
+            'status': self.status,
+            'total_rows': self.total_rows,
+            'processed_rows': self.processed_rows,
+            'counters': {
+                'total_devices': self.total_devices,
+                'matched': self.matched,
+                'unmatched': self.unmatched
+            },
+            'error_message': self.error_message,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None
+        }
+
+
+class MatchJobRow(Base):
+    """异步匹配任务的行结果模型"""
+    __tablename__ = 'match_job_rows'
+    
+    job_id = Column(String(50), ForeignKey('match_jobs.job_id'), primary_key=True)
+    row_index = Column(Integer, primary_key=True)  # 行在请求 rows 中的位置
+    result = Column(JSON, nullable=False)  # 与 /api/match 的 matched_rows 元素相同
+    
+    def __repr__(self):
+        return f"<MatchJobRow(job_id='{self.job_id}', row_index={self.row_index})>"
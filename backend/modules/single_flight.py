@@ -0,0 +1,86 @@
+"""
+并发请求合并（single-flight）
+
+多人同时打开同一项目时，前端会同时发出相同的匹配/预览请求。
+相同键的计算同一时刻只执行一次：第一个调用方执行，其余调用方等待它完成并共享结果。
+
+- 只合并正在执行的计算，计算完成后立即移除，不保存结果（没有缓存过期问题）
+- 线程安全，适用于多线程 WSGI 服务器
+- 执行方出错时等待方收到同一个异常
+"""
+
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class Flight:
+    """一次正在执行的计算"""
+
+    __slots__ = ('_done', 'value', 'error')
+
+    def __init__(self):
+        self._done = threading.Event()
+        self.value = None
+        self.error: Optional[BaseException] = None
+
+    def wait(self) -> Any:
+        """等待计算完成，返回结果或抛出执行方的异常"""
+        self._done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+
+class SingleFlight:
+    """按键合并并发的相同计算"""
+
+    def __init__(self):
+        self._flights: Dict[Hashable, Flight] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, func: Callable[[], Any]) -> Tuple[Any, bool]:
+        """
+        执行计算，相同键正在执行时等待其结果
+
+        Returns:
+            (结果, 是否为等待方)；等待方与执行方拿到的是同一个对象
+        """
+        flight, leader = self.claim(key)
+        if not leader:
+            return flight.wait(), True
+
+        try:
+            value = func()
+        except BaseException as e:
+            self.resolve(key, flight, error=e)
+            raise
+        self.resolve(key, flight, value)
+        return value, False
+
+    def claim(self, key: Hashable) -> Tuple[Flight, bool]:
+        """
+        登记计算（批量场景：先登记全部键，执行后逐个 resolve）
+
+        Returns:
+            (Flight, 是否为执行方)；执行方必须调用 resolve，等待方调用 Flight.wait
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is not None:
+                return flight, False
+            flight = self._flights[key] = Flight()
+            return flight, True
+
+    def resolve(self, key: Hashable, flight: Flight, value: Any = None, error: Optional[BaseException] = None):
+        """执行方提交结果（或异常），唤醒等待方"""
+        with self._lock:
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+        flight.value = value
+        flight.error = error
+        flight._done.set()
+
+    def in_flight(self) -> int:
+        """正在执行的计算数量"""
+        with self._lock:
+            return len(self._flights)
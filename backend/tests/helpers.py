@@ -0,0 +1,16 @@
+"""
+测试共用的辅助类
+"""
+
+
+class ListDeviceLoader:
+    """基于内存设备列表的设备加载器（每次返回设备字典的副本）"""
+
+    def __init__(self, devices):
+        self.devices = devices
+
+    def get_all_devices(self):
+        return [dict(d) for d in self.devices]
+
+    def get_devices_by_type(self, device_type):
+        return [dict(d) for d in self.devices if d['device_type'] == device_type]
@@ -0,0 +1,95 @@
+"""
+多模式字符串匹配自动机单元测试（含设备类型识别结果与逐个匹配一致）
+Feature: intelligent-feature-extraction
+"""
+
+import random
+import re
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from modules.intelligent_extraction.aho_corasick import AhoCorasick
+from modules.intelligent_extraction.device_type_recognizer import DeviceTypeRecognizer
+from .test_intelligent_extraction_config import DEVICE_TYPE_CONFIG
+
+
+def first_in_order(entries, text):
+    """逐个 `in` 检查，返回第一个出现的条目（原实现）"""
+    for entry in entries:
+        if entry[-2] in text:
+            return entry
+    return None
+
+
+def sequential_inference(prefix_keywords, text):
+    """逐个前缀构建边界正则并搜索，返回 (前缀, 类型)（原实现）"""
+    for prefix, types in sorted(prefix_keywords.items(), key=lambda x: len(x[0]), reverse=True):
+        pattern = r'(?<![a-zA-Z0-9])' + re.escape(prefix) + r'(?![a-zA-Z0-9])'
+        if re.search(pattern, text, re.IGNORECASE) and types:
+            return prefix, types[0]
+    return None
+
+
+def random_texts(rng, words, count):
+    """由设备类型片段、字母和标点拼成的文本"""
+    pieces = [w for word in words for w in (word, word[:2], word[1:], word[-3:])] + ['CO', 'co', ' ', '~', 'PM2.5']
+    return [''.join(rng.choice(pieces) for _ in range(rng.randint(0, 6))) for _ in range(count)]
+
+
+class TestAhoCorasickUnit:
+    """多模式字符串匹配自动机单元测试"""
+
+    def test_find_all_same_as_substring_check(self):
+        """测试找出的模式串与逐个 `in` 检查相同（含重叠、互为前后缀和空模式串）"""
+        rng = random.Random(5)
+        for _ in range(200):
+            patterns = [''.join(rng.choice('abc') for _ in range(rng.randint(0, 4))) for _ in range(rng.randint(0, 8))]
+            automaton = AhoCorasick(patterns)
+            for _ in range(10):
+                text = ''.join(rng.choice('abcd') for _ in range(rng.randint(0, 12)))
+                assert automaton.find_all(text) == {p for p in patterns if p in text}
+
+    def test_iter_matches_positions(self):
+        """测试逐个产生的出现位置"""
+        automaton = AhoCorasick(['传感器', '温度传感器', '感'])
+        assert list(automaton.iter_matches('温度传感器')) == [(4, '感'), (5, '温度传感器'), (5, '传感器')]
+
+    def test_recognizer_same_as_sequential_search(self):
+        """测试设备类型识别的精确/模糊/关键词匹配结果与逐个类型检查相同"""
+        recognizer = DeviceTypeRecognizer(DEVICE_TYPE_CONFIG)
+        words = list(recognizer.device_types) + [t for types in recognizer.prefix_keywords.values() for t in types]
+        rng = random.Random(7)
+
+        for text in random_texts(rng, words, 500):
+            for mode, method in (('exact', recognizer._exact_match), ('fuzzy', recognizer._fuzzy_match),
+                                 ('keyword', recognizer._keyword_match)):
+                expected = first_in_order(recognizer.patterns[mode], text)
+                result = method(text)
+                if expected is None:
+                    assert result is None
+                else:
+                    assert (result.sub_type, result.confidence, result.mode) == (expected[-2], expected[-1], mode)
+
+    def test_type_inference_same_as_sequential_search(self):
+        """测试类型推断与逐个前缀搜索的结果相同（含重叠前缀、大小写、边界和没有类型的前缀）"""
+        prefix_keywords = {
+            'co': ['CO浓度探测器'], 'co2': ['二氧化碳传感器'], 'CO2': ['CO2变送器'], 'o2': ['氧气传感器'],
+            '温湿': ['温湿度传感器'], '湿度': ['湿度传感器'], 'pm': [], 'pm2.5': ['PM2.5传感器'], '压差': ['压差开关'], '-20': ['低温传感器'], '[a]': ['阀门']
+        }
+        recognizer = DeviceTypeRecognizer({'device_types': [], 'prefix_keywords': prefix_keywords})
+        rng = random.Random(9)
+        pieces = list(prefix_keywords) + ['C', 'O', '2', 'x', '度', ' ', '-', 'PM', '温']
+
+        for _ in range(2000):
+            text = ''.join(rng.choice(pieces) for _ in range(rng.randint(0, 5)))
+            expected = sequential_inference(prefix_keywords, text)
+            result = recognizer._type_inference(text)
+            if expected is None:
+                assert result is None, text
+            else:
+                assert (result.keywords[0], result.sub_type) == expected, text
+                assert (result.confidence, result.mode) == (0.7, 'inference')
+
+        assert DeviceTypeRecognizer({'device_types': []})._type_inference('co2') is None
@@ -37,3 +37,28 @@ class TestAuxiliaryExtractorUnit:
         text = "HST-RA温度传感器"
         result = extractor._extract_model(text)
         assert result == "HST-RA"
+    
+    def test_keyword_scan_same_for_find_and_automaton(self, monkeypatch):
+        """测试逐个查找与自动机扫描的命中位置相同，同时命中多个时取列表中靠前的"""
+        config = {
+            'brand': {'keywords': ['西门子', '霍尼韦尔', '霍尼']},
+            'medium': {'keywords': ['冷冻水', '水']}
+        }
+        text = "霍尼韦尔 冷冻水 西门子 水"
+        scanned = AuxiliaryExtractor(config)
+        monkeypatch.setattr(AuxiliaryExtractor, 'AUTOMATON_MIN_KEYWORDS', 1)
+        automaton = AuxiliaryExtractor(config)
+        assert scanned.keyword_automaton is None and automaton.keyword_automaton is not None
+        
+        for extractor in (scanned, automaton):
+            assert extractor.find_keywords(text) == {'霍尼韦尔': 0, '霍尼': 0, '冷冻水': 5, '水': 7, '西门子': 9}
+            result = extractor.extract(text)
+            assert (result.brand, result.medium) == ('西门子', '冷冻水')
+            assert extractor.extract("温度传感器").brand is None
+    
+    def test_model_exclusions(self, extractor):
+        """测试单位、协议等术语（不区分大小写）和过短的片段不识别为型号"""
+        assert extractor._extract_model("RS485 VDC CO2 MA-2") == "MA-2"
+        assert extractor._extract_model("RS485 Modbus 24VDC") is None
+        assert AuxiliaryExtractor({'model': {'pattern': r'[a-z]+'}})._extract_model("modbus mod12") == "mod"
+        assert AuxiliaryExtractor({'model': {'pattern': '[A-Z'}})._extract_model("HST-RA") is None
@@ -0,0 +1,137 @@
+"""
+列式评分后端单元测试（与逐设备评分的结果一致性）
+Feature: intelligent-feature-extraction
+"""
+
+import json
+import random
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+pytest.importorskip('numpy')
+
+from modules.intelligent_extraction.intelligent_matcher import IntelligentMatcher
+from modules.intelligent_extraction.data_models import (
+    ExtractionResult, DeviceTypeInfo, ParameterCandidate, AuxiliaryInfo
+)
+from .helpers import ListDeviceLoader
+
+
+CONFIG = {
+    'weights': {'device_type': 0.30, 'keyword': 0.30, 'parameters': 0.20, 'brand': 0.15, 'others': 0.05},
+    'thresholds': {'strict': 90, 'relaxed': 70, 'fuzzy': 50, 'fallback': 30},
+    'synonym_map': {'co2': ['二氧化碳'], 'pm': 'PM2.5'},
+}
+
+DEVICE_TYPES = ['温度传感器', 'CO浓度探测器', 'CO2传感器', 'PM2.5传感器', '电动球阀', '座阀', '']
+PARAM_VALUES = ['0-250ppm', '4~20mA', '0-10V', 'DN25', 'PM2.5', 'CO', 'co2', '-40~80℃', 'RS485', '水', '±5%']
+
+
+def generate_devices(rng, count):
+    devices = []
+    for i in range(count):
+        key_params = {
+            rng.choice(['量程', '输出信号', '精度', '通径', '介质', '测量']): rng.choice(PARAM_VALUES)
+            for _ in range(rng.randint(0, 4))
+        }
+        devices.append({
+            'device_id': str(i), 'device_name': f'设备{i}',
+            'device_type': rng.choice(DEVICE_TYPES),
+            'brand': rng.choice(['霍尼韦尔', '西门子', '']),
+            'spec_model': rng.choice(['', f'T-{i}']),
+            'unit_price': rng.choice([0, 100, 150.5, 200]),
+            'raw_description': rng.choice(['', '水 温度', '蒸汽']),
+            'key_params': json.dumps(key_params, ensure_ascii=False),
+        })
+    return devices
+
+
+def generate_extraction(rng):
+    extraction = ExtractionResult()
+    extraction.device_type = DeviceTypeInfo(
+        main_type=rng.choice(['传感器', '探测器', '阀', '未知']),
+        sub_type=rng.choice(DEVICE_TYPES + ['未知']),
+        keywords=rng.sample(['CO', 'co2', 'PM', 'pm2.5', '温度', 'ppm', 'DN'], rng.randint(0, 3)),
+        confidence=0.9
+    )
+    extraction.parameter_candidates = [
+        ParameterCandidate(value=v, param_type='x')
+        for v in rng.sample(['0~250ppm', '4-20mA', '0-10v', 'DN25', '水', '10-30', 'xyz'], rng.randint(0, 3))
+    ]
+    extraction.auxiliary = AuxiliaryInfo(brand=rng.choice(['霍尼韦尔', '西门子', None]),
+                                         medium=rng.choice([None, '水', '蒸汽']))
+    return extraction
+
+
+class TestColumnarScorerUnit:
+    """列式评分后端单元测试"""
+
+    def test_backend_selected_by_config(self):
+        """测试通过配置启用列式评分后端"""
+        loader = ListDeviceLoader(generate_devices(random.Random(0), 10))
+
+        assert IntelligentMatcher(CONFIG, loader).columnar_scorer is None
+        assert IntelligentMatcher(dict(CONFIG, scoring_backend='columnar'), loader).columnar_scorer is not None
+
+    def test_same_ranking_as_python_backend(self):
+        """测试列式评分与逐设备评分的排序和得分完全一致"""
+        rng = random.Random(42)
+        for _ in range(10):
+            loader = ListDeviceLoader(generate_devices(rng, rng.randint(0, 80)))
+            python_matcher = IntelligentMatcher(CONFIG, loader)
+            columnar_matcher = IntelligentMatcher(dict(CONFIG, scoring_backend='columnar'), loader)
+
+            for _ in range(30):
+                extraction = generate_extraction(rng)
+                top_k = rng.choice([1, 5, 20])
+
+                expected = python_matcher.match(extraction, top_k).to_dict()['candidates']
+                actual = columnar_matcher.match(extraction, top_k).to_dict()['candidates']
+                assert actual == expected
+
+    def test_position_cache_bounded(self):
+        """测试设备列表位置缓存有界：重复的主类型请求复用同一个列表，缓存不随请求数增长"""
+        loader = ListDeviceLoader(generate_devices(random.Random(3), 60))
+        matcher = IntelligentMatcher(dict(CONFIG, scoring_backend='columnar'), loader)
+        scorer = matcher.columnar_scorer
+
+        assert matcher._filter_by_main_type('传感器') is matcher._filter_by_main_type('传感器')
+        rng = random.Random(5)
+        for _ in range(300):
+            matcher.match(generate_extraction(rng), 5)
+        assert len(scorer._list_positions) <= 10
+
+        # 设备变更后主类型列表重新收集
+        before = matcher._filter_by_main_type('传感器')
+        matcher.apply_changes(upserts=[dict(generate_devices(random.Random(9), 1)[0], device_id='new', device_type='温度传感器')])
+        after = matcher._filter_by_main_type('传感器')
+        assert after is not before and 'new' in [p.device_id for p in after]
+
+    def test_match_while_rebuilding(self, monkeypatch):
+        """测试增量更新重建列式后端期间，旧的列式后端忽略索引中新加入的设备"""
+        from modules.intelligent_extraction import columnar_scorer
+
+        devices = [{'device_id': str(i), 'device_name': f'温度传感器{i}', 'device_type': '温度传感器',
+                    'key_params': {'测量': '温度', '量程': f'0-{50 + i}℃'}} for i in range(5)]
+        matcher = IntelligentMatcher(dict(CONFIG, scoring_backend='columnar'), ListDeviceLoader(devices))
+        extraction = ExtractionResult()
+        extraction.device_type = DeviceTypeInfo(main_type='传感器', sub_type='温度传感器',
+                                                keywords=['温度'], confidence=0.9)
+        extraction.parameter_candidates = [ParameterCandidate(value='0~60', param_type='range')]
+        expected = matcher.match(extraction, 5).to_dict()['candidates']
+
+        during = []
+        build_scorer = columnar_scorer.ColumnarScorer
+
+        def rebuild(matcher_, profiles):
+            # 新设备已加入共享索引，列式后端尚未重建
+            during.append(matcher_.match(extraction, 5).to_dict()['candidates'])
+            return build_scorer(matcher_, profiles)
+
+        monkeypatch.setattr(columnar_scorer, 'ColumnarScorer', rebuild)
+        matcher.apply_changes(upserts=[{'device_id': 'new', 'device_name': '温湿度传感器', 'device_type': '湿度传感器',
+                                        'key_params': {'测量': '温度 湿度', '量程': '0-100℃'}}])
+        assert during == [expected]
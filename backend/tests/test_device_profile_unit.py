@@ -0,0 +1,47 @@
+"""
+设备匹配档案单元测试
+Feature: intelligent-feature-extraction
+"""
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from modules.intelligent_extraction.device_profile import build_device_profile
+
+
+class TestDeviceProfileUnit:
+    """设备匹配档案单元测试"""
+
+    def test_build_profile_parses_key_params_once(self):
+        """测试档案构建：解析参数、归一化值、预解析范围"""
+        device = {
+            'device_id': '1', 'device_name': 'CO浓度探测器', 'device_type': 'CO浓度探测器',
+            'brand': '霍尼韦尔', 'spec_model': 'CO-100', 'unit_price': None,
+            'key_params': '{"量程": "0～250PPM", "输出": {"value": "4-20mA"}, "备注": ""}'
+        }
+        profile = build_device_profile(device)
+
+        assert [p.name for p in profile.params] == ['量程', '输出', '备注']
+        assert profile.params[0].value_normalized == '0~250ppm'
+        assert profile.params[0].value_range == (0.0, 250.0)
+        assert profile.params[1].value_lower == '4-20ma'
+        assert dict(profile.all_params) == {'量程': '0～250PPM', '输出': '4-20mA'}
+        assert profile.unit_price == 0
+
+    def test_profile_is_immutable(self):
+        """测试档案不可变"""
+        profile = build_device_profile({'device_id': '1', 'key_params': '{"量程": "0-10V"}'})
+
+        with pytest.raises(Exception):
+            profile.device_id = '2'
+        with pytest.raises(TypeError):
+            profile.all_params['量程'] = 'x'
+
+    def test_invalid_key_params(self):
+        """测试无效的 key_params 得到空档案"""
+        assert build_device_profile({'key_params': 'not json'}).params == ()
+        assert build_device_profile({'key_params': None}).params == ()
+        assert build_device_profile({'key_params': '[1, 2]'}).params == ()
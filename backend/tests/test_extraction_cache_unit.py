@@ -0,0 +1,88 @@
+"""
+提取结果缓存单元测试（extract/preview/match 共享）
+Feature: intelligent-feature-extraction
+"""
+
+import copy
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from modules.intelligent_extraction.api_handler import IntelligentExtractionAPI
+from modules.intelligent_extraction.match_cache import extraction_cache
+from .helpers import ListDeviceLoader
+from .test_match_cache_unit import API_CONFIG, DEVICES, TEXT
+
+
+def count_calls(monkeypatch, obj, name):
+    """统计方法调用次数"""
+    calls = []
+    original = getattr(obj, name)
+
+    def wrapper(*args, **kwargs):
+        calls.append(args)
+        return original(*args, **kwargs)
+    monkeypatch.setattr(obj, name, wrapper)
+    return calls
+
+
+class TestExtractionCacheUnit:
+    """提取结果缓存单元测试"""
+
+    @pytest.fixture
+    def api(self):
+        extraction_cache.clear()
+        yield IntelligentExtractionAPI(API_CONFIG, ListDeviceLoader(DEVICES))
+        extraction_cache.clear()
+
+    def test_preview_extract_match_extract_once(self, api, monkeypatch):
+        """测试同一文本依次预览、提取、匹配时只提取一次，结果与不经过缓存时一致"""
+        expected_extract = api.extract(TEXT)['data']
+        expected_match = api.match_uncached(TEXT, 5)['data']
+        extraction_cache.clear()
+
+        recognize = count_calls(monkeypatch, api.device_recognizer, 'recognize')
+        candidates = count_calls(monkeypatch, api.candidate_extractor, 'extract_all_candidates')
+
+        preview = api.preview(TEXT)
+        assert preview['data']['debug_info']['performance']['extraction_cache_hit'] is False
+        extracted = api.extract(TEXT)
+        assert extracted['performance']['cache_hit'] is True
+        assert extracted['data'] == expected_extract
+        assert api.match_uncached(TEXT, 5)['data'] == expected_match
+        assert api.preview(TEXT)['data']['debug_info']['performance']['extraction_cache_hit'] is True
+
+        assert (len(recognize), len(candidates)) == (1, 1)
+        assert extraction_cache.stats()['hits'] == 3
+
+    def test_match_then_extract_adds_candidates(self, api, monkeypatch):
+        """测试先匹配再提取时只补充参数候选，提取结果不受匹配影响"""
+        expected = api.extract(TEXT)['data']
+        extraction_cache.clear()
+
+        recognize = count_calls(monkeypatch, api.device_recognizer, 'recognize')
+        result = api.match_uncached(TEXT, 5)
+        result['data']['extraction']['device_type']['keywords'].append('修改')
+
+        assert api.extract(TEXT)['data'] == expected
+        assert api.extract(TEXT)['data'] == expected
+        assert len(recognize) == 1
+
+    def test_reload_device_recognizer(self, api):
+        """测试配置未变化时保留识别器，变化时重建并不再命中旧的提取结果"""
+        recognizer = api.device_recognizer
+        version = api.config_version
+        assert api.reload_device_recognizer(copy.deepcopy(API_CONFIG)) is False
+        assert api.device_recognizer is recognizer and api.config_version == version
+
+        api.extract(TEXT)
+        config = copy.deepcopy(API_CONFIG)
+        config['intelligent_extraction']['device_type_recognition']['device_types'] = []
+        assert api.reload_device_recognizer(config) is True
+        assert api.device_recognizer is not recognizer and api.config_version != version
+        assert 'cache_hit' not in api.extract(TEXT)['performance']
+
+        assert api.reload_device_recognizer(copy.deepcopy(API_CONFIG)) is True
+        assert api.config_version == version
@@ -61,3 +61,60 @@ class TestIntelligentMatcherUnit:
         if len(result.candidates) > 1:
             for i in range(len(result.candidates) - 1):
                 assert result.candidates[i].total_score >= result.candidates[i+1].total_score
+    
+    def test_each_device_scored_once_per_request(self):
+        """测试多阶段匹配中每个设备最多评分一次"""
+        config = dict(MATCHING_CONFIG, weights={
+            'device_type': 0.30, 'keyword': 0.30, 'parameters': 0.20, 'brand': 0.15, 'others': 0.05
+        })
+        matcher = IntelligentMatcher(config, MockDeviceLoader())
+        
+        scored_ids = []
+        original_score_total = matcher._score_total
+        
+        def counting_score_total(extraction, profile, *args):
+            scored_ids.append(profile.device_id)
+            return original_score_total(extraction, profile, *args)
+        
+        matcher._score_total = counting_score_total
+        
+        # 弱查询：各阶段都无结果，最终走到兜底匹配
+        extraction = ExtractionResult()
+        extraction.device_type = DeviceTypeInfo(main_type="未知", sub_type="未知")
+        matcher.match(extraction, top_k=5)
+        
+        assert len(scored_ids) == len(set(scored_ids)) == 1
+    
+    def test_only_top_k_candidates_materialized(self):
+        """测试只为返回的前 top_k 个设备完整评分并构建候选对象"""
+        config = dict(MATCHING_CONFIG, weights={
+            'device_type': 0.30, 'keyword': 0.30, 'parameters': 0.20, 'brand': 0.15, 'others': 0.05
+        })
+        
+        class ManyDevicesLoader(MockDeviceLoader):
+            def get_all_devices(self):
+                return [
+                    {'device_id': str(i), 'device_name': f'CO浓度探测器{i}', 'device_type': 'CO浓度探测器',
+                     'brand': '霍尼韦尔', 'spec_model': f'CO-{i}', 'unit_price': 100 + i,
+                     'key_params': '{"量程": "0-250ppm", "输出": "4-20mA"}'}
+                    for i in range(30)
+                ]
+        
+        matcher = IntelligentMatcher(config, ManyDevicesLoader())
+        built_ids = []
+        original_build_candidate = matcher._build_candidate
+        
+        def counting_build_candidate(result):
+            built_ids.append(result.profile.device_id)
+            return original_build_candidate(result)
+        
+        matcher._build_candidate = counting_build_candidate
+        
+        extraction = ExtractionResult()
+        extraction.device_type = DeviceTypeInfo(main_type="探测器", sub_type="CO浓度探测器", confidence=0.95)
+        result = matcher.match(extraction, top_k=3)
+        
+        # 同分时按价格升序
+        assert [c.device_id for c in result.candidates] == ['0', '1', '2']
+        assert built_ids == ['0', '1', '2']
+        assert result.candidates[0].all_params == {'量程': '0-250ppm', '输出': '4-20mA'}
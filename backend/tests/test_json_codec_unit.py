@@ -0,0 +1,103 @@
+"""
+JSON 编码模块单元测试
+Feature: intelligent-feature-extraction
+"""
+
+import json
+import pytest
+import sys
+import os
+from dataclasses import dataclass, field
+from datetime import datetime
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from modules import json_codec
+from modules.intelligent_extraction.data_models import (
+    CandidateDevice, ExtractionResult, MatchResult, ParamMatchDetail, ParameterCandidate,
+    RangeParam, ScoreDetails
+)
+
+
+@dataclass
+class Plain:
+    """没有 to_dict 的 dataclass"""
+    name: str = "温度"
+    created: datetime = datetime(2024, 5, 1, 8, 30)
+    tags: set = field(default_factory=lambda: {'a'})
+    nested: ScoreDetails = field(default_factory=lambda: ScoreDetails(brand_score=15.0))
+
+
+def sample_match_result() -> MatchResult:
+    extraction = ExtractionResult(raw_text="温度传感器 量程-40~80℃", timestamp=datetime(2024, 5, 1))
+    extraction.parameters.range = RangeParam(value="-40~80℃", normalized={'min': -40, 'max': 80, 'unit': '℃'},
+                                             confidence=0.9)
+    extraction.parameter_candidates = [ParameterCandidate(value="-40~80℃", param_type='range', position=6)]
+    candidate = CandidateDevice(
+        device_id='t_1', device_name='温度传感器', brand='西门子', unit_price=100.5, total_score=72.25,
+        score_details=ScoreDetails(device_type_score=30.0, parameter_score=20.0),
+        matched_params=['量程'],
+        param_match_details=[ParamMatchDetail(param_name='量程', matched=True, match_score=20.0)],
+        all_params={'量程': '-40~80℃'}
+    )
+    return MatchResult(candidates=[candidate] * 3, extraction=extraction, timestamp=datetime(2024, 5, 1))
+
+
+@pytest.fixture(params=['fast', 'stdlib'])
+def backend(request, monkeypatch):
+    if request.param == 'fast':
+        if not json_codec.is_fast_path_available():
+            pytest.skip('未安装 orjson')
+    else:
+        monkeypatch.setattr(json_codec, 'orjson', None)
+    return request.param
+
+
+class TestJsonCodecUnit:
+    """JSON 编码模块单元测试"""
+
+    def test_dataclass_same_as_to_dict(self, backend):
+        """测试直接编码数据模型与先 to_dict 再编码的结果一致"""
+        result = sample_match_result()
+        encoded = json_codec.dumps({'success': True, 'data': result})
+        assert isinstance(encoded, bytes)
+        assert json.loads(encoded) == {'success': True, 'data': json.loads(json.dumps(result.to_dict()))}
+        assert '温度传感器'.encode('utf-8') in encoded
+
+    def test_extra_types(self, backend):
+        """测试没有 to_dict 的 dataclass、日期、Decimal、集合和非字符串键"""
+        data = json.loads(json_codec.dumps({'plain': Plain(), 'price': Decimal('1.50'), 1: (1, 2)}))
+        assert data == {
+            'plain': {
+                'name': '温度',
+                'created': '2024-05-01T08:30:00',
+                'tags': ['a'],
+                'nested': ScoreDetails(brand_score=15.0).to_dict()
+            },
+            'price': '1.50',
+            '1': [1, 2]
+        }
+        with pytest.raises(TypeError):
+            json_codec.dumps({'bad': object()})
+
+    def test_backends_same_output(self, monkeypatch):
+        """测试常规响应（不含指数格式浮点数和 NaN）下 orjson 与标准库输出的字节一致"""
+        if not json_codec.is_fast_path_available():
+            pytest.skip('未安装 orjson')
+        payload = {'data': sample_match_result(), 'plain': Plain(), 'text': '量程 "0~250ppm"\n'}
+        fast = json_codec.dumps(payload)
+        monkeypatch.setattr(json_codec, 'orjson', None)
+        assert json_codec.dumps(payload) == fast
+
+    def test_backends_float_differences(self, monkeypatch):
+        """测试指数格式浮点数两种实现解析结果相同，NaN 的输出不同（见模块说明）"""
+        if not json_codec.is_fast_path_available():
+            pytest.skip('未安装 orjson')
+        payload = {'small': 1e-07, 'large': 1e20, 'score': 72.25}
+        fast = json_codec.dumps(payload)
+        nan_fast = json_codec.dumps({'nan': float('nan')})
+        monkeypatch.setattr(json_codec, 'orjson', None)
+        assert json.loads(json_codec.dumps(payload)) == json.loads(fast) == payload
+        assert nan_fast == b'{"nan":null}'
+        assert json_codec.dumps({'nan': float('nan')}) == b'{"nan":NaN}'
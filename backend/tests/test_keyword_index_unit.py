@@ -0,0 +1,90 @@
+"""
+关键词倒排索引单元测试
+Feature: intelligent-feature-extraction
+"""
+
+import pytest
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from modules.intelligent_extraction.device_profile import build_device_profile
+from modules.intelligent_extraction import keyword_index
+from modules.intelligent_extraction.keyword_index import KeywordIndex, KeywordPatternCache
+
+
+class TestKeywordIndexUnit:
+    """关键词倒排索引单元测试"""
+
+    @pytest.fixture
+    def profiles(self):
+        return [
+            build_device_profile({'device_id': '1', 'key_params': '{"量程": "0-250ppm", "类型": "CO探测"}'}),
+            build_device_profile({'device_id': '2', 'key_params': '{"测量": "PM2.5", "输出": "4-20mA"}'}),
+            build_device_profile({'device_id': '3', 'key_params': '{"介质": "二氧化碳", "类型": "pm10"}'}),
+        ]
+
+    def test_letter_boundary(self, profiles):
+        """测试边界规则：pm 不命中 ppm，但命中 PM2.5"""
+        index = KeywordIndex(profiles)
+
+        assert index.matched_params(['pm'], profiles[0]) == []
+        assert index.matched_params(['pm'], profiles[1]) == ['测量']
+        assert index.matched_params(['pm'], profiles[2]) == ['类型']
+        assert index.matched_params(['pm2.5'], profiles[1]) == ['测量']
+        assert index.matched_params(['co'], profiles[0]) == ['类型']
+
+    def test_synonym_expansion(self, profiles):
+        """测试同义词展开（数组和字典两种格式）"""
+        list_index = KeywordIndex(profiles, [{'source': 'CO2', 'target': ['二氧化碳']}])
+        dict_index = KeywordIndex(profiles, {'co2': '二氧化碳'})
+
+        assert list_index.matched_params(['co2'], profiles[2]) == ['介质']
+        assert dict_index.matched_params(['CO2'], profiles[2]) == ['介质']
+
+    def test_profile_not_indexed(self, profiles):
+        """测试不在索引中的档案返回 None"""
+        index = KeywordIndex(profiles[:1])
+
+        assert index.matched_params(['pm'], profiles[1]) is None
+
+    def test_concurrent_queries_with_eviction(self, profiles, monkeypatch):
+        """测试多线程查询时缓存频繁淘汰也不会出错，结果与单线程一致"""
+        monkeypatch.setattr(keyword_index, 'MAX_CACHED_KEYWORD_SETS', 1)
+        index = KeywordIndex(profiles)
+        queries = [['pm'], ['co'], ['pm2.5'], ['pm', 'co']]
+        expected = [index.match_keywords(keywords) for keywords in queries]
+
+        def run(i):
+            return index.match_keywords(queries[i % len(queries)]) == expected[i % len(queries)]
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            assert all(pool.map(run, range(4000)))
+
+    def test_pattern_cache_counts_hits(self):
+        """测试编译正则缓存按小写关键词复用，并记录命中/未命中"""
+        cache = KeywordPatternCache()
+
+        assert cache.keyword('PM') is cache.keyword('pm')
+        assert cache.stats() == {'hits': 1, 'misses': 1, 'size': 1}
+
+        pattern = cache.keywords(['CO', '一氧化碳', 'co'])
+        assert cache.keywords(['co', '一氧化碳']) is pattern
+        assert cache.stats()['hits'] == 2
+
+        cache.clear()
+        assert cache.stats() == {'hits': 0, 'misses': 0, 'size': 0}
+
+    def test_alternation_pattern_boundary(self):
+        """测试交替正则与逐个关键词匹配的结果一致"""
+        cache = KeywordPatternCache()
+        terms = ['pm', 'co', '二氧化碳']
+        pattern = cache.keywords(terms)
+
+        for value in ['0-250ppm', 'pm2.5', 'co探测', 'cod', 'ecotype', '二氧化碳浓度', 'pm10', '']:
+            expected = any(cache.keyword(term).search(value) for term in terms)
+            assert bool(pattern.search(value)) == expected
+
+        assert cache.keywords([]).search('pm') is None
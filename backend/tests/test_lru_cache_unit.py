@@ -0,0 +1,64 @@
+"""
+线程安全 LRU 缓存单元测试
+Feature: intelligent-feature-extraction
+"""
+
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from modules.lru_cache import LRUCache
+from modules.intelligent_extraction.device_profile import build_device_profile
+from modules.intelligent_extraction.range_index import RangeIndex
+
+
+class TestLRUCacheUnit:
+    """线程安全 LRU 缓存单元测试"""
+
+    def test_eviction_order(self):
+        """测试超过上限时淘汰最久未使用的条目，命中会刷新顺序"""
+        cache = LRUCache(2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        assert cache.get('a') == 1
+        cache.put('c', 3)
+        assert cache.get('b') is None and cache.get('a') == 1 and cache.get('c') == 3
+        assert cache.get('missing', ()) == ()
+        assert len(cache) == 2
+        cache.clear()
+        assert len(cache) == 0
+
+    def test_concurrent_get_and_evict(self):
+        """测试多线程同时命中和淘汰同一批键不会出错"""
+        cache = LRUCache(4)
+
+        def run(i):
+            key = i % 8
+            value = cache.get(key)
+            if value is None:
+                cache.put(key, key * 10)
+                return True
+            return value == key * 10
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            assert all(pool.map(run, range(20000)))
+        assert len(cache) <= 4
+
+    def test_range_index_concurrent_queries(self, monkeypatch):
+        """测试区间索引在多线程查询、缓存频繁淘汰时结果正确"""
+        from modules.intelligent_extraction import range_index
+        monkeypatch.setattr(range_index, 'MAX_CACHED_RANGE_QUERIES', 2)
+        index = RangeIndex([
+            build_device_profile({'device_id': str(i), 'key_params': f'{{"量程": "{i}-{i + 10}ppm"}}'})
+            for i in range(20)
+        ])
+        queries = [(float(i), float(i + 1)) for i in range(6)]
+        expected = [index.overlapping_params(query) for query in queries]
+
+        def run(i):
+            return index.overlapping_params(queries[i % 6]) == expected[i % 6]
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            assert all(pool.map(run, range(5000)))
@@ -11,7 +11,11 @@
 
 import pytest
 import json
+import app as app_module
 from app import app
+from modules.intelligent_extraction.api_handler import IntelligentExtractionAPI
+from .test_intelligent_extraction_config import FULL_CONFIG
+from .test_intelligent_extraction_integration import MockDeviceLoader
 
 
 @pytest.fixture
@@ -432,5 +436,222 @@ class TestMatchAPIIntegration:
         assert data['error_code'] == 'MISSING_ROWS', "错误代码应为MISSING_ROWS"
 
 
+
+STREAM_ROWS = [
+    {"row_number": 1, "row_type": "header", "device_description": "设备清单"},
+    {"row_number": 2, "row_type": "device", "device_description": "CO浓度探测器 量程0~250ppm 输出4~20mA"},
+    {"row_number": 3, "row_type": "device", "raw_data": ["温度传感器", "-40~80℃"]},
+    {"row_number": 4, "row_type": "device", "device_description": ""},
+    {"row_number": 5, "row_type": "summary", "device_description": "合计"},
+]
+
+
+class TestMatchAPIStreaming:
+    """测试 /api/match 的流式响应模式"""
+    
+    @pytest.fixture(autouse=True)
+    def mock_api(self, monkeypatch):
+        monkeypatch.setattr(app_module, 'intelligent_extraction_api',
+                            IntelligentExtractionAPI(FULL_CONFIG, MockDeviceLoader()))
+        monkeypatch.setattr(app_module, 'match_logger', None)
+    
+    def _match(self, client, **extra):
+        return client.post('/api/match', data=json.dumps(dict({"rows": STREAM_ROWS}, **extra)),
+                           content_type='application/json')
+    
+    def test_ndjson_stream_same_as_json(self, client):
+        """测试 NDJSON 流逐行输出的结果与普通 JSON 响应一致，最后一条为统计信息"""
+        expected = self._match(client).get_json()
+        
+        response = self._match(client, stream='ndjson')
+        assert response.mimetype == 'application/x-ndjson'
+        records = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+        
+        assert [r['type'] for r in records] == ['row'] * len(STREAM_ROWS) + ['statistics']
+        assert [r['row'] for r in records[:-1]] == expected['matched_rows']
+        assert records[-1]['statistics'] == expected['statistics']
+        assert records[-1]['message'] == expected['message']
+    
+    def test_sse_stream_by_accept_header(self, client):
+        """测试通过 Accept 头选择 SSE 格式"""
+        response = client.post('/api/match', data=json.dumps({"rows": STREAM_ROWS}),
+                               content_type='application/json',
+                               headers={'Accept': 'text/event-stream'})
+        assert response.mimetype == 'text/event-stream'
+        
+        events = [e for e in response.get_data(as_text=True).split('\n\n') if e]
+        assert len(events) == len(STREAM_ROWS) + 1
+        name, payload = events[-1].split('\n')
+        assert name == 'event: statistics'
+        assert json.loads(payload[len('data: '):])['statistics']['total_devices'] == 3
+
+
+
+class TestMatchJobsAPI:
+    """测试异步匹配任务接口 /api/match/jobs"""
+    
+    @pytest.fixture(autouse=True)
+    def job_manager(self, monkeypatch, tmp_path):
+        from modules.database import DatabaseManager
+        from modules.match_job_manager import MatchJobManager
+        
+        monkeypatch.setattr(app_module, 'intelligent_extraction_api',
+                            IntelligentExtractionAPI(FULL_CONFIG, MockDeviceLoader()))
+        monkeypatch.setattr(app_module, 'match_logger', None)
+        db_manager = DatabaseManager(f"sqlite:///{tmp_path / 'jobs.db'}")
+        manager = MatchJobManager(
+            db_manager,
+            match_rows=lambda batch, counters: list(app_module._match_row_batch(batch, counters)),
+            batch_size=2
+        )
+        monkeypatch.setattr(app_module, 'match_job_manager', manager)
+        yield manager
+        manager.shutdown()
+        db_manager.close()
+    
+    def test_job_result_same_as_match(self, client, job_manager):
+        """测试异步任务完成后分页获取的结果与 /api/match 一致"""
+        expected = client.post('/api/match', data=json.dumps({"rows": STREAM_ROWS}),
+                               content_type='application/json').get_json()
+        
+        response = client.post('/api/match/jobs', data=json.dumps({"rows": STREAM_ROWS}),
+                               content_type='application/json')
+        assert response.status_code == 202
+        job_id = response.get_json()['job']['job_id']
+        job_manager.shutdown(wait=True)
+        
+        job = client.get(f'/api/match/jobs/{job_id}').get_json()['job']
+        assert job['status'] == 'completed'
+        assert job['processed_rows'] == job['total_rows'] == len(STREAM_ROWS)
+        assert job['statistics'] == expected['statistics']
+        
+        rows = []
+        for page in (1, 2):
+            result = client.get(f'/api/match/jobs/{job_id}/result?page={page}&page_size=3').get_json()
+            assert result['total'] == len(STREAM_ROWS)
+            rows.extend(result['matched_rows'])
+        assert rows == expected['matched_rows']
+    
+    def test_unknown_job(self, client):
+        """测试查询不存在的任务返回 404"""
+        assert client.get('/api/match/jobs/JOB_missing').status_code == 404
+        assert client.get('/api/match/jobs/JOB_missing/result').status_code == 404
+
+
+
+class TestMetricsAPI:
+    """测试运行指标接口 /api/metrics"""
+    
+    def test_metrics_after_match(self, client, monkeypatch):
+        """测试匹配后各阶段耗时以 Prometheus 文本格式和 JSON 格式输出"""
+        from modules.metrics import metrics
+        from modules.intelligent_extraction.match_cache import extraction_cache
+        
+        monkeypatch.setattr(app_module, 'intelligent_extraction_api',
+                            IntelligentExtractionAPI(FULL_CONFIG, MockDeviceLoader()))
+        monkeypatch.setattr(app_module, 'match_logger', None)
+        extraction_cache.clear()
+        metrics.reset()
+        client.post('/api/match', data=json.dumps({"rows": STREAM_ROWS}), content_type='application/json')
+        
+        response = client.get('/api/metrics')
+        assert response.status_code == 200
+        assert response.mimetype == 'text/plain'
+        text = response.get_data(as_text=True)
+        for stage in ('device_type_recognition', 'parameter_extraction', 'auxiliary_extraction',
+                      'result_serialization', 'response_serialization'):
+            assert f'excel_matching_stage_duration_seconds_count{{stage="{stage}"}}' in text
+        
+        data = client.get('/api/metrics?format=json').get_json()['data']
+        assert data['device_type_recognition']['count'] == 2
+        assert data['response_serialization']['p95_seconds'] is not None
+
+
+
+class TestMatchDetailLevel:
+    """测试 /api/match 的候选设备精简模式和 /api/match/candidates 懒加载接口"""
+    
+    ROWS = [
+        {"row_number": 1, "row_type": "device", "device_description": "温度传感器 量程-40~80℃"},
+        {"row_number": 2, "row_type": "device", "device_description": "霍尼韦尔 CO-1 探测器"},
+    ]
+    
+    EXTRA_DEVICE = {'device_id': 't_2', 'device_name': '温度传感器', 'device_type': '温度传感器',
+                    'brand': '霍尼韦尔', 'spec_model': 'T-2', 'unit_price': 80,
+                    'key_params': '{"量程": "-20~60℃"}'}
+    
+    @pytest.fixture(autouse=True)
+    def mock_api(self, monkeypatch):
+        from .test_match_cache_unit import API_CONFIG, DEVICES
+        from .helpers import ListDeviceLoader
+        
+        monkeypatch.setattr(app_module, 'intelligent_extraction_api',
+                            IntelligentExtractionAPI(API_CONFIG, ListDeviceLoader(DEVICES + [self.EXTRA_DEVICE])))
+        monkeypatch.setattr(app_module, 'match_logger', None)
+    
+    def _match(self, client, **extra):
+        return client.post('/api/match', data=json.dumps(dict({"rows": self.ROWS}, **extra)),
+                           content_type='application/json')
+    
+    def test_compact_levels(self, client):
+        """测试 top1_full 只保留第一个候选的完整详情，ids_only 全部精简"""
+        full = self._match(client).get_json()
+        top1 = self._match(client, detail_level='top1_full').get_json()
+        ids_only = self._match(client, detail_level='ids_only').get_json()
+        
+        assert top1['statistics'] == ids_only['statistics'] == full['statistics']
+        assert len(full['matched_rows'][0]['candidates']) > 1
+        for full_row, top1_row, ids_row in zip(full['matched_rows'], top1['matched_rows'], ids_only['matched_rows']):
+            compact = [
+                {'device_id': c['device_id'], 'match_score': c['match_score'], 'unit_price': c['unit_price']}
+                for c in full_row['candidates']
+            ]
+            assert ids_row['candidates'] == compact
+            assert top1_row['candidates'][:1] == full_row['candidates'][:1]
+            assert top1_row['candidates'][1:] == compact[1:]
+
+    def test_match_result_and_log_from_full_candidate(self, client, monkeypatch):
+        """测试精简模式下匹配结果和匹配日志仍按完整的第一个候选生成"""
+        logged = []
+
+        class RecordingLogger:
+            def log_match(self, **kwargs):
+                logged.append(kwargs)
+
+        monkeypatch.setattr(app_module, 'match_logger', RecordingLogger())
+        full = self._match(client).get_json()
+        full_logs, logged[:] = list(logged), []
+
+        for level in ('top1_full', 'ids_only'):
+            result = self._match(client, detail_level=level).get_json()
+            for full_row, row in zip(full['matched_rows'], result['matched_rows']):
+                assert row['match_result'] == full_row['match_result']
+                assert row['match_result']['matched_device_text']
+            assert logged == full_logs
+            assert logged[0]['extracted_features'] == full['matched_rows'][0]['candidates'][0]['matched_params']
+            logged[:] = []
+
+    def test_invalid_level(self, client):
+        """测试不支持的 detail_level 返回 400"""
+        response = self._match(client, detail_level='minimal')
+        assert response.status_code == 400
+        assert response.get_json()['error_code'] == 'INVALID_DETAIL_LEVEL'
+    
+    def test_lazy_candidates_same_as_full(self, client):
+        """测试懒加载的完整候选与 full 模式一致，并可按 device_ids 过滤"""
+        full = self._match(client).get_json()['matched_rows'][0]['candidates']
+        
+        def candidates(**extra):
+            body = dict({'device_description': self.ROWS[0]['device_description']}, **extra)
+            response = client.post('/api/match/candidates', data=json.dumps(body), content_type='application/json')
+            assert response.status_code == 200
+            return response.get_json()['candidates']
+        
+        assert candidates() == full
+        assert candidates(device_ids=[full[1]['device_id']]) == [full[1]]
+        assert client.post('/api/match/candidates', data=json.dumps({}),
+                           content_type='application/json').status_code == 400
+
+
 if __name__ == '__main__':
     pytest.main([__file__, '-v', '-s'])
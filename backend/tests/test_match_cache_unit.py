@@ -0,0 +1,95 @@
+"""
+匹配结果缓存单元测试
+Feature: intelligent-feature-extraction
+"""
+
+import copy
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from modules.intelligent_extraction.api_handler import IntelligentExtractionAPI
+from modules.intelligent_extraction.match_cache import MatchResultCache
+from .test_intelligent_extraction_config import DEVICE_TYPE_CONFIG, PARAMETER_CONFIG, MATCHING_CONFIG
+from .helpers import ListDeviceLoader
+
+
+# API 处理器读取的配置结构
+API_CONFIG = {
+    'intelligent_extraction': {
+        'device_type_recognition': DEVICE_TYPE_CONFIG,
+        'parameter_extraction': PARAMETER_CONFIG,
+    },
+    'matching_rules': MATCHING_CONFIG,
+}
+
+TEXT = "温度传感器 量程-40~80℃"
+
+DEVICES = [
+    {'device_id': 'co_1', 'device_name': 'CO浓度探测器', 'device_type': 'CO浓度探测器',
+     'brand': '霍尼韦尔', 'spec_model': 'CO-1', 'unit_price': 100,
+     'key_params': '{"量程": "0-250ppm", "输出信号": "4~20mA"}'},
+    {'device_id': 'co_2', 'device_name': 'CO浓度探测器', 'device_type': 'CO浓度探测器',
+     'brand': '西门子', 'spec_model': 'CO-2', 'unit_price': 200,
+     'key_params': '{"量程": "0-1000ppm"}'},
+    {'device_id': 't_1', 'device_name': '温度传感器', 'device_type': '温度传感器',
+     'brand': '西门子', 'spec_model': 'T-1', 'unit_price': 100,
+     'key_params': '{"量程": "-40~80℃"}'},
+]
+
+
+class TestMatchCacheUnit:
+    """匹配结果缓存单元测试"""
+
+    @pytest.fixture
+    def api(self):
+        api = IntelligentExtractionAPI(API_CONFIG, ListDeviceLoader(DEVICES))
+        api.result_cache = MatchResultCache(maxsize=16)
+        return api
+
+    def test_repeated_text_hits_cache(self, api):
+        """测试重复文本命中缓存，结果与未缓存时一致且互不影响"""
+        first = api.match(TEXT, 5)
+        second = api.match(TEXT, 5)
+
+        assert second['performance']['cache_hit'] is True
+        assert second['data'] == first['data']
+        second['data']['candidates'].clear()
+        assert api.match(TEXT, 5)['data'] == first['data']
+
+        stats = api.result_cache.stats()
+        assert (stats['hits'], stats['misses'], stats['size']) == (2, 1, 1)
+        assert stats['hit_rate'] == round(2 / 3, 4)
+
+        # top_k 不同不共用结果；空文本和失败结果不缓存
+        api.match(TEXT, 3)
+        api.match('', 5)
+        assert api.result_cache.stats()['size'] == 2
+
+    def test_invalidated_by_device_and_config_changes(self, api):
+        """测试设备库增量更新或配置变化后不再命中旧结果"""
+        before = api.match(TEXT, 5)
+        assert before['data']['candidates'][0]['device_id'] == 't_1'
+
+        api.apply_device_changes(removals=['t_1'])
+        after = api.match(TEXT, 5)
+        assert 'cache_hit' not in after['performance']
+        assert 't_1' not in [c['device_id'] for c in after['data']['candidates']]
+
+        config = copy.deepcopy(API_CONFIG)
+        config['intelligent_extraction']['device_type_recognition']['device_types'].append('压力传感器')
+        other = IntelligentExtractionAPI(config, ListDeviceLoader(DEVICES))
+        other.result_cache = api.result_cache
+        assert other.config_version != api.config_version
+        assert 'cache_hit' not in other.match(TEXT, 5)['performance']
+
+    def test_match_texts_deduplicates(self, api):
+        """测试批量匹配时重复文本只匹配一次"""
+        texts = [TEXT, "霍尼韦尔 CO-1 探测器", TEXT, TEXT]
+        results = api.match_texts(texts, top_k=5)
+
+        assert [r['data'] for r in results] == [api.match_uncached(t, 5)['data'] for t in texts]
+        stats = api.result_cache.stats()
+        assert (stats['hits'], stats['misses']) == (2, 2)
@@ -0,0 +1,111 @@
+"""
+异步匹配任务管理器单元测试
+Feature: intelligent-feature-extraction
+"""
+
+import pytest
+import sys
+import os
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from modules.database import DatabaseManager
+from modules.models import MatchJob, MatchJobRow
+from modules.match_job_manager import MatchJobManager
+
+
+def fake_match_rows(calls):
+    """按行号生成匹配结果，记录每批匹配的行号"""
+    def match_rows(batch, counters):
+        calls.append([row['row_number'] for row in batch])
+        results = []
+        for row in batch:
+            counters['total_devices'] += 1
+            matched = row['row_number'] % 2 == 0
+            counters['matched' if matched else 'unmatched'] += 1
+            results.append({'row_number': row['row_number'], 'matched': matched})
+        return results
+    return match_rows
+
+
+class TestMatchJobManagerUnit:
+    """异步匹配任务管理器单元测试"""
+
+    @pytest.fixture
+    def db_manager(self, tmp_path):
+        db_manager = DatabaseManager(f"sqlite:///{tmp_path / 'jobs.db'}")
+        yield db_manager
+        db_manager.close()
+
+    def test_submit_and_page_results(self, db_manager):
+        """测试提交任务后按批匹配，进度、统计和分页结果正确"""
+        calls = []
+        manager = MatchJobManager(db_manager, fake_match_rows(calls), batch_size=3)
+        rows = [{'row_number': i} for i in range(7)]
+
+        job = manager.submit(rows)
+        assert job['status'] == 'pending'
+        assert (job['total_rows'], job['processed_rows'], job['progress']) == (7, 0, 0.0)
+        manager.shutdown(wait=True)
+
+        assert calls == [[0, 1, 2], [3, 4, 5], [6]]
+        job = manager.get_job(job['job_id'])
+        assert job['status'] == 'completed'
+        assert (job['processed_rows'], job['progress'], job['eta_seconds']) == (7, 100.0, 0)
+        assert job['counters'] == {'total_devices': 7, 'matched': 4, 'unmatched': 3}
+
+        page = manager.get_results(job['job_id'], page=2, page_size=3)
+        assert page['total'] == 7
+        assert [row['row_number'] for row in page['rows']] == [3, 4, 5]
+        assert manager.get_job('JOB_missing') is None
+        assert manager.get_results('JOB_missing') is None
+
+    def test_resume_unfinished_job(self, db_manager):
+        """测试进程重启后从已保存的行之后继续执行，已完成的行不重新匹配"""
+        MatchJobManager(db_manager, fake_match_rows([])).shutdown()
+        with db_manager.session_scope() as session:
+            session.add(MatchJob(
+                job_id='JOB_resume', status='running',
+                rows=[{'row_number': i} for i in range(5)], total_rows=5,
+                processed_rows=2, total_devices=2, matched=1, unmatched=1, resumed_rows=0,
+                created_at=datetime.utcnow(), started_at=datetime.utcnow() - timedelta(seconds=4)
+            ))
+            session.add_all([
+                MatchJobRow(job_id='JOB_resume', row_index=i, result={'row_number': i, 'matched': i % 2 == 0})
+                for i in range(2)
+            ])
+
+        # 运行中的任务按本轮速度估算剩余时间：4 秒完成 2 行，剩余 3 行
+        with db_manager.session_scope() as session:
+            job = MatchJobManager._job_dict(session.get(MatchJob, 'JOB_resume'))
+        assert job['eta_seconds'] == pytest.approx(6, abs=1)
+
+        calls = []
+        manager = MatchJobManager(db_manager, fake_match_rows(calls), batch_size=2)
+        assert manager.resume_unfinished() == 1
+        manager.shutdown(wait=True)
+
+        assert calls == [[2, 3], [4]]
+        job = manager.get_job('JOB_resume')
+        assert job['status'] == 'completed'
+        assert job['counters'] == {'total_devices': 5, 'matched': 3, 'unmatched': 2}
+        assert [row['row_number'] for row in manager.get_results('JOB_resume')['rows']] == [0, 1, 2, 3, 4]
+
+    def test_failed_job_keeps_finished_rows(self, db_manager):
+        """测试匹配出错时任务标记为失败，已保存的行结果仍可读取"""
+        def match_rows(batch, counters):
+            if batch[0]['row_number'] >= 2:
+                raise RuntimeError('匹配器不可用')
+            return [{'row_number': row['row_number']} for row in batch]
+
+        manager = MatchJobManager(db_manager, match_rows, batch_size=2)
+        job = manager.submit([{'row_number': i} for i in range(4)])
+        manager.shutdown(wait=True)
+
+        job = manager.get_job(job['job_id'])
+        assert job['status'] == 'failed'
+        assert job['error_message'] == '匹配器不可用'
+        assert job['processed_rows'] == 2
+        assert manager.get_results(job['job_id'])['total'] == 2
+
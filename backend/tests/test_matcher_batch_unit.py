@@ -0,0 +1,70 @@
+"""
+按设备类型分组的批量匹配单元测试（与逐条匹配的结果一致）
+Feature: intelligent-feature-extraction
+"""
+
+import random
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from modules.intelligent_extraction.intelligent_matcher import IntelligentMatcher
+from modules.intelligent_extraction.api_handler import GROUPED_MATCH_MIN_TEXTS
+from modules.intelligent_extraction.data_models import DeviceTypeInfo, AuxiliaryInfo
+from .helpers import ListDeviceLoader
+from .test_matcher_incremental_update_unit import CONFIG, generate_device, generate_extraction
+from .test_match_cache_unit import API_CONFIG, DEVICES
+from .test_parallel_matcher_unit import strip_timing
+
+
+def generate_group_extractions(rng, count):
+    """设备类型信息只从少量取值中选择，使多个提取结果落入同一组"""
+    type_infos = [generate_extraction(rng).device_type for _ in range(4)]
+    extractions = []
+    for _ in range(count):
+        extraction = generate_extraction(rng)
+        info = rng.choice(type_infos)
+        extraction.device_type = DeviceTypeInfo(main_type=info.main_type, sub_type=info.sub_type,
+                                                keywords=list(info.keywords), confidence=0.9)
+        extraction.auxiliary = AuxiliaryInfo(brand=rng.choice(['霍尼韦尔', '西门子', None]),
+                                             medium=rng.choice([None, '水']),
+                                             model=rng.choice([None, None, None, 'T-1']))
+        extractions.append(extraction)
+    return extractions
+
+
+class TestMatcherBatchUnit:
+    """按设备类型分组的批量匹配单元测试"""
+
+    @pytest.mark.parametrize('backend', ['python', 'columnar'])
+    def test_same_results_as_single_match(self, backend):
+        """测试分组批量匹配的每条结果与逐条匹配完全一致"""
+        if backend == 'columnar':
+            pytest.importorskip('numpy')
+        rng = random.Random(11)
+        for _ in range(5):
+            loader = ListDeviceLoader([generate_device(rng, str(i)) for i in range(rng.randint(0, 60))])
+            matcher = IntelligentMatcher(dict(CONFIG, scoring_backend=backend), loader)
+
+            extractions = generate_group_extractions(rng, 40)
+            for top_k in (1, 5, 20):
+                expected = [matcher.match(extraction, top_k).to_dict() for extraction in extractions]
+                actual = [result.to_dict() for result in matcher.match_batch(extractions, top_k)]
+                assert actual == expected
+
+    def test_api_batch_same_as_single(self):
+        """测试 API 批量匹配（达到分组阈值）与逐条匹配结果一致，match_batch 保持输入顺序"""
+        from modules.intelligent_extraction.api_handler import IntelligentExtractionAPI
+
+        api = IntelligentExtractionAPI(API_CONFIG, ListDeviceLoader(DEVICES))
+        texts = ["温度传感器 量程-40~80℃", "霍尼韦尔 CO-1 探测器", "CO浓度探测器 量程0~250ppm",
+                 "西门子 温度传感器", "电动球阀 DN25"] * (GROUPED_MATCH_MIN_TEXTS // 5 + 1)
+
+        expected = [api.match_uncached(text, 5) for text in texts]
+        assert strip_timing(api.match_batch_uncached(texts, 5)) == strip_timing(expected)
+
+        result = api.match_batch([{'text': text} for text in texts], top_k=5)
+        assert [item['text'] for item in result['data']] == texts
+        assert strip_timing([item['result'] for item in result['data']]) == strip_timing(expected)
@@ -0,0 +1,114 @@
+"""
+匹配器设备索引增量更新单元测试（与全量重建的匹配结果一致）
+Feature: intelligent-feature-extraction
+"""
+
+import json
+import random
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from modules.intelligent_extraction.intelligent_matcher import IntelligentMatcher
+from modules.intelligent_extraction.data_models import (
+    ExtractionResult, DeviceTypeInfo, ParameterCandidate, AuxiliaryInfo
+)
+from .helpers import ListDeviceLoader
+
+
+CONFIG = {
+    'weights': {'device_type': 0.30, 'keyword': 0.30, 'parameters': 0.20, 'brand': 0.15, 'others': 0.05},
+    'thresholds': {'strict': 90, 'relaxed': 70, 'fuzzy': 50, 'fallback': 30},
+    'synonym_map': {'co2': ['二氧化碳']},
+}
+
+DEVICE_TYPES = ['温度传感器', 'CO浓度探测器', 'CO2传感器', '电动球阀', '']
+PARAM_VALUES = ['0-250ppm', '4~20mA', '0-10V', 'DN25', 'CO', 'co2', '-40~80℃', '水', '±5%']
+
+
+def generate_device(rng, device_id):
+    key_params = {
+        rng.choice(['量程', '输出信号', '精度', '通径', '介质']): rng.choice(PARAM_VALUES)
+        for _ in range(rng.randint(0, 3))
+    }
+    return {
+        'device_id': device_id, 'device_name': f'设备{device_id}',
+        'device_type': rng.choice(DEVICE_TYPES),
+        'brand': rng.choice(['霍尼韦尔', '西门子', '']),
+        'spec_model': rng.choice(['', f'T-{rng.randint(0, 5)}', f'T-{rng.randint(0, 5)}.{rng.randint(1, 3)}']),
+        'unit_price': rng.choice([0, 100, 200]),
+        'key_params': json.dumps(key_params, ensure_ascii=False),
+    }
+
+
+def generate_extraction(rng):
+    extraction = ExtractionResult()
+    extraction.device_type = DeviceTypeInfo(
+        main_type=rng.choice(['传感器', '探测器', '阀', '未知']),
+        sub_type=rng.choice(DEVICE_TYPES + ['未知']),
+        keywords=rng.sample(['CO', 'co2', '温度', 'ppm', 'DN'], rng.randint(0, 2)),
+        confidence=0.9
+    )
+    extraction.parameter_candidates = [
+        ParameterCandidate(value=v, param_type='x')
+        for v in rng.sample(['0~250ppm', '4-20mA', 'DN25', '水', '10-30'], rng.randint(0, 2))
+    ]
+    extraction.auxiliary = AuxiliaryInfo(brand=rng.choice(['霍尼韦尔', None]),
+                                         model=rng.choice([None, None, 'T-1', 't-2.1']))
+    return extraction
+
+
+class TestMatcherIncrementalUpdateUnit:
+    """匹配器设备索引增量更新单元测试"""
+
+    def test_same_results_as_rebuild(self):
+        """测试增删改后的匹配结果与按同一设备库全量重建的匹配器一致"""
+        rng = random.Random(7)
+        devices = [generate_device(rng, str(i)) for i in range(40)]
+        loader = ListDeviceLoader(list(devices))
+        matcher = IntelligentMatcher(CONFIG, loader)
+
+        next_id = 100
+        for _ in range(20):
+            # 一批变更：删除、原位更新、追加新设备
+            removed = rng.sample(devices, min(len(devices), rng.randint(0, 2)))
+            devices = [d for d in devices if d not in removed]
+            updated = []
+            for i in rng.sample(range(len(devices)), min(len(devices), rng.randint(0, 2))):
+                devices[i] = generate_device(rng, devices[i]['device_id'])
+                updated.append(devices[i])
+            added = [generate_device(rng, str(next_id + i)) for i in range(rng.randint(0, 2))]
+            next_id += len(added)
+            devices.extend(added)
+
+            loader.devices = list(devices)
+            matcher.apply_changes(upserts=updated + added, removals=[d['device_id'] for d in removed])
+            rebuilt = IntelligentMatcher(CONFIG, ListDeviceLoader(list(devices)))
+
+            for _ in range(10):
+                extraction = generate_extraction(rng)
+                top_k = rng.choice([1, 5, 20])
+                expected = rebuilt.match(extraction, top_k).to_dict()['candidates']
+                assert matcher.match(extraction, top_k).to_dict()['candidates'] == expected
+
+    def test_upsert_and_remove_single_device(self):
+        """测试单个设备的新增、更新和删除立即反映在匹配结果中"""
+        loader = ListDeviceLoader([])
+        matcher = IntelligentMatcher(CONFIG, loader)
+
+        extraction = ExtractionResult()
+        extraction.auxiliary = AuxiliaryInfo(model='VBI61.15')
+
+        matcher.upsert_device({'device_id': 'a', 'device_name': '球阀', 'device_type': '电动球阀',
+                               'spec_model': 'VBI61.15'})
+        assert [c.device_name for c in matcher.match(extraction).candidates] == ['球阀']
+
+        matcher.upsert_device({'device_id': 'a', 'device_name': '座阀', 'device_type': '座阀',
+                               'spec_model': 'VBI61.15'})
+        assert [c.device_name for c in matcher.match(extraction).candidates] == ['座阀']
+        assert '电动球阀' not in matcher.device_cache_by_type
+
+        assert matcher.remove_device('a') is True
+        assert matcher.remove_device('a') is False
+        assert matcher.match(extraction).candidates == []
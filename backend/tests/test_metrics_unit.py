@@ -0,0 +1,86 @@
+"""
+运行指标模块单元测试
+Feature: intelligent-feature-extraction
+"""
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from modules.metrics import Histogram, MetricsRegistry
+
+
+class TestMetricsUnit:
+    """运行指标模块单元测试"""
+
+    def test_histogram_quantiles(self):
+        """测试由桶计数插值估算分位数"""
+        histogram = Histogram(buckets=(0.01, 0.1, 1.0))
+        assert histogram.quantile(0.5) is None
+
+        for value in [0.005] * 50 + [0.05] * 45 + [0.5] * 4 + [5.0]:
+            histogram.observe(value)
+
+        assert histogram.count == 100
+        assert histogram.cumulative_counts() == [50, 95, 99, 100]
+        assert histogram.quantile(0.5) == pytest.approx(0.01)
+        assert histogram.quantile(0.95) == pytest.approx(0.1)
+        assert histogram.quantile(0.99) == pytest.approx(1.0)
+        # 落在 +Inf 桶时返回最大的有限桶上限
+        assert histogram.quantile(1.0) == 1.0
+
+    def test_timed_records_duration_and_errors(self):
+        """测试计时装饰器和上下文记录耗时，异常时记录出错次数"""
+        registry = MetricsRegistry()
+
+        @registry.timed('parse')
+        def parse(value):
+            if value is None:
+                raise ValueError('empty')
+            return value
+
+        assert parse(1) == 1
+        with pytest.raises(ValueError):
+            parse(None)
+        with registry.time('serialize'):
+            pass
+
+        snapshot = registry.snapshot()
+        assert (snapshot['parse']['count'], snapshot['parse']['errors']) == (2, 1)
+        assert (snapshot['serialize']['count'], snapshot['serialize']['errors']) == (1, 0)
+        assert snapshot['parse']['p99_seconds'] is not None
+
+    def test_render_prometheus_text(self):
+        """测试 Prometheus 文本格式输出"""
+        registry = MetricsRegistry(namespace='test', buckets=(0.1, 1.0))
+        registry.observe('match', 0.05)
+        registry.observe('match', 0.5)
+        registry.record_error('match')
+
+        lines = registry.render().splitlines()
+        assert '# TYPE test_stage_duration_seconds histogram' in lines
+        assert 'test_stage_duration_seconds_bucket{stage="match",le="0.1"} 1' in lines
+        assert 'test_stage_duration_seconds_bucket{stage="match",le="+Inf"} 2' in lines
+        assert 'test_stage_duration_seconds_count{stage="match"} 2' in lines
+        assert 'test_stage_duration_seconds_sum{stage="match"} 0.55' in lines
+        assert 'test_stage_duration_quantile_seconds{stage="match",quantile="0.5"} 0.1' in lines
+        assert 'test_stage_errors_total{stage="match"} 1' in lines
+
+    def test_drain_and_merge(self):
+        """测试 drain 取出并清空记录，merge 合并到另一个注册表（多进程匹配汇总）"""
+        worker = MetricsRegistry(buckets=(0.1, 1.0))
+        worker.observe('match', 0.05)
+        worker.observe('match', 0.5)
+        worker.record_error('match')
+
+        parent = MetricsRegistry(buckets=(0.1, 1.0))
+        parent.observe('match', 2.0)
+        parent.merge(worker.drain())
+
+        assert worker.snapshot() == {}
+        snapshot = parent.snapshot()['match']
+        assert (snapshot['count'], snapshot['errors']) == (3, 1)
+        assert snapshot['sum_seconds'] == pytest.approx(2.55)
+        assert 'excel_matching_stage_duration_seconds_bucket{stage="match",le="0.1"} 1' in parent.render()
@@ -0,0 +1,41 @@
+"""
+型号索引单元测试
+Feature: intelligent-feature-extraction
+"""
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from modules.intelligent_extraction.device_profile import build_device_profile
+from modules.intelligent_extraction.model_index import ModelIndex
+
+
+class TestModelIndexUnit:
+    """型号索引单元测试"""
+
+    @pytest.fixture
+    def index(self):
+        models = ['VBI61.15', 'VBI61.20', 'vbi61.15', 'VBI610', 'VBI61-25', 'HST-RA', '']
+        profiles = [
+            build_device_profile({'device_id': str(i), 'spec_model': model})
+            for i, model in enumerate(models)
+        ]
+        return ModelIndex(profiles)
+
+    def test_find_exact_ignores_case(self, index):
+        """测试型号精确查找（忽略大小写，保持设备库顺序）"""
+        assert [p.device_id for p in index.find_exact('vbi61.15')] == ['0', '2']
+        assert [p.device_id for p in index.find_exact('hst-ra')] == ['5']
+        assert index.find_exact('VBI61') == []
+        assert index.find_exact('') == []
+
+    def test_find_family(self, index):
+        """测试型号系列查找：VBI61 命中 VBI61.xx 但不命中 VBI610"""
+        family = {p.device_id for p in index.find_family('VBI61')}
+
+        assert family == {'0', '1', '2', '4'}
+        assert index.find_family('VBI6') == []
+        assert index.find_family('') == []
@@ -0,0 +1,93 @@
+"""
+多进程并行匹配单元测试
+Feature: intelligent-feature-extraction
+"""
+
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from modules.intelligent_extraction import parallel_matcher
+from modules.intelligent_extraction.api_handler import IntelligentExtractionAPI
+from modules.intelligent_extraction.parallel_matcher import fork_available
+from modules.metrics import metrics
+from .test_intelligent_extraction_config import FULL_CONFIG
+from .test_intelligent_extraction_integration import MockDeviceLoader
+
+
+TEXTS = [
+    "CO浓度探测器 量程0~250ppm 输出4~20mA 精度±5%",
+    "温度传感器 量程-40~80℃ 输出4-20mA",
+    "霍尼韦尔 CO-100",
+    "电动球阀 DN25",
+    "未知设备",
+]
+
+
+def strip_timing(results):
+    """去掉耗时字段后比较"""
+    return [{k: v for k, v in result.items() if k != 'performance'} for result in results]
+
+
+class TestParallelMatcherUnit:
+    """多进程并行匹配单元测试"""
+
+    @pytest.fixture
+    def api(self):
+        yield IntelligentExtractionAPI(FULL_CONFIG, MockDeviceLoader())
+        parallel_matcher.shutdown_pool()
+
+    @pytest.mark.skipif(not fork_available(), reason="需要支持 fork 的平台")
+    def test_parallel_same_as_serial(self, api):
+        """测试并行匹配结果与逐条匹配一致，且保持输入顺序"""
+        texts = TEXTS * 3
+        expected = [api.match_uncached(text, 20) for text in texts]
+
+        api.result_cache.clear()
+        actual = api.match_texts(texts, top_k=20, workers=3, chunk_size=2)
+
+        assert strip_timing(actual) == strip_timing(expected)
+
+    @pytest.mark.skipif(not fork_available(), reason="需要支持 fork 的平台")
+    def test_pool_reused_until_catalog_changes(self, api):
+        """测试进程池在请求间复用，设备库版本变化后重新创建"""
+        api.start_match_workers(2)
+        pool = parallel_matcher._shared_pool._pool
+        assert pool is not None
+
+        api.match_texts(TEXTS, top_k=5, workers=2, chunk_size=2)
+        assert parallel_matcher._shared_pool._pool is pool
+
+        api.matcher.apply_changes(removals=['honeywell_co_001'])
+        api.result_cache.clear()
+        results = api.match_texts(TEXTS, top_k=5, workers=2, chunk_size=2)
+        assert parallel_matcher._shared_pool._pool is not pool
+        # 新进程池中的子进程看到的是更新后的设备库
+        assert all(candidate['device_id'] != 'honeywell_co_001'
+                   for result in results for candidate in result['data']['candidates'])
+
+    @pytest.mark.skipif(not fork_available(), reason="需要支持 fork 的平台")
+    def test_worker_metrics_merged(self, api):
+        """测试子进程记录的阶段耗时合并到主进程的指标"""
+        metrics.reset()
+        api.match_texts(TEXTS, top_k=5, workers=0)
+        serial = {stage: entry['count'] for stage, entry in metrics.snapshot().items()}
+
+        metrics.reset()
+        api.result_cache.clear()
+        api.match_texts(TEXTS, top_k=5, workers=2, chunk_size=2)
+        parallel = {stage: entry['count'] for stage, entry in metrics.snapshot().items()}
+
+        assert serial
+        assert parallel == serial
+
+    def test_serial_when_single_worker(self, api, monkeypatch):
+        """测试单进程配置或只有一块时不创建进程池"""
+        def fail(*args, **kwargs):
+            raise AssertionError("不应创建进程池")
+        monkeypatch.setattr(parallel_matcher, '_match_chunks_parallel', fail)
+
+        assert len(api.match_texts(TEXTS, top_k=5, workers=1, chunk_size=2)) == len(TEXTS)
+        assert len(api.match_texts(TEXTS, top_k=5, workers=4, chunk_size=10)) == len(TEXTS)
@@ -0,0 +1,55 @@
+"""
+参数候选提取器单元测试
+Feature: intelligent-feature-extraction
+"""
+
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from modules.intelligent_extraction.parameter_candidate_extractor import ParameterCandidateExtractor
+
+
+TEXT = "西门子 冷冻水 温度传感器 量程0~250ppm 输出4~20mA 精度±5% 冷冻水管 RS485"
+
+
+def summary(candidates):
+    return [(c.param_type, c.value, c.position) for c in candidates]
+
+
+class TestParameterCandidateExtractorUnit:
+    """参数候选提取器单元测试"""
+
+    def test_candidates(self, capsys):
+        """测试正则候选（各模式独立匹配）和关键词候选（每个关键词取第一次出现），不输出调试信息"""
+        extractor = ParameterCandidateExtractor({
+            'medium_keywords': ['水', '冷冻水'],
+            'brand_keywords': ['西门子', '霍尼韦尔']
+        })
+        candidates = summary(extractor.extract_all_candidates(TEXT))
+
+        assert ('brand', '西门子', 0) in candidates
+        assert ('medium', '冷冻水', 4) in candidates and ('medium', '水', 6) in candidates
+        assert ('range', '4~20mA', TEXT.index('4~20mA')) in candidates
+        # 默认输出信号模式带分组，候选值为分组1（单位）
+        assert ('output', 'mA', TEXT.index('4~20mA')) in candidates
+        assert ('accuracy', '±5%', TEXT.index('±5%')) in candidates
+        assert ('communication', 'RS485', TEXT.index('RS485')) in candidates
+        assert len(candidates) == len(set((t, v) for t, v, _ in candidates))
+        assert [p for _, _, p in candidates] == sorted(p for _, _, p in candidates)
+        assert capsys.readouterr().out == ''
+
+    def test_double_escaped_patterns(self):
+        """测试配置中被多转义一次的模式与原模式提取结果相同，错误的模式被跳过"""
+        double_escaped = [
+            dict(p, pattern=p['pattern'].replace('\\', '\\\\')) for p in ParameterCandidateExtractor.DEFAULT_PATTERNS
+        ]
+        broken = {'id': 'broken', 'pattern': '([0-9', 'enabled': True}
+        disabled = dict(ParameterCandidateExtractor.DEFAULT_PATTERNS[0], id='disabled', enabled=False)
+
+        expected = ParameterCandidateExtractor({}).extract_all_candidates(TEXT)
+        extractor = ParameterCandidateExtractor({'parameter_patterns': double_escaped + [broken, disabled]})
+        assert summary(extractor.extract_all_candidates(TEXT)) == summary(expected)
+        assert [p['id'] for _, _, p in extractor._compiled_patterns] == \
+            [p['id'] for p in ParameterCandidateExtractor.DEFAULT_PATTERNS]
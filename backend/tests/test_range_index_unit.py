@@ -0,0 +1,85 @@
+"""
+数字范围区间索引单元测试
+Feature: intelligent-feature-extraction
+"""
+
+import random
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from modules.intelligent_extraction.data_models import ParameterCandidate
+from modules.intelligent_extraction.device_profile import build_device_profile
+from modules.intelligent_extraction.intelligent_matcher import IntelligentMatcher
+from modules.intelligent_extraction.range_index import IntervalIndex, RangeIndex
+from modules.intelligent_extraction.units import parse_canonical
+from .helpers import ListDeviceLoader
+from .test_matcher_incremental_update_unit import CONFIG, generate_device
+
+
+class TestRangeIndexUnit:
+    """数字范围区间索引单元测试"""
+
+    def test_interval_overlap_same_as_scan(self):
+        """测试区间重叠查询与逐个比较的结果一致"""
+        rng = random.Random(0)
+        for _ in range(100):
+            intervals = []
+            for i in range(rng.randint(0, 50)):
+                low = rng.randint(-50, 100)
+                intervals.append((float(low), float(low + rng.randint(-5, 60)), i))
+            index = IntervalIndex(intervals)
+
+            low = rng.randint(-60, 110)
+            high = low + rng.randint(0, 40)
+            expected = sorted(item for start, end, item in intervals if end >= low and start <= high)
+            assert sorted(index.overlapping(low, high)) == expected
+
+    def test_overlapping_params(self):
+        """测试参数值区间查询"""
+        profiles = [
+            build_device_profile({'device_id': '1', 'device_type': 'CO浓度探测器', 'key_params': '{"量程": "0-250ppm"}'}),
+            build_device_profile({'device_id': '2', 'device_type': 'CO浓度探测器', 'key_params': '{"量程": "0～1000PPM"}'}),
+            build_device_profile({'device_id': '3', 'device_type': '电动球阀', 'key_params': '{"通径": "DN25", "电压": "0-10V"}'}),
+        ]
+        index = RangeIndex(profiles)
+
+        assert index.overlapping_params((5.0, 8.0)) == {0: frozenset({0}), 1: frozenset({0}), 2: frozenset({1})}
+        assert index.overlapping_params((2000.0, 3000.0)) == {}
+
+    def test_overlapping_params_by_device_type(self):
+        """测试按设备类型和规范单位分组查询（含增量加入的设备）"""
+        profiles = [
+            build_device_profile({'device_id': '1', 'device_type': '电动球阀', 'key_params': {'通径': 'DN25'}}),
+            build_device_profile({'device_id': '2', 'device_type': '座阀', 'key_params': {'通径': 'DN15-50'}}),
+            build_device_profile({'device_id': '3', 'device_type': '电动球阀', 'key_params': {'量程': '1-1.6MPa'}}),
+        ]
+        index = RangeIndex(profiles, unit_aware=True)
+        dn25 = parse_canonical('dn25')
+
+        assert index.overlapping_params((), dn25) == {0: frozenset({0}), 1: frozenset({0})}
+        assert index.overlapping_params((), dn25, '电动球阀') == {0: frozenset({0})}
+        assert index.overlapping_params((), dn25, '温度传感器') == {}
+        # 数字相同、单位不同的参数不按数字判断
+        assert index.overlapping_params((1.0, 1.5), parse_canonical('1~1.5kpa'), '电动球阀') == {}
+        assert index.overlapping_params((1.0, 1.5), None, '电动球阀') == {2: frozenset({0})}
+
+        index.add(build_device_profile({'device_id': '4', 'device_type': '电动球阀', 'key_params': {'通径': '25mm'}}))
+        assert index.overlapping_params((), dn25, '电动球阀') == {0: frozenset({0}), 3: frozenset({0})}
+
+    def test_scoring_shortcut_same_as_direct(self):
+        """测试逐设备评分时按请求查询区间索引的结果与逐参数比较数字范围一致（含增量更新）"""
+        rng = random.Random(11)
+        values = ['0~250ppm', '4-20mA', 'DN25', '25mm', 'DN15-50', '水', '10-30', '0-1.6MPa', '-40~80℃']
+        matcher = IntelligentMatcher(CONFIG, ListDeviceLoader([generate_device(rng, str(i)) for i in range(60)]))
+
+        for round_ in range(3):
+            for _ in range(30):
+                candidates = [ParameterCandidate(value=v, param_type='x') for v in rng.sample(values, 3)]
+                range_hits = {}
+                for profile in matcher._all_profiles_cache:
+                    assert (matcher._match_candidates_to_device(candidates, profile, range_hits) ==
+                            matcher._match_candidates_to_device(candidates, profile))
+            matcher.apply_changes(upserts=[generate_device(rng, f'new{round_}-{i}') for i in range(5)],
+                                  removals=[str(round_)])
@@ -0,0 +1,119 @@
+"""
+并发请求合并单元测试
+Feature: intelligent-feature-extraction
+"""
+
+import threading
+import time
+import pytest
+import sys
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from modules.single_flight import SingleFlight
+from modules.intelligent_extraction.api_handler import IntelligentExtractionAPI
+from modules.intelligent_extraction.match_cache import extraction_cache
+from .helpers import ListDeviceLoader
+from .test_match_cache_unit import API_CONFIG, DEVICES, TEXT
+
+
+def run_concurrently(funcs):
+    """同时启动全部调用，按顺序返回结果"""
+    barrier = threading.Barrier(len(funcs))
+
+    def run(func):
+        barrier.wait()
+        return func()
+
+    with ThreadPoolExecutor(max_workers=len(funcs)) as pool:
+        return list(pool.map(run, funcs))
+
+
+def slow_counter(monkeypatch, api, name, delay=0.2):
+    """让 API 方法变慢并记录每次调用的参数，保证并发请求在执行期间到达"""
+    calls = []
+    original = getattr(api, name)
+
+    def wrapper(*args, **kwargs):
+        calls.append(args)
+        time.sleep(delay)
+        return original(*args, **kwargs)
+    monkeypatch.setattr(api, name, wrapper)
+    return calls
+
+
+class TestSingleFlightUnit:
+    """并发请求合并单元测试"""
+
+    def test_concurrent_calls_share_one_computation(self):
+        """测试相同键的并发调用只计算一次，其余调用等待并共享结果"""
+        flights = SingleFlight()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return {'value': 42}
+
+        results = run_concurrently([lambda: flights.do('key', compute)] * 5)
+        assert len(calls) == 1
+        assert all(value == {'value': 42} for value, _ in results)
+        assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+        assert flights.in_flight() == 0
+
+        # 计算完成后不保留结果
+        assert flights.do('key', compute) == ({'value': 42}, False)
+        assert len(calls) == 2
+
+    def test_error_propagates_to_waiters(self):
+        """测试执行方出错时等待方收到同一个异常，之后可以重新执行"""
+        flights = SingleFlight()
+
+        def fail():
+            time.sleep(0.2)
+            raise ValueError('匹配失败')
+
+        def call():
+            try:
+                flights.do('key', fail)
+            except ValueError as e:
+                return str(e)
+
+        assert run_concurrently([call] * 3) == ['匹配失败'] * 3
+        assert flights.do('key', lambda: 1) == (1, False)
+
+    def test_api_match_and_preview_coalesced(self, monkeypatch):
+        """测试并发的相同匹配/预览请求只计算一次，各自得到独立的结果副本"""
+        extraction_cache.clear()
+        api = IntelligentExtractionAPI(API_CONFIG, ListDeviceLoader(DEVICES))
+        expected = api.match_uncached(TEXT, 5)['data']
+        match_calls = slow_counter(monkeypatch, api, 'match_uncached')
+        preview_calls = slow_counter(monkeypatch, api, 'preview_uncached')
+
+        results = run_concurrently([lambda: api.match(TEXT, 5)] * 4)
+        assert len(match_calls) == 1
+        assert all(result['data'] == expected for result in results)
+        assert len({id(result['data']) for result in results}) == 4
+
+        previews = run_concurrently([lambda: api.preview(TEXT)] * 4)
+        assert len(preview_calls) == 1
+        assert len({id(preview['data']) for preview in previews}) == 4
+
+    def test_api_match_texts_overlapping(self, monkeypatch):
+        """测试并发的批量匹配中重复的文本只匹配一次，结果与逐条匹配一致"""
+        extraction_cache.clear()
+        api = IntelligentExtractionAPI(API_CONFIG, ListDeviceLoader(DEVICES))
+        texts = [TEXT, "霍尼韦尔 CO-1 探测器", "CO浓度探测器 量程0~250ppm"]
+        expected = [api.match_uncached(text, 5)['data'] for text in texts]
+        calls = slow_counter(monkeypatch, api, 'match_batch_uncached')
+
+        results = run_concurrently([
+            lambda: api.match_texts(texts, top_k=5),
+            lambda: api.match_texts(texts[1:] + texts[:1], top_k=5),
+        ])
+        assert sorted(text for batch, _ in calls for text in batch) == sorted(texts)
+        assert [r['data'] for r in results[0]] == expected
+        assert [r['data'] for r in results[1]] == expected[1:] + expected[:1]
+        assert api.inflight.in_flight() == 0
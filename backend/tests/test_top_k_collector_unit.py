@@ -0,0 +1,46 @@
+"""
+有界 Top-K 收集器单元测试
+Feature: intelligent-feature-extraction
+"""
+
+import random
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from modules.intelligent_extraction.top_k_collector import TopKCollector
+
+
+class TestTopKCollectorUnit:
+    """有界 Top-K 收集器单元测试"""
+
+    def test_same_order_as_full_sort(self):
+        """测试结果与完整排序后截断一致（含同分时的稳定顺序）"""
+        rng = random.Random(0)
+        for _ in range(200):
+            items = [
+                (rng.choice([30.0, 45.5, 70.0, 90.0]), rng.randint(0, 3), rng.choice([0, 100, 150.5]), i)
+                for i in range(rng.randint(0, 40))
+            ]
+            k = rng.randint(1, 20)
+
+            collector = TopKCollector(k)
+            for score, count, price, i in items:
+                collector.push(score, count, price, i)
+
+            expected = [item[3] for item in sorted(items, key=lambda x: (-x[0], -x[1], x[2]))[:k]]
+            assert collector.results() == expected
+
+    def test_bounded_size(self):
+        """测试只保留 k 个候选"""
+        collector = TopKCollector(3)
+        for i in range(10):
+            collector.push(float(i), 0, 0, i)
+
+        assert len(collector) == 3
+        assert collector.results() == [9, 8, 7]
+
+        empty = TopKCollector(0)
+        empty.push(100.0, 1, 0, 'x')
+        assert empty.results() == []
@@ -0,0 +1,141 @@
+"""
+单位注册表单元测试
+Feature: intelligent-feature-extraction
+"""
+
+import random
+import pytest
+import sys
+import os
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from modules.intelligent_extraction.data_models import (
+    DeviceTypeInfo, ExtractionResult, ParameterCandidate
+)
+from modules.intelligent_extraction.device_profile import build_device_profile
+from modules.intelligent_extraction.intelligent_matcher import IntelligentMatcher
+from modules.intelligent_extraction.units import (
+    CanonicalRange, canonical_range, parse_canonical, parse_range
+)
+from .test_intelligent_extraction_config import MATCHING_CONFIG
+from .helpers import ListDeviceLoader
+
+
+class TestUnitsUnit:
+    """单位注册表单元测试"""
+
+    def test_canonical_range(self):
+        """测试同一物理量的不同写法换算到规范单位，未注册的单位原样保留"""
+        assert canonical_range(0, 1.6, 'MPa') == CanonicalRange('pressure', 'pa', 0.0, 1.6e6)
+        assert canonical_range(0, 1600, 'kPa') == canonical_range(0, 1.6, 'MPa')
+        assert canonical_range(0, 10, 'V').quantity == canonical_range(2, 10, 'VDC').quantity == 'voltage'
+        assert canonical_range(4, 20, 'mA') == CanonicalRange('current', 'ma', 4.0, 20.0)
+        assert canonical_range(25, 25, 'DN') == canonical_range(25, 25, 'mm')
+        assert canonical_range(32, 212, '°F') == CanonicalRange('temperature', '℃', 0.0, 100.0)
+        assert canonical_range(0, 5, 'Foo') == CanonicalRange('', 'foo', 0.0, 5.0)
+
+        assert canonical_range(0, 1, 'MPa').comparable(canonical_range(0, 100, 'kPa'))
+        assert not canonical_range(0, 10, 'V').comparable(canonical_range(4, 20, 'mA'))
+        assert not canonical_range(0, 5, 'foo').comparable(canonical_range(0, 5, 'foo'))
+
+        assert parse_range('量程-40~80℃') == (-40.0, 80.0, '℃')
+        assert parse_range('水') is None
+
+    @pytest.mark.parametrize('value, expected', [
+        ('dn25', (25.0, 25.0)),
+        ('25mm', (25.0, 25.0)),
+        ('dn15-dn50', (15.0, 50.0)),
+        ('dn15~50', (15.0, 50.0)),
+        ('dn25 pn16', (25.0, 25.0)),
+        ('15-50mm', (15.0, 50.0)),
+        ('2.5mm²', None),
+        ('10-30', None),
+    ])
+    def test_parse_canonical_length(self, value, expected):
+        """测试通径 DN 与毫米等价，单个值按 [值, 值] 处理"""
+        canonical = parse_canonical(value)
+        if expected is None:
+            assert canonical is None
+        else:
+            assert canonical == CanonicalRange('length', 'mm', *expected)
+
+    def test_profile_canonical(self):
+        """测试设备档案参数预先换算到规范单位，单位未注册时为空"""
+        profile = build_device_profile({'key_params': {'量程': '0-1000kPa', '输出': '4~20mA', '测量': '10-30'}})
+        assert [param.value_canonical for param in profile.params] == [
+            CanonicalRange('pressure', 'pa', 0.0, 1e6), CanonicalRange('current', 'ma', 4.0, 20.0), None
+        ]
+        assert parse_canonical('0-5foo') is None
+
+    @pytest.mark.parametrize('device_range, expected_raw, expected_unit_aware', [
+        ('0-100kPa', True, False),
+        ('1200-2000kPa', False, True),
+        ('10-20bar', False, True),
+        ('0-1.6MPa', True, True),
+        ('0~60℃', True, True),   # 不同物理量时只比较数字
+        ('4~20mA', False, False),
+    ])
+    def test_candidate_range_overlap(self, device_range, expected_raw, expected_unit_aware):
+        """测试参数候选范围匹配：按单位比较时同一物理量按规范单位比较，关闭后只比较数字"""
+        devices = [{'device_id': '1', 'device_name': '压力变送器', 'device_type': '压力传感器',
+                    'key_params': {'量程': device_range}}]
+        candidates = [ParameterCandidate(value='1~1.5MPa', param_type='range')]
+        for unit_aware, expected in ((False, expected_raw), (True, expected_unit_aware)):
+            config = dict(MATCHING_CONFIG, fuzzy_matching=dict(MATCHING_CONFIG['fuzzy_matching'],
+                                                               unit_aware_ranges=unit_aware))
+            matcher = IntelligentMatcher(config, ListDeviceLoader(devices))
+            profile = matcher._all_profiles_cache[0]
+            assert matcher._score_candidates_only(candidates, profile) == (1.0 if expected else 0.0)
+            assert bool(matcher.range_index.overlapping_params(*matcher._candidate_range_info('1~1.5mpa'))) is expected
+
+    @pytest.mark.parametrize('device_value, candidate, expected', [
+        ('DN25', '25mm', True),
+        ('25mm', 'DN25', True),
+        ('DN15-DN50', 'DN40', True),
+        ('DN15-50', 'DN65', False),
+        ('DN25', 'DN32', False),
+    ])
+    def test_nominal_diameter_match(self, device_value, candidate, expected):
+        """测试默认配置下通径 DN 与毫米等价（单个值和 DN 范围）"""
+        devices = [{'device_id': '1', 'device_name': '电动球阀', 'device_type': '电动球阀',
+                    'key_params': {'通径': device_value}}]
+        matcher = IntelligentMatcher(MATCHING_CONFIG, ListDeviceLoader(devices))
+        assert matcher.unit_aware_ranges
+        profile = matcher._all_profiles_cache[0]
+        score = matcher._score_candidates_only([ParameterCandidate(value=candidate, param_type='x')], profile)
+        assert score == (1.0 if expected else 0.0)
+
+    def test_unit_aware_columnar_same_as_python(self):
+        """测试默认（按单位比较）配置下列式评分与逐设备评分结果一致（含增量更新）"""
+        pytest.importorskip('numpy')
+        rng = random.Random(7)
+        values = ['0-100kPa', '0-1.6MPa', '1200-2000kPa', '10-20bar', '0~60℃', '4~20mA', '0-10V', '10-30', '水',
+                  'DN25', 'DN15-50', '32mm']
+
+        def device(device_id):
+            return {'device_id': device_id, 'device_name': f'设备{device_id}',
+                    'device_type': rng.choice(['压力传感器', '温度传感器']),
+                    'key_params': {name: rng.choice(values) for name in rng.sample(['量程', '输出', '测量'], 2)}}
+
+        config = {
+            'weights': {'device_type': 0.30, 'keyword': 0.30, 'parameters': 0.20, 'brand': 0.15, 'others': 0.05},
+        }
+        loader = ListDeviceLoader([device(str(i)) for i in range(40)])
+        python_matcher = IntelligentMatcher(config, loader)
+        columnar_matcher = IntelligentMatcher(dict(config, scoring_backend='columnar'), loader)
+
+        for round_ in range(3):
+            for _ in range(20):
+                extraction = ExtractionResult()
+                extraction.device_type = DeviceTypeInfo(main_type='传感器', sub_type='压力传感器', confidence=0.9)
+                extraction.parameter_candidates = [
+                    ParameterCandidate(value=value, param_type='range')
+                    for value in rng.sample(['1~1.5MPa', '0-500kPa', '3~5bar', '20-40℃', '4-20mA', 'DN25', '25mm', 'DN40'], 2)
+                ]
+                expected = python_matcher.match(extraction, 10).to_dict()['candidates']
+                assert columnar_matcher.match(extraction, 10).to_dict()['candidates'] == expected
+
+            upserts = [device(f'new{round_}-{i}') for i in range(5)]
+            python_matcher.apply_changes(upserts=upserts)
+            columnar_matcher.apply_changes(upserts=upserts)